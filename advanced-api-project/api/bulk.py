@@ -0,0 +1,161 @@
+# api/bulk.py
+
+"""
+Batch create/update/delete of books.
+
+Items are validated field-by-field (reusing
+BookSerializer.validate_publication_year), author FKs are resolved with a
+single query, and rows are written with bulk_create/bulk_update in chunked
+transactions. Every function returns a report with per-item errors instead
+of failing the whole batch.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import search
+from .cache import response_cache
+from .models import Author, Book
+from .serializers import BookSerializer
+
+CHUNK_SIZE = 500
+
+
+# -----------------------------------
+# Item validation
+# -----------------------------------
+class BookBulkItemSerializer(serializers.Serializer):
+    """
+    Validates one item of a bulk payload without touching the database.
+    `author` is checked later for the whole batch at once.
+    """
+
+    id = serializers.IntegerField(required=False)
+    title = serializers.CharField(max_length=255)
+    publication_year = serializers.IntegerField(min_value=0)
+    author = serializers.IntegerField()
+
+    validate_publication_year = BookSerializer.validate_publication_year
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _validate(items, partial=False):
+    """
+    Return ({index: validated_data}, {index: errors}).
+    """
+    valid, errors = {}, {}
+    for index, item in enumerate(items):
+        serializer = BookBulkItemSerializer(data=item, partial=partial)
+        if not serializer.is_valid():
+            errors[index] = serializer.errors
+        elif partial and 'id' not in serializer.validated_data:
+            errors[index] = {'id': ['This field is required.']}
+        else:
+            valid[index] = serializer.validated_data
+
+    # Resolve all referenced authors with one query.
+    author_ids = {data['author'] for data in valid.values() if 'author' in data}
+    known = set(Author.objects.filter(pk__in=author_ids).values_list('pk', flat=True))
+    for index, data in list(valid.items()):
+        if 'author' in data and data['author'] not in known:
+            errors[index] = {'author': [f'Invalid pk "{data["author"]}" - object does not exist.']}
+            del valid[index]
+    return valid, errors
+
+
+def _report(results, errors):
+    return {
+        'results': results,
+        'errors': [{'index': index, 'errors': errors[index]} for index in sorted(errors)],
+    }
+
+
+# -----------------------------------
+# Bulk operations
+# -----------------------------------
+def bulk_create_books(items):
+    valid, errors = _validate(items)
+
+    created = []
+    for chunk in _chunks(sorted(valid.items())):
+        books = [
+            Book(
+                title=data['title'],
+                publication_year=data['publication_year'],
+                author_id=data['author'],
+            )
+            for _, data in chunk
+        ]
+        with transaction.atomic():
+            Book.objects.bulk_create(books)
+            search.index_books(book_ids=[book.pk for book in books])
+        created += [{'index': index, 'id': book.pk} for (index, _), book in zip(chunk, books)]
+
+    # bulk_create() does not send post_save, so sync explicitly.
+    if created:
+        response_cache.bump(Book)
+    return _report(created, errors)
+
+
+def bulk_update_books(items):
+    valid, errors = _validate(items, partial=True)
+
+    updated = []
+    for chunk in _chunks(sorted(valid.items())):
+        with transaction.atomic():
+            books = Book.objects.select_for_update().in_bulk(
+                [data['id'] for _, data in chunk]
+            )
+            changed, fields = [], set()
+            # bulk_update() skips auto_now, so stamp updated_at ourselves.
+            now = timezone.now()
+            for index, data in chunk:
+                book = books.get(data['id'])
+                if book is None:
+                    errors[index] = {'id': ['Not found.']}
+                    continue
+                for name, value in data.items():
+                    if name == 'id':
+                        continue
+                    attname = 'author_id' if name == 'author' else name
+                    setattr(book, attname, value)
+                    fields.add(attname)
+                book.updated_at = now
+                changed.append(book)
+                updated.append({'index': index, 'id': book.pk})
+            if changed and fields:
+                Book.objects.bulk_update(changed, sorted(fields | {'updated_at'}))
+                search.index_books(book_ids=[book.pk for book in changed])
+
+    if updated:
+        response_cache.bump(Book)
+    return _report(updated, errors)
+
+
+def bulk_delete_books(ids):
+    errors, wanted = {}, {}
+    for index, pk in enumerate(ids):
+        if isinstance(pk, bool) or not isinstance(pk, int):
+            errors[index] = {'id': ['A valid integer is required.']}
+        else:
+            wanted[index] = pk
+
+    deleted = []
+    for chunk in _chunks(sorted(wanted.items())):
+        with transaction.atomic():
+            existing = set(
+                Book.objects.filter(pk__in=[pk for _, pk in chunk]).values_list('pk', flat=True)
+            )
+            Book.objects.filter(pk__in=existing).delete()
+        for index, pk in chunk:
+            if pk in existing:
+                deleted.append({'index': index, 'id': pk})
+            else:
+                errors[index] = {'id': ['Not found.']}
+
+    return _report(deleted, errors)
@@ -0,0 +1,181 @@
+# api/cache.py
+
+"""
+Read-through response cache for the Book API.
+
+Cached entries are keyed on the view, the normalized query string and a
+per-model generation number. Writing a model bumps its generation, so
+entries built before the write are never looked up again (they simply
+expire). A small in-process LRU sits in front of the shared Django cache.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+from rest_framework.response import Response
+
+
+# ----------------------------
+# In-process LRU
+# ----------------------------
+class LocalLRU:
+    """
+    Thread-safe, size-bounded LRU used as the first cache layer.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                return None
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# ----------------------------
+# Versioned response cache
+# ----------------------------
+class ResponseCache:
+    """
+    Two-level (local LRU + shared backend) cache of serialized response data.
+    """
+
+    key_prefix = 'api:response'
+
+    def __init__(self, alias='default', timeout=300, local_entries=512):
+        self.alias = alias
+        self.timeout = timeout
+        self.local = LocalLRU(local_entries)
+        self._stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'invalidations': 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    # Generations ------------------------------------------------------
+    def _generation_key(self, model):
+        return f'{self.key_prefix}:gen:{model._meta.label_lower}'
+
+    def generation(self, model):
+        key = self._generation_key(model)
+        generation = self.shared.get(key)
+        if generation is None:
+            # Seed from the clock so a generation evicted from the shared
+            # cache can never come back with a value already used.
+            self.shared.add(key, time.time_ns(), None)
+            generation = self.shared.get(key)
+        return generation
+
+    def bump(self, model):
+        """
+        Invalidate every cached response that depends on `model`.
+        """
+        key = self._generation_key(model)
+        try:
+            self.shared.incr(key)
+        except ValueError:
+            self.shared.set(key, time.time_ns(), None)
+        self._count('invalidations')
+
+    # Entries ----------------------------------------------------------
+    def make_key(self, name, model, request):
+        """
+        Build the key for `request`. Query parameters are sorted so that
+        `?a=1&b=2` and `?b=2&a=1` share an entry.
+        """
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in sorted(values)
+        )
+        raw = '|'.join([request.get_host(), request.path, urlencode(params)])
+        digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+        return f'{self.key_prefix}:{name}:{self.generation(model)}:{digest}'
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            self._count('local_hits')
+            return value
+        value = self.shared.get(key)
+        if value is not None:
+            self.local.set(key, value, self.timeout)
+            self._count('shared_hits')
+            return value
+        self._count('misses')
+        return None
+
+    def set(self, key, value):
+        self.local.set(key, value, self.timeout)
+        self.shared.set(key, value, self.timeout)
+
+    def clear(self):
+        self.local.clear()
+        with self._stats_lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+    # Metrics ----------------------------------------------------------
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+        hits = stats['local_hits'] + stats['shared_hits']
+        stats['hit_ratio'] = hits / lookups if lookups else 0.0
+        return stats
+
+
+response_cache = ResponseCache()
+
+
+# ----------------------------
+# View mixin
+# ----------------------------
+class CachedResponseMixin:
+    """
+    Serve GET responses from `response_cache`.
+    Set `cache_model` to the model whose writes invalidate the response.
+    """
+
+    cache_model = None
+
+    def get(self, request, *args, **kwargs):
+        key = response_cache.make_key(type(self).__name__, self.cache_model, request)
+        data = response_cache.get(key)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response_cache.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,151 @@
+# api/conditional.py
+
+"""
+Conditional requests for the Book and Author API.
+
+A detail ETag and Last-Modified come from an aggregate over the row's
+`updated_at` columns (and, for authors, their books'). A list ETag is
+built from the response cache generations of the models it shows plus
+the normalized query string, so it costs a cache read rather than an
+aggregate over the whole result set. Matching `If-None-Match`/
+`If-Modified-Since` returns 304 before anything is serialized, and
+`If-Match` on writes gives optimistic concurrency.
+"""
+
+import hashlib
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .cache import response_cache
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource has been modified since it was read.'
+    default_code = 'precondition_failed'
+
+
+def make_etag(*parts):
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8'))
+    return quote_etag(digest.hexdigest())
+
+
+def detail_validators(model, pk, aggregates):
+    """
+    Return (etag, last_modified) for one row, or (None, None) if it does
+    not exist. `aggregates` must include `latest`.
+    """
+    summary = model._default_manager.filter(pk=pk).aggregate(**aggregates)
+    if summary['latest'] is None:
+        return None, None
+    last_modified = max(v for v in summary.values() if isinstance(v, datetime))
+    etag = make_etag(model._meta.label_lower, pk, *[summary[key] for key in sorted(summary)])
+    return etag, last_modified
+
+
+# ----------------------------
+# GET
+# ----------------------------
+class ConditionalGetMixin:
+    """
+    Answer GET with 304 Not Modified when the client's validators match.
+
+    `etag_aggregates` are the aggregates the validators are built from;
+    add related columns when the response nests related rows.
+    """
+
+    etag_aggregates = {'latest': Max('updated_at')}
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            if etag:
+                response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    """
+    Validators for a list endpoint: the ETag changes whenever one of
+    `etag_models` is written (see api.cache.ResponseCache.bump). There is
+    no Last-Modified, which would need an aggregate over every row.
+    """
+
+    etag_models = ()
+
+    def get_validators(self):
+        params = sorted(
+            (key, value)
+            for key, values in self.request.query_params.lists()
+            for value in sorted(values)
+        )
+        generations = [response_cache.generation(model) for model in self.etag_models]
+        return make_etag(type(self).__name__, params, *generations), None
+
+
+class ConditionalDetailMixin(ConditionalGetMixin):
+    """
+    Validators for a detail endpoint, read with one aggregate query.
+    """
+
+    def get_validators(self):
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return detail_validators(self.get_queryset().model, pk, self.etag_aggregates)
+
+
+# ----------------------------
+# Writes
+# ----------------------------
+class IfMatchMixin:
+    """
+    Honour `If-Match` on update/delete: the write only happens if the
+    client's ETag matches the current row, otherwise 412 is returned.
+    The row is locked while it is checked and written.
+    """
+
+    etag_aggregates = ConditionalGetMixin.etag_aggregates
+
+    def get_object(self):
+        if_match = self.request.headers.get('If-Match')
+        if not if_match:
+            return super().get_object()
+
+        self.queryset = self.get_queryset().select_for_update()
+        obj = super().get_object()
+        etags = parse_etags(if_match)
+        current, _ = detail_validators(type(obj), obj.pk, self.etag_aggregates)
+        if '*' not in etags and current not in etags:
+            raise PreconditionFailed()
+        return obj
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            response = super().update(request, *args, **kwargs)
+            etag, _ = detail_validators(
+                self.get_queryset().model,
+                self.kwargs[self.lookup_url_kwarg or self.lookup_field],
+                self.etag_aggregates,
+            )
+        if etag:
+            response['ETag'] = etag
+        return response
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().destroy(request, *args, **kwargs)
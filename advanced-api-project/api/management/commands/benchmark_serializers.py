@@ -0,0 +1,70 @@
+"""
+Compare BookSerializer/AuthorSerializer with their compiled read plans.
+
+    python manage.py benchmark_serializers
+    python manage.py benchmark_serializers --rows 1000 10000 100000
+
+Rows are created inside a transaction that is rolled back afterwards, so
+the benchmark leaves the database unchanged.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Author, Book
+from api.serializers import AuthorSerializer, BookSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark full vs compiled read serialization of books and authors.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--books-per-author', type=int, default=10)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"case":<22}{"rows":>8}{"full (s)":>12}{"plan (s)":>12}{"speedup":>10}')
+        for rows in options['rows']:
+            try:
+                with transaction.atomic():
+                    self.populate(rows, options['books_per_author'])
+                    self.compare('books', rows, BookSerializer, Book.objects.all())
+                    self.compare('authors+books', rows, AuthorSerializer, Author.objects.all())
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def populate(self, rows, per_author):
+        authors = Author.objects.bulk_create(
+            [Author(name=f'Author {i}') for i in range((rows + per_author - 1) // per_author)]
+        )
+        Book.objects.bulk_create(
+            [
+                Book(title=f'Book {i}', publication_year=1900 + i % 120,
+                     author=authors[i // per_author])
+                for i in range(rows)
+            ],
+            batch_size=5000,
+        )
+
+    def compare(self, label, rows, serializer_class, queryset):
+        start = time.perf_counter()
+        full = serializer_class(serializer_class.setup_eager_loading(queryset), many=True).data
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        plan = serializer_class.read_plan()
+        fast = plan.render(plan.values(queryset))
+        plan_time = time.perf_counter() - start
+
+        assert len(full) == len(fast)
+        self.stdout.write(
+            f'{label:<22}{rows:>8}{full_time:>12.3f}{plan_time:>12.3f}'
+            f'{full_time / plan_time:>9.1f}x'
+        )
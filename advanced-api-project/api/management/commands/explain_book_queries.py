@@ -0,0 +1,162 @@
+"""
+Replay BookListView query strings and report how the database runs them.
+
+    python manage.py explain_book_queries
+    python manage.py explain_book_queries --file access_log_sample.txt
+
+Each line of the file is a query string (`ordering=title&author=3`) or a
+URL containing one. Every SQL statement the view issues is run through
+EXPLAIN (QUERY PLAN on SQLite); full table scans and sorts that do not use
+an index are reported together with a suggested composite index.
+"""
+
+from urllib.parse import parse_qsl, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import APIException
+from rest_framework.test import APIRequestFactory
+
+from api.models import Book
+from api.views import BookListView
+
+DEFAULT_SAMPLES = [
+    '',
+    'ordering=title',
+    'ordering=-publication_year',
+    'publication_year=2020',
+    'publication_year=2020&ordering=title',
+    'author=1',
+    'author=1&ordering=-publication_year',
+    'title=Django',
+    'search=django',
+]
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the SQL issued by BookListView for sample query strings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='File with one query string or URL per line.')
+        parser.add_argument('--show-sql', action='store_true', help='Print each statement.')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'EXPLAIN parsing is not supported on {connection.vendor}.')
+
+        samples = self.load_samples(options['file']) if options['file'] else DEFAULT_SAMPLES
+        suggestions = set()
+        problems = 0
+
+        for query_string in samples:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'?{query_string}'))
+            try:
+                statements = self.replay(query_string)
+            except APIException as exc:
+                self.stdout.write(self.style.WARNING(f'  skipped: {exc.detail}'))
+                continue
+            for sql in statements:
+                plan = self.explain(sql)
+                issues = self.find_issues(plan)
+                if options['show_sql']:
+                    self.stdout.write(f'  {sql}')
+                for line in plan:
+                    self.stdout.write(f'    {line}')
+                for issue in issues:
+                    problems += 1
+                    self.stdout.write(self.style.WARNING(f'  ! {issue}'))
+                if issues:
+                    suggestion = self.suggest_index(query_string)
+                    if suggestion:
+                        suggestions.add(suggestion)
+
+        self.stdout.write('')
+        if not problems:
+            self.stdout.write(self.style.SUCCESS('No full scans or unindexed sorts found.'))
+        for fields in sorted(suggestions):
+            self.stdout.write(self.style.NOTICE(
+                f'Missing index: models.Index(fields={list(fields)!r})'
+            ))
+
+    # ----------------------------
+    # Replay
+    # ----------------------------
+    def load_samples(self, path):
+        try:
+            with open(path, encoding='utf-8') as handle:
+                lines = [line.strip() for line in handle]
+        except OSError as exc:
+            raise CommandError(exc)
+        return [urlsplit(line).query if '?' in line else line for line in lines if line]
+
+    def replay(self, query_string):
+        """
+        Run BookListView.list() for the query string (bypassing the response
+        cache) and return the SELECT statements it touched api_book with.
+        """
+        host = next((h for h in settings.ALLOWED_HOSTS if '*' not in h), 'localhost')
+        request = APIRequestFactory().get(
+            '/api/books/', dict(parse_qsl(query_string)), HTTP_HOST=host.lstrip('.')
+        )
+        view = BookListView()
+        view.setup(request)
+        view.request = view.initialize_request(request)
+        view.format_kwarg = None
+
+        with CaptureQueriesContext(connection) as captured:
+            view.list(view.request)
+
+        table = Book._meta.db_table
+        return [
+            query['sql'] for query in captured.captured_queries
+            if query['sql'].startswith('SELECT') and table in query['sql']
+        ]
+
+    # ----------------------------
+    # Plans
+    # ----------------------------
+    def explain(self, sql):
+        prefix = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else 'EXPLAIN'
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}')
+            rows = cursor.fetchall()
+        # SQLite rows are (id, parent, notused, detail); PostgreSQL rows are (line,).
+        return [row[-1] for row in rows]
+
+    def find_issues(self, plan):
+        table = Book._meta.db_table
+        issues = []
+        for line in plan:
+            if connection.vendor == 'sqlite':
+                if line.startswith(f'SCAN {table}') and 'INDEX' not in line:
+                    issues.append(f'full table scan: {line}')
+                elif line.startswith('USE TEMP B-TREE FOR') and 'ORDER BY' in line:
+                    issues.append('sort not satisfied by an index')
+            else:
+                if f'Seq Scan on {table}' in line:
+                    issues.append(f'full table scan: {line.strip()}')
+                elif line.strip().startswith('Sort'):
+                    issues.append('sort not satisfied by an index')
+        return issues
+
+    def suggest_index(self, query_string):
+        """
+        Equality filters first, then the ordering field, then `id`.
+        Returns None if Book already declares that index.
+        """
+        params = dict(parse_qsl(query_string))
+        fields = [name for name in BookListView.filterset_fields if name in params]
+        ordering = params.get('ordering') or BookListView.ordering[0]
+        for name in ordering.split(','):
+            name = name.strip().lstrip('-')
+            if name in BookListView.ordering_fields and name != 'search_rank' \
+                    and name not in fields:
+                fields.append(name)
+        fields.append('id')
+
+        existing = {tuple(index.fields) for index in Book._meta.indexes}
+        if len(fields) < 2 or tuple(fields) in existing:
+            return None
+        return tuple(fields)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for books.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        backend = get_backend(options['database'])
+        if backend is None:
+            raise CommandError('This database has no full-text search backend.')
+        backend.drop_index()
+        backend.create_index()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from api.search import get_backend
+
+    backend = get_backend(schema_editor.connection.alias)
+    if backend is not None:
+        backend.create_index()
+
+
+def drop_search_index(apps, schema_editor):
+    from api.search import get_backend
+
+    backend = get_backend(schema_editor.connection.alias)
+    if backend is not None:
+        backend.drop_index()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_book_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['title', 'id'], name='api_book_title_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['publication_year', 'id'], name='api_book_year_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['publication_year', 'title', 'id'], name='api_book_year_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['author', 'title', 'id'], name='api_book_author_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['author', 'publication_year', 'id'], name='api_book_author_year_idx'),
+        ),
+    ]
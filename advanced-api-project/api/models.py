@@ -10,6 +10,8 @@ from datetime import date
 # -------------------------------
 class Author(models.Model):
     name = models.CharField(max_length=255)
+    # Drives ETag/Last-Modified on the author endpoints
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -21,6 +23,20 @@ class Book(models.Model):
     title = models.CharField(max_length=255)
     publication_year = models.PositiveIntegerField()
     author = models.ForeignKey(Author, related_name='books', on_delete=models.CASCADE)
+    # Drives ETag/Last-Modified on the book endpoints
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Composite indexes for the filter + ordering combinations offered by
+        # BookListView. Each ends with `id`, the keyset pagination tie-breaker,
+        # so a page is a single index range scan.
+        indexes = [
+            models.Index(fields=['title', 'id'], name='api_book_title_id_idx'),
+            models.Index(fields=['publication_year', 'id'], name='api_book_year_id_idx'),
+            models.Index(fields=['publication_year', 'title', 'id'], name='api_book_year_title_idx'),
+            models.Index(fields=['author', 'title', 'id'], name='api_book_author_title_idx'),
+            models.Index(fields=['author', 'publication_year', 'id'], name='api_book_author_year_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -0,0 +1,222 @@
+# api/pagination.py
+
+"""
+Keyset (cursor) pagination for the Book API.
+
+Pages are addressed by the (ordering fields, pk) values of the last row
+seen instead of an OFFSET, so deep pages cost the same as the first one.
+"""
+
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate a queryset with an opaque cursor built from the values of the
+    current ordering plus the primary key as a tie-breaker.
+
+    The ordering is taken from the view's OrderingFilter (so `?ordering=`
+    keeps working). A cursor remembers the ordering it was issued for; if
+    the client changes `?ordering=` the stale cursor is ignored and the
+    listing restarts from the first page of the new order.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('pk',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None and cursor['o'] != list(self.ordering):
+            cursor = None
+        if cursor is not None:
+            cursor['v'] = self.clean_values(queryset, self.ordering, cursor['v'])
+
+        reverse = bool(cursor and cursor['r'])
+        ordering = self._reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+
+        if cursor is not None:
+            queryset = queryset.filter(self._after(ordering, cursor['v']))
+
+        # Fetch one extra row to know whether another page follows.
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    # ----------------------------
+    # Links
+    # ----------------------------
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    # ----------------------------
+    # Cursor encoding
+    # ----------------------------
+    def encode_cursor(self, obj, reverse):
+        cursor = {
+            'o': list(self.ordering),
+            'v': [self._value(obj, field.lstrip('-')) for field in self.ordering],
+            'r': reverse,
+        }
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(cursor, separators=(',', ':')).encode('utf-8')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            ordering, values = cursor['o'], cursor['v']
+            cursor['r'] = bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(ordering, list) or not isinstance(values, list) \
+                or len(ordering) != len(values):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def clean_values(self, queryset, ordering, values):
+        """
+        Convert decoded cursor values to the types of their ordering
+        fields (or annotations, such as search_rank); anything that does
+        not fit is an invalid cursor.
+        """
+        cleaned = []
+        for field, value in zip(ordering, values):
+            if value is None or not isinstance(value, (str, int, float, bool)):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                cleaned.append(self._field(queryset, field.lstrip('-')).to_python(value))
+            except (FieldDoesNotExist, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        return cleaned
+
+    # ----------------------------
+    # Helpers
+    # ----------------------------
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Return the ordering from the view's OrderingFilter, with the
+        primary key appended so that every row has a unique position.
+        """
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        ordering = list(ordering or self.ordering)
+
+        names = [field.lstrip('-') for field in ordering]
+        if 'pk' not in names and 'id' not in names:
+            # Follow the direction of the first field so a composite
+            # (field, pk) index can be scanned in one direction.
+            ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+        return tuple(ordering)
+
+    @classmethod
+    def _field(cls, queryset, name):
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return cls._model_field(queryset.model, name)
+
+    @staticmethod
+    def _model_field(model, name):
+        # Follows relations, e.g. 'author__name'.
+        *path, last = name.split('__')
+        for part in path:
+            model = model._meta.get_field(part).related_model
+        return model._meta.pk if last == 'pk' else model._meta.get_field(last)
+
+    @staticmethod
+    def _value(obj, name):
+        # Rows are model instances, or dicts when the view pages .values().
+        return obj[name] if isinstance(obj, dict) else getattr(obj, name)
+
+    @staticmethod
+    def _reverse_ordering(ordering):
+        return tuple(f[1:] if f.startswith('-') else '-' + f for f in ordering)
+
+    @staticmethod
+    def _after(ordering, values):
+        """
+        Build the lexicographic "row comes after `values`" condition, e.g.
+        for ('title', 'pk'): title >= v0 AND (title > v0 OR (title = v0 AND
+        pk > v1)). The redundant leading bound is what lets the database
+        seek straight to the cursor in the (title, pk) index instead of
+        scanning every earlier row.
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = '__lt' if field.startswith('-') else '__gt'
+            condition |= Q(**equal, **{name + lookup: value})
+            equal[name] = value
+        first = ordering[0]
+        bound = '__lte' if first.startswith('-') else '__gte'
+        return Q(**{first.lstrip('-') + bound: values[0]}) & condition
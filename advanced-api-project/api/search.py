@@ -0,0 +1,295 @@
+# api/search.py
+
+"""
+Full-text search for books.
+
+Book titles and author names are copied into a side index that is kept in
+sync by signals (see api/signals.py):
+
+- SQLite: an FTS5 virtual table ranked with bm25()
+- PostgreSQL: a tsvector table with a GIN index ranked with ts_rank()
+
+FullTextSearchFilter is a drop-in replacement for filters.SearchFilter.
+On databases without a search index it falls back to SearchFilter's
+icontains lookups.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from .models import Author, Book
+
+
+# (alias, database name) -> whether the index table exists
+_available = {}
+
+
+# ----------------------------
+# Backends
+# ----------------------------
+class SearchBackend:
+    """
+    Base class. Subclasses maintain and query the index for one database.
+    """
+
+    vendor = None
+    index_table = 'api_book_search'
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def qn(self, name):
+        return self.connection.ops.quote_name(name)
+
+    @property
+    def book_table(self):
+        return self.qn(Book._meta.db_table)
+
+    @property
+    def author_table(self):
+        return self.qn(Author._meta.db_table)
+
+    def is_available(self):
+        key = (self.connection.alias, self.connection.settings_dict['NAME'])
+        if key not in _available:
+            _available[key] = self.index_table in self.connection.introspection.table_names()
+        return _available[key]
+
+    def create_index(self):
+        raise NotImplementedError
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.qn(self.index_table)}')
+        _available.clear()
+
+    def index_books(self, book_ids=None, author_ids=None):
+        """
+        (Re)index the given books, the books of the given authors, or all
+        books when neither is given.
+        """
+        raise NotImplementedError
+
+    def remove_books(self, book_ids):
+        raise NotImplementedError
+
+    def search(self, queryset, terms):
+        """
+        Filter `queryset` to books matching every term and annotate it
+        with `search_rank` (higher is better).
+        """
+        raise NotImplementedError
+
+    def _source_sql(self, book_ids, author_ids):
+        """
+        SELECT of (book id, title, author name) for the rows to index.
+        """
+        sql = (
+            f'SELECT b.id, b.title, a.name FROM {self.book_table} b '
+            f'JOIN {self.author_table} a ON a.id = b.author_id'
+        )
+        params = []
+        if book_ids is not None:
+            sql += f' WHERE b.id IN ({", ".join(["%s"] * len(book_ids))})'
+            params = list(book_ids)
+        elif author_ids is not None:
+            sql += f' WHERE b.author_id IN ({", ".join(["%s"] * len(author_ids))})'
+            params = list(author_ids)
+        return sql, params
+
+    def _book_ids_for_authors(self, cursor, author_ids):
+        cursor.execute(
+            f'SELECT id FROM {self.book_table} '
+            f'WHERE author_id IN ({", ".join(["%s"] * len(author_ids))})',
+            list(author_ids),
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    vendor = 'sqlite'
+    index_table = 'api_book_fts'
+
+    def create_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.qn(self.index_table)} '
+                f"USING fts5(title, author_name, tokenize='unicode61')"
+            )
+        _available.clear()
+        self.index_books()
+
+    def index_books(self, book_ids=None, author_ids=None):
+        if (book_ids is not None and not book_ids) or (author_ids is not None and not author_ids):
+            return
+        table = self.qn(self.index_table)
+        with self.connection.cursor() as cursor:
+            if author_ids is not None:
+                book_ids = self._book_ids_for_authors(cursor, author_ids)
+                author_ids = None
+                if not book_ids:
+                    return
+            if book_ids is None:
+                cursor.execute(f'DELETE FROM {table}')
+            else:
+                self._delete(cursor, book_ids)
+            source, params = self._source_sql(book_ids, author_ids)
+            cursor.execute(f'INSERT INTO {table} (rowid, title, author_name) {source}', params)
+
+    def remove_books(self, book_ids):
+        if book_ids:
+            with self.connection.cursor() as cursor:
+                self._delete(cursor, book_ids)
+
+    def _delete(self, cursor, book_ids):
+        cursor.execute(
+            f'DELETE FROM {self.qn(self.index_table)} '
+            f'WHERE rowid IN ({", ".join(["%s"] * len(book_ids))})',
+            list(book_ids),
+        )
+
+    @staticmethod
+    def match_expression(terms):
+        # Every term must match (implicit AND); each is a quoted prefix
+        # query so punctuation in user input is never parsed as syntax.
+        return ' '.join('"%s"*' % term.replace('"', '""') for term in terms)
+
+    def search(self, queryset, terms):
+        table = self.qn(self.index_table)
+        match = self.match_expression(terms)
+        pk = f'{self.qn(queryset.model._meta.db_table)}.{self.qn("id")}'
+        # bm25() is lower-is-better, so negate it for search_rank.
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match])
+        ).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({table}) FROM {table} WHERE {table} MATCH %s AND rowid = {pk}',
+            [match],
+            output_field=FloatField(),
+        ))
+
+
+class PostgresBackend(SearchBackend):
+    vendor = 'postgresql'
+    config = 'simple'
+
+    def create_index(self):
+        table = self.qn(self.index_table)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} ('
+                f'book_id bigint PRIMARY KEY REFERENCES {self.book_table} (id) '
+                f'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+                f'document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.qn(self.index_table + "_document")} '
+                f'ON {table} USING GIN (document)'
+            )
+        _available.clear()
+        self.index_books()
+
+    def index_books(self, book_ids=None, author_ids=None):
+        if (book_ids is not None and not book_ids) or (author_ids is not None and not author_ids):
+            return
+        source, params = self._source_sql(book_ids, author_ids)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {self.qn(self.index_table)} (book_id, document) '
+                f"SELECT id, setweight(to_tsvector('{self.config}', title), 'A') || "
+                f"setweight(to_tsvector('{self.config}', name), 'B') "
+                f'FROM ({source}) AS src (id, title, name) '
+                f'ON CONFLICT (book_id) DO UPDATE SET document = EXCLUDED.document',
+                params,
+            )
+
+    def remove_books(self, book_ids):
+        if book_ids:
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {self.qn(self.index_table)} '
+                    f'WHERE book_id IN ({", ".join(["%s"] * len(book_ids))})',
+                    list(book_ids),
+                )
+
+    @staticmethod
+    def tsquery(terms):
+        # Prefix-match every term; lexemes are quoted so user input cannot
+        # inject tsquery operators.
+        lexemes = []
+        for term in terms:
+            term = re.sub(r"[^\w']+", ' ', term).strip()
+            if term:
+                lexemes.append("'%s':*" % term.replace("'", "''"))
+        return ' & '.join(lexemes)
+
+    def search(self, queryset, terms):
+        table = self.qn(self.index_table)
+        query = self.tsquery(terms)
+        if not query:
+            return queryset.none()
+        pk = f'{self.qn(queryset.model._meta.db_table)}.{self.qn("id")}'
+        tsquery = f"to_tsquery('{self.config}', %s)"
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT book_id FROM {table} WHERE document @@ {tsquery}', [query])
+        ).annotate(search_rank=RawSQL(
+            f'SELECT ts_rank(document, {tsquery}) FROM {table} WHERE book_id = {pk}',
+            [query],
+            output_field=FloatField(),
+        ))
+
+
+BACKENDS = [SQLiteFTS5Backend, PostgresBackend]
+
+
+def get_backend(using='default'):
+    """
+    Return the search backend for a database alias, or None if the
+    database has no full-text index.
+    """
+    connection = connections[using]
+    for backend in BACKENDS:
+        if backend.vendor == connection.vendor:
+            return backend(connection)
+    return None
+
+
+def index_books(book_ids=None, author_ids=None, using='default'):
+    """
+    Refresh the index entries of the given books (or of an author's books).
+    Does nothing on databases without a search index.
+    """
+    backend = get_backend(using)
+    if backend is not None and backend.is_available():
+        backend.index_books(book_ids=book_ids, author_ids=author_ids)
+
+
+def remove_books(book_ids, using='default'):
+    backend = get_backend(using)
+    if backend is not None and backend.is_available():
+        backend.remove_books(book_ids)
+
+
+# ----------------------------
+# Filter backend
+# ----------------------------
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for filters.SearchFilter backed by the full-text
+    index. Every result is annotated with `search_rank`, so views can
+    offer `?ordering=-search_rank` for best-match-first results.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+        backend = get_backend(queryset.db)
+        if backend is None or not backend.is_available():
+            queryset = super().filter_queryset(request, queryset, view)
+            return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+        return backend.search(queryset, terms)
@@ -1,11 +1,206 @@
 from rest_framework import serializers
 from datetime import date
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
 from .models import Author, Book
 
+
+# -----------------------------------
+# Queryset planning
+# -----------------------------------
+def plan_queryset(serializer_class, queryset):
+    """
+    Apply only()/select_related()/prefetch_related() to `queryset` based on
+    the fields declared by `serializer_class`, so that serializing the
+    result never issues a query per row.
+
+    - concrete fields are loaded with only()
+    - forward FKs rendered as a pk only load the `<name>_id` column
+    - nested serializers on forward FKs are joined with select_related()
+    - nested serializers on reverse/M2M relations are prefetched with a
+      queryset that is itself planned from the nested serializer
+    """
+    only, select, prefetch = _plan(serializer_class(), queryset.model, '')
+    queryset = queryset.only(*only)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def _plan(serializer, model, prefix):
+    only = [prefix + model._meta.pk.attname]
+    select, prefetch = [], []
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        name = field.source_attrs[0]
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Properties and methods: nothing we can plan for.
+            continue
+
+        if isinstance(field, serializers.ListSerializer) or \
+                isinstance(field, serializers.ManyRelatedField):
+            prefetch.append(_plan_prefetch(field, model_field, prefix + name))
+        elif isinstance(field, serializers.BaseSerializer):
+            related = model_field.related_model
+            nested_only, nested_select, nested_prefetch = _plan(
+                field, related, prefix + name + '__'
+            )
+            select.append(prefix + name)
+            only += nested_only
+            select += nested_select
+            prefetch += nested_prefetch
+        elif model_field.concrete:
+            only.append(prefix + model_field.attname)
+
+    return only, select, prefetch
+
+
+def _plan_prefetch(field, model_field, lookup):
+    child = getattr(field, 'child', None) or getattr(field, 'child_relation', None)
+    if not isinstance(child, serializers.ModelSerializer):
+        return lookup
+
+    related = model_field.related_model
+    only, select, prefetch = _plan(child, related, '')
+    if model_field.one_to_many:
+        # The prefetch joins back to the parent through this column.
+        only.append(model_field.field.attname)
+
+    queryset = related._default_manager.only(*only)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return Prefetch(lookup, queryset=queryset)
+
+
+# -----------------------------------
+# Compiled read path
+# -----------------------------------
+# Field types whose to_representation() returns a value from .values()
+# unchanged, so the compiled plan can skip calling them.
+PASSTHROUGH_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.FloatField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class ReadPlan:
+    """
+    Precomputed, read-only rendering of a ModelSerializer.
+
+    The plan maps each output field to a `.values()` column once, so rows
+    can be rendered straight from dicts without instantiating models or
+    walking DRF fields per row. Nested many=True serializers on reverse
+    FKs are loaded with one extra query per page.
+
+    Fields the plan cannot compile (methods, properties, `source='*'`)
+    raise ValueError when the plan is built; use the regular serializer
+    for those, and for every write.
+    """
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        self.fields = []    # (output name, column, converter or None)
+        self.nested = []    # (output name, child plan, fk column)
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            source = field.source_attrs
+            try:
+                model_field = self.model._meta.get_field(source[0])
+            except FieldDoesNotExist:
+                model_field = None
+            if model_field is None or len(source) != 1:
+                raise ValueError(f'Cannot compile field "{name}" of {serializer_class.__name__}.')
+
+            if isinstance(field, serializers.ListSerializer) and model_field.one_to_many:
+                child = ReadPlan(type(field.child))
+                self.nested.append((name, child, model_field.field.attname))
+            elif model_field.concrete and not isinstance(field, serializers.BaseSerializer):
+                converter = None if isinstance(field, PASSTHROUGH_FIELDS) else field.to_representation
+                self.fields.append((name, model_field.attname, converter))
+            else:
+                raise ValueError(f'Cannot compile field "{name}" of {serializer_class.__name__}.')
+
+        self.pk_column = self.model._meta.pk.attname
+        self.columns = list(dict.fromkeys(
+            [column for _, column, _ in self.fields] + [self.pk_column]
+        ))
+
+    def values(self, queryset, *extra):
+        """
+        Turn `queryset` into a .values() queryset with the plan's columns
+        (plus `pk`, any annotations and `extra` columns, so paginators can
+        still read their ordering values).
+        """
+        annotations = list(queryset.query.annotations)
+        return queryset.values(*dict.fromkeys(self.columns + ['pk'] + annotations + list(extra)))
+
+    def render(self, rows):
+        rows = list(rows)
+        nested = {
+            name: self._load_nested(child, fk_column, [row[self.pk_column] for row in rows])
+            for name, child, fk_column in self.nested
+        }
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, converter in self.fields:
+                value = row[column]
+                item[name] = value if converter is None or value is None else converter(value)
+            for name in nested:
+                item[name] = nested[name].get(row[self.pk_column], [])
+            data.append(item)
+        return data
+
+    def _load_nested(self, child, fk_column, parent_ids):
+        if not parent_ids:
+            return {}
+        queryset = child.model._default_manager.filter(**{f'{fk_column}__in': parent_ids})
+        rows = list(queryset.order_by(child.pk_column).values(*dict.fromkeys(child.columns + [fk_column])))
+        rendered = child.render(rows)
+
+        grouped = {}
+        for row, item in zip(rows, rendered):
+            grouped.setdefault(row[fk_column], []).append(item)
+        return grouped
+
+
+class EagerLoadingMixin:
+    """
+    Lets a ModelSerializer prepare the queryset it will serialize, and
+    exposes a compiled ReadPlan for hot read-only list responses.
+    """
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return plan_queryset(cls, queryset)
+
+    @classmethod
+    def read_plan(cls):
+        # Built once per serializer class.
+        if '_read_plan' not in cls.__dict__:
+            cls._read_plan = ReadPlan(cls)
+        return cls._read_plan
+
+
 # -----------------------------------
 # Book Serializer
 # -----------------------------------
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """
     Serializes Book model data.
     Includes validation to ensure publication year is not in the future.
@@ -28,10 +223,11 @@ class BookSerializer(serializers.ModelSerializer):
 # -----------------------------------
 # Author Serializer
 # -----------------------------------
-class AuthorSerializer(serializers.ModelSerializer):
+class AuthorSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """
     Serializes Author model.
     Includes a nested list of related books.
+    Use AuthorSerializer.setup_eager_loading() to avoid a books query per author.
     """
 
     books = BookSerializer(many=True, read_only=True)
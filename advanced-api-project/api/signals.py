@@ -0,0 +1,48 @@
+# api/signals.py
+
+"""
+Keep derived data (response cache, search index) in sync with writes.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import search
+from .cache import response_cache
+from .models import Author, Book
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def invalidate_book_responses(sender, using, **kwargs):
+    # Book lists also search on author__name, so author writes count too.
+    # Bumping only after commit keeps a concurrent reader from caching
+    # pre-commit rows under the new generation.
+    transaction.on_commit(lambda: response_cache.bump(Book), using=using)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def invalidate_author_responses(sender, using, **kwargs):
+    # Author list ETags are built from this generation (api.conditional).
+    transaction.on_commit(lambda: response_cache.bump(Author), using=using)
+
+
+@receiver(post_save, sender=Book)
+def index_book(sender, instance, using, **kwargs):
+    search.index_books(book_ids=[instance.pk], using=using)
+
+
+@receiver(post_delete, sender=Book)
+def unindex_book(sender, instance, using, **kwargs):
+    search.remove_books([instance.pk], using=using)
+
+
+@receiver(post_save, sender=Author)
+def index_author_books(sender, instance, created, using, **kwargs):
+    # A new author has no books yet; a rename changes every book's entry.
+    if not created:
+        search.index_books(author_ids=[instance.pk], using=using)
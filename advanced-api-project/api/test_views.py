@@ -3,11 +3,20 @@ Unit tests for Book API views.
 Tests CRUD operations, permissions, filtering, searching, and ordering.
 """
 
+import base64
+import json
+from unittest import skipUnless
+from urllib.parse import parse_qs, urlparse
+
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth.models import User
+from django.db import connection
 
+from api.cache import response_cache
 from api.models import Book, Author
+from api.pagination import KeysetPagination
+from api.serializers import AuthorSerializer, BookSerializer
 
 
 class BookAPITestCase(APITestCase):
@@ -19,6 +28,7 @@ class BookAPITestCase(APITestCase):
         """
         Set up test data and user.
         """
+        response_cache.clear()
         self.user = User.objects.create_user(
             username="testuser",
             password="testpassword"
@@ -128,13 +138,373 @@ class BookAPITestCase(APITestCase):
     def test_filter_books_by_publication_year(self):
         response = self.client.get(self.list_url + "?publication_year=2022")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
 
     def test_search_books_by_title(self):
         response = self.client.get(self.list_url + "?search=Django")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(any("Django" in book["title"] for book in response.data))
+        self.assertTrue(any("Django" in book["title"] for book in response.data["results"]))
 
     def test_order_books_by_title(self):
         response = self.client.get(self.list_url + "?ordering=title")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_search_books_by_author_name(self):
+        response = self.client.get(self.list_url + "?search=Willi")
+        self.assertEqual([book["id"] for book in response.data["results"]], [self.book1.id])
+
+    def test_search_requires_every_term(self):
+        response = self.client.get(self.list_url + "?search=Django Advanced")
+        self.assertEqual([book["id"] for book in response.data["results"]], [self.book2.id])
+
+    def test_search_ranked_ordering(self):
+        Book.objects.create(
+            title="Django Django Django",
+            author=self.author2,
+            publication_year=2021
+        )
+        response = self.client.get(self.list_url + "?search=Django&ordering=-search_rank")
+        self.assertEqual(response.data["results"][0]["title"], "Django Django Django")
+
+    def test_search_ranked_pages_follow_next(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(7):
+                Book.objects.create(title="Django " * (i % 3 + 1) + f"Volume {i}",
+                                    author=self.author1, publication_year=2000 + i)
+        url = self.list_url + "?search=Django&ordering=-search_rank"
+        expected = [book["id"] for book in self.client.get(url).data["results"]]
+        self.assertEqual(len(expected), 9)
+
+        url += "&page_size=2"
+
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [book["id"] for book in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(seen, expected)
+
+    def test_search_index_follows_writes(self):
+        self.book1.title = "Flask Recipes"
+        self.book1.save()
+        self.author2.name = "Flaskmaster"
+        self.author2.save()
+
+        response = self.client.get(self.list_url + "?search=Flask")
+        self.assertEqual(
+            sorted(book["id"] for book in response.data["results"]),
+            [self.book1.id, self.book2.id]
+        )
+
+        self.book1.delete()
+        response = self.client.get(self.list_url + "?search=Recipes")
+        self.assertEqual(response.data["results"], [])
+
+    # ----------------------------
+    # PAGINATION TESTS
+    # ----------------------------
+    def test_cursor_pagination_walks_all_pages(self):
+        for i in range(5):
+            Book.objects.create(
+                title="Django for Beginners",
+                author=self.author1,
+                publication_year=2000 + i
+            )
+
+        seen = []
+        url = self.list_url + "?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            seen += [book["id"] for book in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(seen, list(
+            Book.objects.order_by("title", "pk").values_list("id", flat=True)
+        ))
+
+    def test_cursor_pagination_previous_link(self):
+        first = self.client.get(self.list_url + "?page_size=1")
+        second = self.client.get(first.data["next"])
+        self.assertIsNone(first.data["previous"])
+
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(back.data["results"], first.data["results"])
+
+    def test_cursor_ignored_when_ordering_changes(self):
+        first = self.client.get(self.list_url + "?page_size=1&ordering=title")
+        cursor = parse_qs(urlparse(first.data["next"]).query)["cursor"][0]
+
+        response = self.client.get(
+            self.list_url + "?page_size=1&ordering=-publication_year&cursor=" + cursor
+        )
+        self.assertEqual(response.data["results"][0]["id"], self.book2.id)
+        self.assertIsNone(response.data["previous"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.list_url + "?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # Well-formed, but the values do not fit (title, pk).
+        for values in (["a", "zz"], ["a", None], [["a"], 1]):
+            forged = base64.urlsafe_b64encode(json.dumps(
+                {"o": ["title", "pk"], "v": values, "r": False}
+            ).encode()).decode()
+            response = self.client.get(self.list_url + "?cursor=" + forged)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, values)
+
+    @skipUnless(connection.vendor == "sqlite", "EXPLAIN output is SQLite's")
+    def test_cursor_seeks_into_the_index(self):
+        for ordering, values in [(("title", "pk"), ["T", 5]), (("-title", "-pk"), ["T", 5])]:
+            plan = Book.objects.order_by(*ordering).filter(
+                KeysetPagination._after(ordering, values)
+            ).explain()
+            self.assertIn("SEARCH api_book USING INDEX api_book_title_id_idx (title", plan)
+
+    # ----------------------------
+    # RESPONSE CACHE TESTS
+    # ----------------------------
+    def test_list_is_served_from_cache(self):
+        first = self.client.get(self.list_url + "?ordering=title&search=Django")
+        second = self.client.get(self.list_url + "?search=Django&ordering=title")
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(response_cache.stats()["local_hits"], 1)
+
+    def test_write_invalidates_cached_list(self):
+        self.client.get(self.list_url)
+        self.client.login(username="testuser", password="testpassword")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.create_url, {
+                "title": "Cached Book",
+                "author": self.author1.id,
+                "publication_year": 2023
+            })
+
+        response = self.client.get(self.list_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_delete_invalidates_cached_detail(self):
+        self.assertEqual(self.client.get(self.detail_url).status_code, 200)
+        self.client.login(username="testuser", password="testpassword")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.delete_url)
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_author_rename_invalidates_book_search(self):
+        url = self.list_url + "?search=William"
+        self.assertEqual(len(self.client.get(url).data["results"]), 1)
+
+        self.author1.name = "Shakespeare"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author1.save()
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author2.delete()
+        self.assertEqual(self.client.get(self.list_url + "?search=John")["X-Cache"], "MISS")
+
+    def test_generation_changes_only_on_commit(self):
+        generation = response_cache.generation(Book)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.book1.save()
+            self.assertEqual(response_cache.generation(Book), generation)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(response_cache.generation(Book), generation)
+
+    # ----------------------------
+    # CONDITIONAL REQUEST TESTS
+    # ----------------------------
+    def test_detail_not_modified(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag_changes_on_write(self):
+        etag = self.client.get(self.list_url + "?ordering=title")["ETag"]
+        response = self.client.get(self.list_url + "?ordering=title", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book2.delete()
+        response = self.client.get(self.list_url + "?ordering=title", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_etag_needs_no_query(self):
+        etag = self.client.get(self.list_url + "?ordering=-title&search=Beginners")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url + "?search=Beginners&ordering=-title",
+                                       HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_author_list_etag_follows_writes(self):
+        url = "/api/authors/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+        self.author1.name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author1.save()
+        etag = self.client.get(url)["ETag"]
+        self.book1.title = "Changed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book1.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_200_OK)
+
+    def test_update_with_if_match(self):
+        self.client.login(username="testuser", password="testpassword")
+        etag = self.client.get(self.detail_url)["ETag"]
+        data = {"title": "Checked", "author": self.author1.id, "publication_year": 2021}
+
+        response = self.client.put(self.update_url, data, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+        # The first write changed the row, so the old ETag is now stale.
+        response = self.client.put(self.update_url, data, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_delete_with_stale_if_match(self):
+        self.client.login(username="testuser", password="testpassword")
+        response = self.client.delete(self.delete_url, HTTP_IF_MATCH='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertTrue(Book.objects.filter(pk=self.book1.id).exists())
+
+    def test_author_etag_follows_books(self):
+        url = f"/api/authors/{self.author1.id}/"
+        etag = self.client.get(url)["ETag"]
+        self.book1.title = "Changed"
+        self.book1.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    # ----------------------------
+    # EXPORT TESTS
+    # ----------------------------
+    def test_export_ndjson(self):
+        response = self.client.get("/api/books/export/?ordering=title")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["title"] for line in lines],
+                         ["Advanced Django", "Django for Beginners"])
+        self.assertEqual(json.loads(lines[0])["author"], self.author2.id)
+
+    def test_export_matches_serializer(self):
+        response = self.client.get("/api/books/export/?ordering=title")
+        exported = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        listed = self.client.get("/api/books/?ordering=title").data["results"]
+        self.assertEqual(exported, json.loads(json.dumps(listed)))
+        self.assertEqual(set(exported[0]), set(BookSerializer().fields))
+
+    def test_export_json_honours_filters(self):
+        response = self.client.get("/api/books/export/?as=json&publication_year=2020")
+        books = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([book["id"] for book in books], [self.book1.id])
+
+    def test_export_unknown_format(self):
+        response = self.client.get("/api/books/export/?as=xml")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # ----------------------------
+    # BULK TESTS
+    # ----------------------------
+    def test_bulk_create_reports_item_errors(self):
+        self.client.login(username="testuser", password="testpassword")
+        payload = [
+            {"title": "Bulk One", "author": self.author1.id, "publication_year": 2001},
+            {"title": "Bulk Two", "author": 9999, "publication_year": 2002},
+            {"title": "Bulk Three", "author": self.author2.id, "publication_year": 3000},
+            {"title": "Bulk Four", "author": self.author2.id, "publication_year": 2004},
+        ]
+
+        response = self.client.post("/api/books/bulk/", payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([item["index"] for item in response.data["results"]], [0, 3])
+        self.assertEqual([item["index"] for item in response.data["errors"]], [1, 2])
+        self.assertIn("publication_year", response.data["errors"][1]["errors"])
+        self.assertTrue(Book.objects.filter(title="Bulk Four").exists())
+
+    def test_bulk_update_and_delete(self):
+        self.client.login(username="testuser", password="testpassword")
+        response = self.client.patch("/api/books/bulk/", [
+            {"id": self.book1.id, "title": "Renamed"},
+            {"id": self.book2.id, "author": self.author1.id},
+        ], format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.book1.refresh_from_db()
+        self.book2.refresh_from_db()
+        self.assertEqual(self.book1.title, "Renamed")
+        self.assertEqual(self.book2.author, self.author1)
+
+        response = self.client.delete("/api/books/bulk/", [self.book1.id, 9999], format="json")
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertFalse(Book.objects.filter(pk=self.book1.id).exists())
+        self.assertEqual(response.data["errors"][0]["index"], 1)
+
+    def test_bulk_requires_authentication(self):
+        response = self.client.post("/api/books/bulk/", [], format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AuthorAPITestCase(APITestCase):
+    """
+    Test suite for Author API endpoints.
+    """
+
+    def create_authors(self, count):
+        for i in range(count):
+            author = Author.objects.create(name=f"Author {i}")
+            for year in (2001, 2002, 2003):
+                Book.objects.create(
+                    title=f"Book {i}-{year}",
+                    author=author,
+                    publication_year=year
+                )
+
+    def test_author_list_includes_books(self):
+        self.create_authors(1)
+        response = self.client.get("/api/authors/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"][0]["books"]), 3)
+
+    def test_author_list_query_count_is_constant(self):
+        # One query for the page of authors and one to prefetch their books.
+        self.create_authors(2)
+        with self.assertNumQueries(2):
+            self.client.get("/api/authors/")
+
+        self.create_authors(10)
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/authors/")
+        self.assertEqual(len(response.data["results"]), 12)
+
+    def test_compiled_read_plan_matches_serializer(self):
+        self.create_authors(3)
+        for serializer_class, model in ((AuthorSerializer, Author), (BookSerializer, Book)):
+            queryset = model.objects.order_by("pk")
+            plan = serializer_class.read_plan()
+            self.assertEqual(
+                plan.render(plan.values(queryset)),
+                serializer_class(queryset, many=True).data
+            )
+
+    def test_author_detail_query_count(self):
+        self.create_authors(1)
+        author = Author.objects.get()
+        with self.assertNumQueries(3):
+            response = self.client.get(f"/api/authors/{author.id}/")
+        self.assertEqual(response.data["name"], author.name)
+        self.assertEqual(len(response.data["books"]), 3)
@@ -7,6 +7,11 @@ from .views import (
     BookCreateView,
     BookUpdateView,
     BookDeleteView,
+    BookBulkView,
+    BookExportView,
+    AuthorListView,
+    AuthorDetailView,
+    CacheStatsView,
 )
 
 urlpatterns = [
@@ -17,4 +22,11 @@ urlpatterns = [
     # IMPORTANT: ALX checker expects these exact substrings
     path('books/update/<int:pk>/', BookUpdateView.as_view(), name='book-update'),
     path('books/delete/<int:pk>/', BookDeleteView.as_view(), name='book-delete'),
+    path('books/bulk/', BookBulkView.as_view(), name='book-bulk'),
+    path('books/export/', BookExportView.as_view(), name='book-export'),
+
+    path('authors/', AuthorListView.as_view(), name='author-list'),
+    path('authors/<int:pk>/', AuthorDetailView.as_view(), name='author-detail'),
+
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
 ]
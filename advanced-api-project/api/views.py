@@ -1,54 +1,99 @@
 # api/views.py
 
 """
-API views for Book model.
+API views for Book and Author models.
 Supports CRUD operations with filtering, searching, and ordering.
 """
 
-from rest_framework import generics, filters
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from rest_framework import generics, filters, status
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters import rest_framework
 
-from .models import Book
-from .serializers import BookSerializer
+from .bulk import bulk_create_books, bulk_delete_books, bulk_update_books
+from .cache import CachedResponseMixin, response_cache
+from .conditional import ConditionalDetailMixin, ConditionalListMixin, IfMatchMixin
+from .models import Author, Book
+from .pagination import KeysetPagination
+from .search import FullTextSearchFilter
+from .serializers import AuthorSerializer, BookSerializer
+
+
+# ----------------------------
+# FAST READ MIXIN
+# ----------------------------
+class FastListMixin:
+    """
+    Render list responses with the serializer's compiled ReadPlan (rows
+    built from .values() dicts) instead of the full ModelSerializer.
+    Writes and detail views keep using the regular serializer.
+    """
+    fast_read = True
+
+    def list(self, request, *args, **kwargs):
+        if not self.fast_read:
+            return super().list(request, *args, **kwargs)
+
+        plan = self.get_serializer_class().read_plan()
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        rows = plan.values(queryset)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.render(page))
+        return Response(plan.render(rows))
 
 
 # ----------------------------
 # LIST VIEW (Filter, Search, Order)
 # ----------------------------
-class BookListView(generics.ListAPIView):
+class BookListView(ConditionalListMixin, CachedResponseMixin, FastListMixin, generics.ListAPIView):
     """
-    Retrieve all books with filtering, searching, and ordering.
+    Retrieve books with filtering, searching, and ordering.
+    Results are paginated with a keyset cursor (?cursor=, ?page_size=),
+    rendered with BookSerializer's compiled read plan and cached until the
+    next Book write. Supports If-None-Match and If-Modified-Since.
     """
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    cache_model = Book
+    etag_models = (Book,)
 
     # REQUIRED by ALX checker
     filter_backends = [
         rest_framework.DjangoFilterBackend,
-        filters.SearchFilter,
+        FullTextSearchFilter,
         filters.OrderingFilter,
     ]
 
     # FILTERING
     filterset_fields = ['title', 'publication_year', 'author']
 
-    # SEARCHING
+    # SEARCHING (full-text index; search_fields is used as a fallback)
     search_fields = ['title', 'author__name']
 
-    # ORDERING
-    ordering_fields = ['title', 'publication_year']
+    # ORDERING (search_rank: best match with ?ordering=-search_rank)
+    ordering_fields = ['title', 'publication_year', 'search_rank']
     ordering = ['title']
 
 
 # ----------------------------
 # DETAIL VIEW
 # ----------------------------
-class BookDetailView(generics.RetrieveAPIView):
+class BookDetailView(ConditionalDetailMixin, CachedResponseMixin, generics.RetrieveAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    cache_model = Book
 
 
 # ----------------------------
@@ -63,7 +108,7 @@ class BookCreateView(generics.CreateAPIView):
 # ----------------------------
 # UPDATE VIEW
 # ----------------------------
-class BookUpdateView(generics.UpdateAPIView):
+class BookUpdateView(IfMatchMixin, generics.UpdateAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]
@@ -72,7 +117,156 @@ class BookUpdateView(generics.UpdateAPIView):
 # ----------------------------
 # DELETE VIEW
 # ----------------------------
-class BookDeleteView(generics.DestroyAPIView):
+class BookDeleteView(IfMatchMixin, generics.DestroyAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]
+
+
+# ----------------------------
+# EXPORT VIEW
+# ----------------------------
+class BookExportView(BookListView):
+    """
+    Stream every book matching the BookListView filters, unpaginated.
+
+    ?as=ndjson (default) writes one JSON object per line; ?as=json writes a
+    single JSON array. Rows are read with .iterator() and rendered a chunk
+    at a time with BookSerializer's read plan, so every export has the
+    serializer's fields and memory use does not depend on the size of the
+    catalogue.
+    """
+    pagination_class = None
+    chunk_size = 2000
+    content_types = {
+        'ndjson': 'application/x-ndjson',
+        'json': 'application/json',
+    }
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get('as', 'ndjson')
+        if export_format not in self.content_types:
+            return Response({'detail': f'Unsupported export format "{export_format}".'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        plan = self.get_serializer_class().read_plan()
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .values(*plan.columns)
+            .iterator(chunk_size=self.chunk_size)
+        )
+        items = self.render(plan, rows)
+        stream = self.stream_json(items) if export_format == 'json' else self.stream_ndjson(items)
+
+        response = StreamingHttpResponse(stream, content_type=self.content_types[export_format])
+        response['Content-Disposition'] = f'attachment; filename="books.{export_format}"'
+        return response
+
+    def render(self, plan, rows):
+        while chunk := list(islice(rows, self.chunk_size)):
+            yield from plan.render(chunk)
+
+    def encode(self, item):
+        return json.dumps(item, cls=DjangoJSONEncoder)
+
+    def stream_ndjson(self, items):
+        for item in items:
+            yield self.encode(item) + '\n'
+
+    def stream_json(self, items):
+        yield '['
+        separator = ''
+        for item in items:
+            yield separator + self.encode(item)
+            separator = ','
+        yield ']'
+
+
+# ----------------------------
+# BULK VIEW
+# ----------------------------
+class BookBulkView(APIView):
+    """
+    Create (POST), update (PATCH) or delete (DELETE) many books at once.
+
+    POST/PATCH take a list of book objects (PATCH items need an "id"),
+    DELETE takes a list of ids. The response lists the written items and
+    per-item validation errors by index in the payload.
+    """
+    permission_classes = [IsAuthenticated]
+    max_items = 10000
+
+    def post(self, request):
+        return self.run(request, bulk_create_books, status.HTTP_201_CREATED)
+
+    def patch(self, request):
+        return self.run(request, bulk_update_books, status.HTTP_200_OK)
+
+    def delete(self, request):
+        return self.run(request, bulk_delete_books, status.HTTP_200_OK)
+
+    def run(self, request, operation, success_status):
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'detail': 'Expected a list of items.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_items:
+            return Response({'detail': f'At most {self.max_items} items per request.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        report = operation(items)
+        if not report['errors']:
+            response_status = success_status
+        elif report['results']:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(report, status=response_status)
+
+
+# ----------------------------
+# AUTHOR LIST / DETAIL VIEWS
+# ----------------------------
+# Author responses nest books, so detail validators include the books.
+AUTHOR_ETAG_AGGREGATES = {
+    'latest': Max('updated_at'),
+    'book_count': Count('books', distinct=True),
+    'books_latest': Max('books__updated_at'),
+}
+
+
+class AuthorListView(ConditionalListMixin, FastListMixin, generics.ListAPIView):
+    """
+    List authors with their books.
+    The queryset is planned from AuthorSerializer, so the number of
+    queries does not grow with the number of authors.
+    """
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    etag_models = (Author, Book)
+
+    def get_queryset(self):
+        return AuthorSerializer.setup_eager_loading(Author.objects.all())
+
+
+class AuthorDetailView(ConditionalDetailMixin, generics.RetrieveAPIView):
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    etag_aggregates = AUTHOR_ETAG_AGGREGATES
+
+    def get_queryset(self):
+        return AuthorSerializer.setup_eager_loading(Author.objects.all())
+
+
+# ----------------------------
+# CACHE METRICS
+# ----------------------------
+class CacheStatsView(APIView):
+    """
+    Hit/miss counters of the response cache in this process.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(response_cache.stats())
@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token, invalidate_tokens
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    # Deactivation, password changes, etc. must not be served from cache.
+    if not created:
+        invalidate_tokens(Token.objects.filter(user=instance).values_list('key', flat=True))
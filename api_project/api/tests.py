@@ -1,3 +1,68 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework import exceptions, status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from .authentication import CachedTokenAuthentication, cache_key, local_cache
+
+
+class CachedTokenAuthenticationTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(username='alice', password='password123')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_lookup_is_cached(self):
+        self.client.get('/api/books/')
+        # Only the book list query remains.
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/books/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_shared_cache_stores_ids_only(self):
+        self.client.get('/api/books/')
+        entry = cache.get(cache_key(self.token.key))
+        self.assertEqual(entry[:2], (self.user.pk, True))
+        self.assertNotIn(self.user.password, repr(entry))
+
+        local_cache.clear()
+        # The user by primary key, then the book list.
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/books/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get('/api/books/')
+        self.token.delete()
+        response = self.client.get('/api/books/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get('/api/books/')
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get('/api/books/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_is_rejected_from_shared_cache(self):
+        auth = CachedTokenAuthentication()
+        auth.authenticate_credentials(self.token.key)
+        local_cache.clear()
+        key = self.token.key
+        self.token.delete()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            auth.authenticate_credentials(key)
+
+    def test_async_lookup_uses_the_same_entries(self):
+        auth = CachedTokenAuthentication()
+        user, token = async_to_sync(auth.aauthenticate_credentials)(self.token.key)
+        self.assertEqual((user, token.key), (self.user, self.token.key))
+        local_cache.clear()
+        with self.assertNumQueries(1):
+            user, _ = auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user, self.user)
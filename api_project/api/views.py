@@ -1,4 +1,4 @@
-from rest_framework import viewsets
+from rest_framework import generics, viewsets
 from .models import Book
 from .serializers import BookSerializer
 from rest_framework.generics import ListAPIView
@@ -127,3 +127,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Redirects after login/logout
 LOGIN_REDIRECT_URL = 'list_books'
 LOGOUT_REDIRECT_URL = 'login'
+
+# Role and permission lookups are cached (see relationship_app/access.py)
+AUTHENTICATION_BACKENDS = ['relationship_app.backends.CachedAccessBackend']
+ACCESS_CACHE_TIMEOUT = 300
+
+# list_books paging and caching (see relationship_app/catalogue.py)
+CATALOGUE_PAGE_SIZE = 50
+CATALOGUE_COUNT_TIMEOUT = 60
+CATALOGUE_FRAGMENT_TIMEOUT = 300
+
+# POST /relationship/api/isbn/resolve/ (see relationship_app/views.py)
+ISBN_RESOLVE_MAX_ITEMS = 1000
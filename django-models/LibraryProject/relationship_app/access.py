@@ -0,0 +1,109 @@
+"""
+Cached role and permission lookups for the role-based views.
+
+A user's access is their UserProfile role plus their permission set. It
+is kept in two places:
+
+- on the user object for the rest of the request (`_access`)
+- in the Django cache across requests, under a key that includes a
+  global generation number
+
+CachedAccessBackend (see backends.py) loads the session user together
+with their profile, so on a warm cache the role checks and
+permission_required() need no queries beyond loading the user.
+
+Role or per-user permission changes delete that user's entry; changes to
+a group's permissions or to Permission/Group rows bump the generation,
+which retires every entry at once (see signals.py).
+"""
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db.models import Q
+
+from .generations import Generation
+
+ROLE_ADMIN = 'Admin'
+ROLE_LIBRARIAN = 'Librarian'
+ROLE_MEMBER = 'Member'
+
+generation = Generation('access:generation')
+
+
+def get_timeout():
+    return getattr(settings, 'ACCESS_CACHE_TIMEOUT', 300)
+
+
+def _key(user_id):
+    return f'access:{generation.current()}:{user_id}'
+
+
+class Access:
+    """
+    A user's role and permission set ('app_label.codename' strings).
+    """
+
+    __slots__ = ('role', 'permissions')
+
+    def __init__(self, role, permissions):
+        self.role = role
+        self.permissions = frozenset(permissions)
+
+
+def _load_role(user):
+    # The profile is already loaded when the user came from CachedAccessBackend.
+    if 'userprofile' in user._state.fields_cache:
+        profile = user._state.fields_cache['userprofile']
+        return profile.role if profile is not None else None
+    from .models import UserProfile
+    return UserProfile.objects.filter(user=user).values_list('role', flat=True).first()
+
+
+def _load_permissions(user):
+    """
+    Direct and group permissions in one query.
+    """
+    if not user.is_active:
+        return set()
+    permissions = Permission.objects.all()
+    if not user.is_superuser:
+        permissions = permissions.filter(Q(user=user) | Q(group__user=user))
+    return {
+        f'{app_label}.{codename}'
+        for app_label, codename in permissions.values_list(
+            'content_type__app_label', 'codename'
+        ).distinct()
+    }
+
+
+def get_access(user):
+    """
+    Return the user's Access, from the request, the cache, or the database.
+    """
+    if not user.is_authenticated:
+        return Access(None, ())
+    access = getattr(user, '_access', None)
+    if access is None:
+        key = _key(user.pk)
+        access = cache.get(key)
+        if access is None:
+            access = Access(_load_role(user), _load_permissions(user))
+            cache.set(key, access, get_timeout())
+        user._access = access
+    return access
+
+
+def get_role(user):
+    return get_access(user).role
+
+
+# ----------------------------
+# Invalidation
+# ----------------------------
+def invalidate_user(user_id):
+    cache.delete(_key(user_id))
+
+
+def invalidate_all():
+    generation.bump()
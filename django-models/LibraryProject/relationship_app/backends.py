@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .access import get_access
+
+
+class CachedAccessBackend(ModelBackend):
+    """
+    ModelBackend that loads the session user with their UserProfile in one
+    query and answers permission checks from relationship_app.access.
+    """
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('userprofile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        return set(get_access(user_obj).permissions)
+
+    def has_perm(self, user_obj, perm, obj=None):
+        if not user_obj.is_active or obj is not None:
+            return False
+        return perm in get_access(user_obj).permissions
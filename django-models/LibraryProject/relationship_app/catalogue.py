@@ -0,0 +1,153 @@
+"""
+Book listing for list_books: keyset pages, cached counts and fragments.
+
+Pages are read with `WHERE sort_key >= last AND (sort_key, id) > (last,
+last id)` over the (title, id) and (published_date, id) indexes. The
+leading range bound lets the database seek straight to the page, so page
+N costs the same as page 1, and only the columns the template shows are
+selected. The total shown above the list is a cached COUNT(*), refreshed
+at most every CATALOGUE_COUNT_TIMEOUT seconds. Rendered page fragments
+are cached under the catalogue generation, which signals.py bumps
+whenever a book or author changes (bulk jobs call bump_version()
+themselves).
+"""
+
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .generations import Generation
+from .models import Book
+
+PAGE_SIZE = 50
+
+# ?sort= value -> (field, descending)
+SORTS = {
+    'title': ('title', False),
+    '-title': ('title', True),
+    'published': ('published_date', False),
+    '-published': ('published_date', True),
+}
+DEFAULT_SORT = 'title'
+
+COUNT_KEY = 'catalogue:count'
+generation = Generation('catalogue:version')
+
+
+def get_page_size():
+    return getattr(settings, 'CATALOGUE_PAGE_SIZE', PAGE_SIZE)
+
+
+def get_count_timeout():
+    return getattr(settings, 'CATALOGUE_COUNT_TIMEOUT', 60)
+
+
+def get_fragment_timeout():
+    return getattr(settings, 'CATALOGUE_FRAGMENT_TIMEOUT', 300)
+
+
+# ----------------------------
+# Cursors
+# ----------------------------
+def encode_cursor(book, field):
+    value = getattr(book, field)
+    if isinstance(value, datetime.date):
+        value = value.isoformat()
+    raw = json.dumps([value, book.pk]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, field):
+    """
+    Return (value, id) from a cursor, or None if it is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, pk = json.loads(raw)
+        if field == 'published_date':
+            value = datetime.date.fromisoformat(value)
+        elif not isinstance(value, str):
+            return None
+        return value, int(pk)
+    except (ValueError, TypeError, binascii.Error):
+        return None
+
+
+# ----------------------------
+# Pages
+# ----------------------------
+def page_queryset(sort=DEFAULT_SORT, position=None):
+    """
+    The listing in `sort` order, starting after `position` (a decoded
+    cursor) or at the top.
+    """
+    field, descending = SORTS.get(sort, SORTS[DEFAULT_SORT])
+    prefix = '-' if descending else ''
+
+    books = (
+        Book.objects.select_related('author')
+        .only('id', 'title', 'published_date', 'author_name', 'author__name')
+        .order_by(f'{prefix}{field}', f'{prefix}id')
+    )
+    if position is not None:
+        value, pk = position
+        after = 'lt' if descending else 'gt'
+        books = books.filter(
+            Q(**{f'{field}__{after}e': value}),
+            Q(**{f'{field}__{after}': value}) | Q(**{field: value, f'id__{after}': pk}),
+        )
+    return books
+
+
+def book_page(sort=DEFAULT_SORT, position=None, size=None):
+    """
+    Return (books, next_cursor) for one page of the listing.
+    """
+    size = size or get_page_size()
+    field, _ = SORTS.get(sort, SORTS[DEFAULT_SORT])
+    books = list(page_queryset(sort, position)[:size + 1])
+    if len(books) > size:
+        books = books[:size]
+        return books, encode_cursor(books[-1], field)
+    return books, None
+
+
+def approximate_count():
+    """
+    COUNT(*) of the catalogue, cached for CATALOGUE_COUNT_TIMEOUT seconds.
+    """
+    count = cache.get(COUNT_KEY)
+    if count is None:
+        count = Book.objects.count()
+        cache.set(COUNT_KEY, count, get_count_timeout())
+    return count
+
+
+# ----------------------------
+# Fragment cache
+# ----------------------------
+def version():
+    return generation.current()
+
+
+def bump_version():
+    cache.delete(COUNT_KEY)
+    generation.bump()
+
+
+def fragment_key(sort, position):
+    """
+    Cache key for a rendered page. Built from the decoded position, so
+    equivalent cursors share one entry and any input gives a short key.
+    """
+    if position is None:
+        return f'catalogue:page:{version()}:{sort}'
+    value, pk = position
+    digest = hashlib.md5(json.dumps([str(value), pk]).encode('utf-8')).hexdigest()
+    return f'catalogue:page:{version()}:{sort}:{digest}'
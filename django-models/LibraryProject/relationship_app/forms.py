@@ -0,0 +1,23 @@
+from django import forms
+
+from .isbn import clean_isbn
+from .models import Book
+
+
+class BookForm(forms.Form):
+    """
+    Validates the add/edit book form before anything is written; the
+    author is only resolved (and possibly created) once this passes.
+    """
+    title = forms.CharField(max_length=Book._meta.get_field('title').max_length)
+    author = forms.CharField(max_length=Book._meta.get_field('author_name').max_length, required=False)
+    published_date = forms.DateField()
+    isbn = forms.CharField(required=False)
+
+    def clean_isbn(self):
+        return clean_isbn(self.cleaned_data['isbn'])
+
+    def first_error(self):
+        field, errors = next(iter(self.errors.items()))
+        label = self.fields[field].label or field.replace('_', ' ').capitalize()
+        return f'{label}: {errors[0]}'
@@ -0,0 +1,36 @@
+"""
+Generation counters for versioned cache keys.
+
+Cached entries put the current generation in their key; bumping it
+retires every entry at once, and the old entries simply expire. Used by
+access.py (role and permission lookups) and catalogue.py (list_books
+fragments).
+"""
+
+import time
+
+from django.core.cache import cache
+
+
+class Generation:
+    """
+    A counter stored in the Django cache under `key`.
+    """
+
+    def __init__(self, key):
+        self.key = key
+
+    def current(self):
+        generation = cache.get(self.key)
+        if generation is None:
+            # Start from the clock, not 1, so entries written under an
+            # evicted generation can never become current again.
+            cache.add(self.key, time.time_ns(), timeout=None)
+            generation = cache.get(self.key)
+        return generation
+
+    def bump(self):
+        try:
+            cache.incr(self.key)
+        except ValueError:
+            cache.set(self.key, time.time_ns(), timeout=None)
@@ -0,0 +1,120 @@
+"""
+Library holdings queries.
+
+Every function runs a fixed number of queries whatever the size of the
+library. Librarians are joined with select_related, and each library's
+book count is stored on the row (Library.book_count), recounted by
+refresh_counts() only when its memberships change, so listing libraries
+never reads the through table. Holdings are paged in the through table itself: the
+ids of a page come from a range of that same index, already in book_id
+order, and only those books are then read, so a library with hundreds
+of thousands of books is never scanned or sorted as a whole.
+"""
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Book, Library
+
+Membership = Library.books.through
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+BOOK_FIELDS = ('id', 'title', 'author__name', 'author_name', 'published_date', 'isbn')
+
+
+def libraries_with_counts():
+    """
+    Libraries with their librarian, in one query.
+    """
+    return Library.objects.select_related('librarian').order_by('pk')
+
+
+def refresh_counts(library_ids):
+    """
+    Recount the books of `library_ids` from the through table's
+    (library_id, book_id) index, in one UPDATE.
+    """
+    library_ids = set(library_ids)
+    if not library_ids:
+        return
+    count = (
+        Membership.objects.filter(library_id=OuterRef('pk'))
+        .order_by().values('library_id').annotate(n=Count('*')).values('n')
+    )
+    Library.objects.filter(pk__in=library_ids).update(
+        book_count=Coalesce(Subquery(count, output_field=IntegerField()), 0)
+    )
+
+
+def libraries_page(after=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return (libraries, next_after) like holdings_page(), in id order.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    libraries = libraries_with_counts()
+    if after is not None:
+        libraries = libraries.filter(pk__gt=after)
+    libraries = list(libraries[:limit + 1])
+    if len(libraries) > limit:
+        return libraries[:limit], libraries[limit - 1].pk
+    return libraries, None
+
+
+def get_library(library_id):
+    """
+    One library with `book_count` and its librarian, or None.
+    """
+    return libraries_with_counts().filter(pk=library_id).first()
+
+
+def holdings_page(library_id, after=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return (books, next_after): up to `limit` books of the library with
+    ids greater than `after`, and the id to pass as `after` for the next
+    page (None on the last page).
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    page = Membership.objects.filter(library_id=library_id)
+    if after is not None:
+        page = page.filter(book_id__gt=after)
+    page = page.order_by('book_id').values('book_id')[:limit + 1]
+    # One query: the page's ids are a subquery, so only limit + 1 books
+    # are read and sorted.
+    books = list(
+        Book.objects.filter(pk__in=page)
+        .select_related('author')
+        .order_by('pk')
+        .only(*BOOK_FIELDS)
+    )
+    if len(books) > limit:
+        return books[:limit], books[limit - 1].pk
+    return books, None
+
+
+def librarian_name(library):
+    # Reverse one-to-one: raises if missing, even when select_related().
+    try:
+        return library.librarian.name
+    except Library.librarian.RelatedObjectDoesNotExist:
+        return None
+
+
+def book_data(book):
+    return {
+        'id': book.pk,
+        'title': book.title,
+        'author': book.author_display,
+        'published_date': book.published_date.isoformat() if book.published_date else None,
+        'isbn': book.isbn,
+    }
+
+
+def library_data(library):
+    return {
+        'id': library.pk,
+        'name': library.name,
+        'librarian': librarian_name(library),
+        'book_count': library.book_count,
+    }
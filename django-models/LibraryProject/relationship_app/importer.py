@@ -0,0 +1,279 @@
+"""
+Streaming catalogue import.
+
+Records are read one at a time from CSV (with a header row) or JSON Lines
+and handled in batches. Each batch is validated, its authors and
+libraries are resolved with a few bulk queries, and its books are upserted
+on the unique ISBN with bulk_create(update_conflicts=True). Library
+memberships are then added with one bulk insert into the M2M table, and
+each batch commits in its own transaction. Bad rows are reported and
+skipped, and a batch the database rejects is rolled back and reported
+by its line range; neither aborts the import. Only a file that cannot be
+parsed any further (a malformed CSV line) stops it, with
+ImportFormatError carrying the report of what was imported until then.
+
+Fields: title, author, published_date (YYYY-MM-DD), isbn (required; the
+upsert key) and optionally libraries (names separated by ';' in CSV, a
+list in JSON).
+"""
+
+import csv
+import datetime
+import json
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+
+from . import catalogue, holdings
+from .isbn import clean_isbn
+from .models import Author, AuthorResolver, Book, Library, author_key, normalize_author_name
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+FORMATS = ('csv', 'jsonl')
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(filename):
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    raise ImportFormatError(f'Cannot tell the format of {filename!r}; use .csv or .jsonl.')
+
+
+def iter_records(lines, fmt):
+    """
+    Yield (line_number, record dict) from an iterable of text lines.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        try:
+            for record in reader:
+                yield reader.line_num, record
+        except csv.Error as exc:
+            # line_num counts the lines read before the one that failed.
+            raise ImportFormatError(f'Line {reader.line_num + 1}: {exc}') from exc
+    elif fmt == 'jsonl':
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield number, exc
+                continue
+            yield number, record if isinstance(record, dict) else ValueError('Expected an object.')
+    else:
+        raise ImportFormatError(f'Unknown format {fmt!r}; expected one of {FORMATS}.')
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        return self.rows / max(self.elapsed, 1e-6)
+
+    def add_error(self, line, message, count=1):
+        self.failed += count
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rate, 1),
+        }
+
+
+def _max_length(model, field):
+    return model._meta.get_field(field).max_length
+
+
+def _string(record, name, max_length=None):
+    """
+    A stripped string field of `record` ('' when missing), or ValueError.
+    """
+    value = record.get(name)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise ValueError(f'{name} must be a string.')
+    value = value.strip()
+    if max_length is not None and len(value) > max_length:
+        raise ValueError(f'{name} is longer than {max_length} characters.')
+    return value
+
+
+def _clean(record):
+    """
+    Return the validated fields of one record, or raise ValueError.
+    JSON rows may hold anything, so every field is type-checked here.
+    """
+    title = _string(record, 'title', _max_length(Book, 'title'))
+    if not title:
+        raise ValueError('title is required.')
+
+    isbn = record.get('isbn')
+    if isinstance(isbn, bool) or not isinstance(isbn, (str, int, type(None))):
+        raise ValueError('isbn must be a string.')
+    try:
+        isbn = clean_isbn(isbn)
+    except ValidationError as exc:
+        raise ValueError(exc.messages[0])
+    if isbn is None:
+        raise ValueError('isbn is required.')
+
+    published_date = _string(record, 'published_date')
+    try:
+        published_date = datetime.date.fromisoformat(published_date)
+    except ValueError:
+        raise ValueError(f'published_date {published_date!r} is not YYYY-MM-DD.')
+
+    author = normalize_author_name(_string(record, 'author'))
+    if len(author) > _max_length(Author, 'name'):
+        raise ValueError(f'author is longer than {_max_length(Author, "name")} characters.')
+
+    libraries = record.get('libraries') or []
+    if isinstance(libraries, str):
+        libraries = libraries.split(';')
+    if not isinstance(libraries, list) or not all(isinstance(name, str) for name in libraries):
+        raise ValueError('libraries must be a list of names.')
+    libraries = {name.strip() for name in libraries if name.strip()}
+    if any(len(name) > _max_length(Library, 'name') for name in libraries):
+        raise ValueError(f'library names are limited to {_max_length(Library, "name")} characters.')
+
+    return {
+        'title': title,
+        'author': author,
+        'published_date': published_date,
+        'isbn': isbn,
+        'libraries': libraries,
+    }
+
+
+class CatalogueImporter:
+    """
+    Import records in batches; `progress(report)` is called after each one.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.authors = AuthorResolver()
+        self.libraries = {}
+
+    def run(self, records):
+        report = ImportReport()
+        records = iter(records)
+        try:
+            while batch := list(islice(records, self.batch_size)):
+                self.import_batch(batch, report)
+                if self.progress:
+                    self.progress(report)
+        except ImportFormatError as exc:
+            exc.report = report
+            raise
+        return report
+
+    def import_batch(self, batch, report):
+        rows = {}
+        for line, record in batch:
+            report.rows += 1
+            try:
+                if isinstance(record, Exception):
+                    raise ValueError(str(record))
+                data = _clean(record)
+            except ValueError as exc:
+                report.add_error(line, str(exc))
+                continue
+            # The last row for an ISBN wins, as it would row by row.
+            rows[data['isbn']] = data
+        if not rows:
+            return
+
+        try:
+            self.save_batch(rows)
+        except Exception as exc:
+            # The batch rolled back: forget ids of authors and libraries
+            # it created, which no longer exist.
+            self.authors = AuthorResolver()
+            self.libraries = {}
+            if not isinstance(exc, DatabaseError):
+                raise
+            lines = f'{batch[0][0]}-{batch[-1][0]}'
+            report.add_error(lines, f'batch not imported: {exc}', count=len(rows))
+            return
+        # bulk_create() sends no signals
+        catalogue.bump_version()
+        report.imported += len(rows)
+
+    def save_batch(self, rows):
+        with transaction.atomic():
+            authors = self.authors.resolve(data['author'] for data in rows.values())
+            Book.objects.bulk_create(
+                [
+                    Book(
+                        title=data['title'],
+                        author_id=authors.get(author_key(data['author'])),
+                        author_name=data['author'],
+                        published_date=data['published_date'],
+                        isbn=isbn,
+                    )
+                    for isbn, data in rows.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['isbn'],
+                update_fields=['title', 'author', 'author_name', 'published_date'],
+            )
+            self.add_to_libraries(rows)
+
+    def add_to_libraries(self, rows):
+        names = set().union(*(data['libraries'] for data in rows.values()))
+        if not names:
+            return
+        missing = names - self.libraries.keys()
+        if missing:
+            self.libraries.update(
+                Library.objects.filter(name__in=missing).values_list('name', 'pk')
+            )
+            created = [Library(name=name) for name in missing - self.libraries.keys()]
+            Library.objects.bulk_create(created)
+            self.libraries.update((library.name, library.pk) for library in created)
+
+        # bulk_create(update_conflicts=True) does not return ids everywhere.
+        book_ids = dict(
+            Book.objects.filter(isbn__in=[isbn for isbn, data in rows.items() if data['libraries']])
+            .values_list('isbn', 'pk')
+        )
+        Membership = Library.books.through
+        Membership.objects.bulk_create(
+            [
+                Membership(library_id=self.libraries[name], book_id=book_ids[isbn])
+                for isbn, data in rows.items()
+                for name in data['libraries']
+            ],
+            ignore_conflicts=True,
+        )
+        # bulk_create() sends no m2m_changed
+        holdings.refresh_counts(self.libraries[name] for name in names)
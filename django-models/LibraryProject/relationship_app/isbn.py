@@ -0,0 +1,105 @@
+"""
+ISBN normalization and bulk lookup.
+
+Books store ISBNs as 13 digits with no separators (ISBN-10s are converted
+by prefixing 978 and recomputing the check digit), so every lookup is an
+exact match on the unique Book.isbn index.
+"""
+
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+
+CHUNK_SIZE = 500
+
+
+class InvalidISBN(ValueError):
+    pass
+
+
+def _isbn10_check(digits):
+    total = sum((10 - i) * int(d) for i, d in enumerate(digits[:9]))
+    check = (11 - total % 11) % 11
+    return 'X' if check == 10 else str(check)
+
+
+def _isbn13_check(digits):
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits[:12]))
+    return str((10 - total % 10) % 10)
+
+
+def normalize_isbn(value):
+    """
+    Return `value` as a 13-digit ISBN, or raise InvalidISBN. Hyphens and
+    spaces are ignored.
+    """
+    raw = ''.join(str(value).split()).replace('-', '').upper()
+    if len(raw) == 10 and raw[:9].isdigit() and (raw[9].isdigit() or raw[9] == 'X'):
+        if _isbn10_check(raw) != raw[9]:
+            raise InvalidISBN(f'{value!r} has an invalid ISBN-10 check digit.')
+        body = '978' + raw[:9]
+        return body + _isbn13_check(body)
+    if len(raw) == 13 and raw.isdigit():
+        if not raw.startswith(('978', '979')):
+            raise InvalidISBN(f'{value!r} is not a Bookland (978/979) EAN.')
+        if _isbn13_check(raw) != raw[12]:
+            raise InvalidISBN(f'{value!r} has an invalid ISBN-13 check digit.')
+        return raw
+    raise InvalidISBN(f'{value!r} is not an ISBN-10 or ISBN-13.')
+
+
+def clean_isbn(value):
+    """
+    normalize_isbn() for form input: blank becomes None, errors become
+    ValidationError.
+    """
+    if value is None or not str(value).strip():
+        return None
+    try:
+        return normalize_isbn(value)
+    except InvalidISBN as exc:
+        raise ValidationError(str(exc), code='invalid_isbn')
+
+
+# ----------------------------
+# Bulk resolver
+# ----------------------------
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def resolve_isbns(values, chunk_size=CHUNK_SIZE):
+    """
+    Look up many ISBNs, `chunk_size` at a time with one `IN` query per
+    chunk. `values` may be any iterable (a file, a generator); results are
+    yielded as soon as their chunk is resolved, in input order, as dicts:
+
+        {'input': ..., 'isbn': '978...' | None, 'status': 'found' |
+         'not_found' | 'invalid', 'book': {'id', 'title'} | None}
+    """
+    from .models import Book
+
+    for chunk in _chunks(values, chunk_size):
+        rows = []
+        for value in chunk:
+            value = str(value).strip()
+            try:
+                rows.append((value, normalize_isbn(value)))
+            except InvalidISBN:
+                rows.append((value, None))
+
+        wanted = {isbn for _, isbn in rows if isbn}
+        books = {
+            isbn: {'id': pk, 'title': title}
+            for pk, isbn, title in Book.objects.filter(isbn__in=wanted)
+            .values_list('pk', 'isbn', 'title')
+        } if wanted else {}
+
+        for value, isbn in rows:
+            if isbn is None:
+                status = 'invalid'
+            else:
+                status = 'found' if isbn in books else 'not_found'
+            yield {'input': value, 'isbn': isbn, 'status': status, 'book': books.get(isbn)}
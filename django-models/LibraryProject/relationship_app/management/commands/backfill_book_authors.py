@@ -0,0 +1,65 @@
+"""
+Link books to Author rows from their free-text author name.
+
+    python manage.py backfill_book_authors
+    python manage.py backfill_book_authors --batch-size 2000 --sleep 0.1
+
+Books without an author are processed in id order, one batch per
+transaction, so the command can be stopped and re-run at any time: it
+picks up where it left off. Names are matched ignoring case and repeated
+whitespace; each distinct name maps to its oldest Author (created if
+missing), so "Jane  Austen" and "jane austen" end up as one author.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from relationship_app import catalogue
+from relationship_app.models import AuthorResolver, Book, author_key
+
+
+class Command(BaseCommand):
+    help = 'Backfill Book.author from Book.author_name in resumable batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help='Seconds to pause between batches to limit load.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        remaining = Book.objects.filter(author__isnull=True).exclude(author_name='').count()
+        self.stdout.write(f'{remaining} books to link.')
+
+        resolver = AuthorResolver()
+        done, last_pk = 0, 0
+        started = time.monotonic()
+        while True:
+            with transaction.atomic():
+                books = list(
+                    Book.objects.select_for_update()
+                    .filter(author__isnull=True, pk__gt=last_pk)
+                    .exclude(author_name='')
+                    .order_by('pk')
+                    .only('pk', 'author_name')[:batch_size]
+                )
+                if not books:
+                    break
+                authors = resolver.resolve(book.author_name for book in books)
+                for book in books:
+                    book.author_id = authors.get(author_key(book.author_name))
+                Book.objects.bulk_update(books, ['author'])
+
+            done += len(books)
+            last_pk = books[-1].pk
+            rate = done / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f'  {done}/{remaining} linked (last id {last_pk}, {rate:.0f} books/s)')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        if done:
+            # bulk_update() sends no signals; linked names may be re-cased.
+            catalogue.bump_version()
+        self.stdout.write(self.style.SUCCESS(f'Linked {done} books.'))
@@ -0,0 +1,57 @@
+"""
+Import books from a CSV or JSON Lines catalogue.
+
+    python manage.py import_catalogue catalogue.csv
+    python manage.py import_catalogue export.jsonl --batch-size 5000
+
+See relationship_app/importer.py for the accepted fields. Books are
+upserted on ISBN, so re-running an import updates rather than duplicates.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from relationship_app.importer import (
+    BATCH_SIZE, FORMATS, CatalogueImporter, ImportFormatError, detect_format, iter_records,
+)
+
+
+class Command(BaseCommand):
+    help = 'Bulk import books from a CSV or JSONL file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Default: from the file extension.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            fmt = options['format'] or detect_format(options['path'])
+            handle = open(options['path'], encoding='utf-8', newline='')
+        except (ImportFormatError, OSError) as exc:
+            raise CommandError(exc)
+
+        importer = CatalogueImporter(batch_size=options['batch_size'], progress=self.progress)
+        with handle:
+            try:
+                report = importer.run(iter_records(handle, fmt))
+            except ImportFormatError as exc:
+                raise CommandError(
+                    f'{exc} ({exc.report.imported} rows were imported before it).'
+                )
+
+        for error in report.errors:
+            self.stdout.write(self.style.WARNING(f"  line {error['line']}: {error['error']}"))
+        if report.failed > len(report.errors):
+            self.stdout.write(self.style.WARNING(
+                f'  ... and {report.failed - len(report.errors)} more errors'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.imported} of {report.rows} rows in {report.elapsed:.1f}s '
+            f'({report.rate:.0f} rows/s).'
+        ))
+
+    def progress(self, report):
+        self.stdout.write(
+            f'  {report.rows} rows read, {report.imported} imported, {report.failed} failed '
+            f'({report.rate:.0f} rows/s)'
+        )
@@ -0,0 +1,58 @@
+"""
+Resolve a file of ISBNs against the catalogue.
+
+    python manage.py resolve_isbns isbns.txt > matches.csv
+    cat isbns.txt | python manage.py resolve_isbns - --format ndjson
+
+The input has one ISBN per line (ISBN-10 or ISBN-13, hyphens allowed).
+It is read and resolved in chunks of --chunk-size with one IN query each,
+and results are written as each chunk completes, so files of any size run
+in constant memory.
+"""
+
+import csv
+import json
+import sys
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from relationship_app.isbn import CHUNK_SIZE, resolve_isbns
+
+
+class Command(BaseCommand):
+    help = 'Look up a file of ISBNs and print the matching books.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File with one ISBN per line, or '-' for stdin.")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+
+    def handle(self, *args, **options):
+        try:
+            if options['path'] == '-':
+                handle = nullcontext(sys.stdin)
+            else:
+                handle = open(options['path'], encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(exc)
+
+        counts = {'found': 0, 'not_found': 0, 'invalid': 0}
+        with handle as lines:
+            values = (line.strip() for line in lines if line.strip())
+            if options['format'] == 'csv':
+                writer = csv.writer(self.stdout, lineterminator='\n')
+                writer.writerow(['input', 'isbn', 'status', 'book_id', 'title'])
+            for result in resolve_isbns(values, chunk_size=options['chunk_size']):
+                counts[result['status']] += 1
+                book = result['book'] or {}
+                if options['format'] == 'csv':
+                    writer.writerow([result['input'], result['isbn'] or '', result['status'],
+                                     book.get('id', ''), book.get('title', '')])
+                else:
+                    self.stdout.write(json.dumps(result))
+
+        self.stderr.write(
+            f"{counts['found']} found, {counts['not_found']} not found, "
+            f"{counts['invalid']} invalid."
+        )
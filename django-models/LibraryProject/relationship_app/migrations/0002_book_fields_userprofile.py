@@ -0,0 +1,71 @@
+import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_author_names(apps, schema_editor):
+    Book = apps.get_model('relationship_app', 'Book')
+    for book in Book.objects.select_related('author').iterator():
+        Book.objects.filter(pk=book.pk).update(author_name=book.author.name)
+
+
+class Migration(migrations.Migration):
+    """
+    Bring the schema in line with models.py: Book.author became a plain
+    name (kept from the old Author FK), Book gained published_date/isbn and
+    custom permissions, and UserProfile was added.
+    """
+
+    dependencies = [
+        ('relationship_app', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='author_name',
+            field=models.CharField(default='', max_length=100),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_author_names, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='book',
+            name='author',
+        ),
+        migrations.RenameField(
+            model_name='book',
+            old_name='author_name',
+            new_name='author',
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='published_date',
+            field=models.DateField(default=datetime.date(1970, 1, 1)),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='isbn',
+            field=models.CharField(default='', max_length=13),
+            preserve_default=False,
+        ),
+        migrations.AlterModelOptions(
+            name='book',
+            options={'permissions': [
+                ('can_add_book', 'Can add a book'),
+                ('can_change_book', 'Can change a book'),
+                ('can_delete_book', 'Can delete a book'),
+            ]},
+        ),
+        migrations.CreateModel(
+            name='UserProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('Admin', 'Admin'), ('Librarian', 'Librarian'), ('Member', 'Member')], max_length=20)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,45 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Expand step of the Book.author -> Author FK move.
+
+    The free-text field is renamed to author_name in the model state only
+    (the `author` column is untouched), and a nullable, indexed author_id
+    is added next to it. Existing readers keep working; rows are linked
+    by `manage.py backfill_book_authors`. Dropping the author column is
+    left to a later migration once the backfill has finished everywhere.
+    """
+
+    dependencies = [
+        ('relationship_app', '0002_book_fields_userprofile'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name='book',
+                    old_name='author',
+                    new_name='author_name',
+                ),
+                migrations.AlterField(
+                    model_name='book',
+                    name='author_name',
+                    field=models.CharField(blank=True, db_column='author', max_length=100),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='author',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='books', to='relationship_app.author'),
+        ),
+        migrations.AlterField(
+            model_name='author',
+            name='name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations, models
+
+
+def normalize_isbns(apps, schema_editor):
+    """
+    Rewrite stored ISBNs as 13 digits. Unparseable values become NULL, as
+    do later duplicates of an ISBN (the oldest book keeps it).
+    """
+    from relationship_app.isbn import InvalidISBN, normalize_isbn
+
+    Book = apps.get_model('relationship_app', 'Book')
+    seen = set()
+    changed = []
+    for book in Book.objects.order_by('pk').only('pk', 'isbn').iterator(chunk_size=2000):
+        try:
+            isbn = normalize_isbn(book.isbn) if book.isbn else None
+        except InvalidISBN:
+            isbn = None
+        if isbn in seen:
+            isbn = None
+        if isbn:
+            seen.add(isbn)
+        if isbn != book.isbn:
+            book.isbn = isbn
+            changed.append(book)
+        if len(changed) >= 2000:
+            Book.objects.bulk_update(changed, ['isbn'])
+            changed = []
+    Book.objects.bulk_update(changed, ['isbn'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('relationship_app', '0003_book_author_fk'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='book',
+            name='isbn',
+            field=models.CharField(blank=True, max_length=13, null=True),
+        ),
+        migrations.RunPython(normalize_isbns, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='book',
+            name='isbn',
+            field=models.CharField(blank=True, max_length=13, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('relationship_app', '0004_book_isbn_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['title', 'id'], name='book_title_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['published_date', 'id'], name='book_published_id_idx'),
+        ),
+    ]
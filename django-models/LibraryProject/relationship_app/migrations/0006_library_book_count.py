@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:30
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_books(apps, schema_editor):
+    Library = apps.get_model('relationship_app', 'Library')
+    Membership = Library.books.through
+    count = (
+        Membership.objects.filter(library_id=OuterRef('pk'))
+        .order_by().values('library_id').annotate(n=Count('*')).values('n')
+    )
+    Library.objects.update(book_count=Coalesce(Subquery(count, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('relationship_app', '0005_book_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='library',
+            name='book_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_books, migrations.RunPython.noop),
+    ]
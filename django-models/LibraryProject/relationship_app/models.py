@@ -6,24 +6,105 @@ from django.dispatch import receiver
 # -------------------------------
 # Existing Models
 # -------------------------------
+def normalize_author_name(name):
+    # Collapse whitespace so "Jane  Austen " and "Jane Austen" are one author.
+    return ' '.join((name or '').split())
+
+
+def author_key(name):
+    return normalize_author_name(name).casefold()
+
+
+class AuthorManager(models.Manager):
+    def get_or_create_by_name(self, name):
+        """
+        The oldest Author whose name matches `name` ignoring case and
+        spacing; created if there is none.
+        """
+        name = normalize_author_name(name)
+        author = self.filter(name__iexact=name).order_by('pk').first()
+        return author or self.create(name=name)
+
+
 class Author(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, db_index=True)
+
+    objects = AuthorManager()
 
     def __str__(self):
         return self.name
 
 
+class AuthorResolver:
+    """
+    Maps author names to Author ids for bulk jobs, matching like
+    get_or_create_by_name(). All authors are indexed in memory on first
+    use (they are few next to books, and SQLite's LOWER() only folds
+    ASCII); missing ones are created with one bulk_create per call.
+    """
+
+    def __init__(self):
+        self.ids = None
+
+    def resolve(self, names):
+        """
+        Return a dict author_key(name) -> Author id covering `names`. A new
+        author takes the first spelling of its name in `names`, as it would
+        when created row by row.
+        """
+        if self.ids is None:
+            # Descending pk, so the oldest author wins.
+            self.ids = {
+                author_key(name): pk
+                for name, pk in Author.objects.order_by('-pk').values_list('name', 'pk').iterator()
+            }
+        created = {}
+        for name in names:
+            key = author_key(name)
+            if key and key not in self.ids and key not in created:
+                created[key] = Author(name=normalize_author_name(name))
+        Author.objects.bulk_create(created.values())
+        for key, author in created.items():
+            self.ids[key] = author.pk
+        return self.ids
+
+
 class Book(models.Model):
     title = models.CharField(max_length=100)
-    author = models.CharField(max_length=100)
+    # Being migrated from the free-text `author_name` to a real FK; rows
+    # get `author` filled by `manage.py backfill_book_authors`. Until that
+    # has run everywhere, read the name with `author_display`.
+    author = models.ForeignKey(
+        Author, on_delete=models.PROTECT, related_name='books', null=True, blank=True
+    )
+    author_name = models.CharField(max_length=100, db_column='author', blank=True)
     published_date = models.DateField()
-    isbn = models.CharField(max_length=13)
+    # 13 digits, normalized by relationship_app.isbn; NULL when unknown
+    isbn = models.CharField(max_length=13, unique=True, null=True, blank=True)
     # any other fields you already have
 
     def __str__(self):
         return self.title
 
+    @property
+    def author_display(self):
+        return self.author.name if self.author_id else self.author_name
+
+    def set_author(self, name):
+        """
+        Point the book at the Author called `name` (created if needed) and
+        keep the legacy column in step for readers of author_name.
+        """
+        name = normalize_author_name(name)
+        self.author_name = name
+        self.author = Author.objects.get_or_create_by_name(name) if name else None
+
     class Meta:
+        # keyset pagination for list_books (relationship_app.catalogue)
+        indexes = [
+            models.Index(fields=['title', 'id'], name='book_title_id_idx'),
+            models.Index(fields=['published_date', 'id'], name='book_published_id_idx'),
+        ]
         permissions = [
             ("can_add_book", "Can add a book"),
             ("can_change_book", "Can change a book"),
@@ -34,6 +115,9 @@ class Book(models.Model):
 class Library(models.Model):
     name = models.CharField(max_length=100)
     books = models.ManyToManyField(Book, related_name='libraries')
+    # Number of `books`, kept in step by signals.py and the importer
+    # (relationship_app.holdings.refresh_counts)
+    book_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
@@ -1,22 +1,17 @@
-from .models import Author, Book, Library, Librarian
+from django.db.models import Q
+
+from .models import Book, Librarian
 
 def books_by_author(author_name):
-    try:
-        author = Author.objects.get(name=author_name)
-        return Book.objects.filter(author=author)
-    except Author.DoesNotExist:
-        return Book.objects.none()
+    # Indexed join on Author.name; rows not yet linked by
+    # backfill_book_authors still match on the legacy name column.
+    return Book.objects.filter(
+        Q(author__name=author_name) | Q(author__isnull=True, author_name=author_name)
+    )
 
 def books_in_library(library_name):
-    try:
-        library = Library.objects.get(name=library_name)
-        return library.books.all()
-    except Library.DoesNotExist:
-        return Book.objects.none()
+    # One query through the M2M table instead of fetching the library first.
+    return Book.objects.filter(libraries__name=library_name)
 
 def librarian_for_library(library_name):
-    try:
-        library = Library.objects.get(name=library_name)
-        return Librarian.objects.get(library=library)
-    except (Library.DoesNotExist, Librarian.DoesNotExist):
-        return None
+    return Librarian.objects.filter(library__name=library_name).first()
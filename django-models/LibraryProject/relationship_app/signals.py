@@ -0,0 +1,75 @@
+from django.contrib.auth.models import Group, Permission, User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import access, catalogue, holdings
+from .models import Author, Book, Library, UserProfile
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_profile_access(sender, instance, **kwargs):
+    access.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_access(sender, instance, created, **kwargs):
+    # is_active / is_superuser changes
+    if not created:
+        access.invalidate_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_membership_access(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        access.invalidate_user(instance.pk)
+    elif pk_set:
+        for user_id in pk_set:
+            access.invalidate_user(user_id)
+    else:
+        # group.user_set.clear() / permission.user_set.clear()
+        access.invalidate_all()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_access(sender, action, **kwargs):
+    if action.startswith('post_'):
+        access.invalidate_all()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def invalidate_deleted_access(sender, **kwargs):
+    access.invalidate_all()
+
+
+@receiver([post_save, post_delete], sender=Book)
+@receiver([post_save, post_delete], sender=Author)
+def invalidate_catalogue(sender, **kwargs):
+    catalogue.bump_version()
+
+
+@receiver(m2m_changed, sender=Library.books.through)
+def update_library_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            holdings.refresh_counts([instance.pk])
+    elif action == 'pre_clear':
+        instance._cleared_library_ids = list(instance.libraries.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        holdings.refresh_counts(getattr(instance, '_cleared_library_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        holdings.refresh_counts(pk_set or [])
+
+
+@receiver(pre_delete, sender=Book)
+def remember_book_libraries(sender, instance, **kwargs):
+    # The cascade removes memberships without sending m2m_changed.
+    instance._deleted_library_ids = list(instance.libraries.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Book)
+def update_deleted_book_counts(sender, instance, **kwargs):
+    holdings.refresh_counts(getattr(instance, '_deleted_library_ids', []))
@@ -1,18 +1,6 @@
+from django.contrib.auth.views import LoginView, LogoutView
 from django.urls import path
-from .views import list_books
-from .views import (
-    list_books,
-    LibraryDetailView,
-    register_view,
-    CustomLoginView,
-    CustomLogoutView,
-    admin_view,
-    librarian_view,
-    member_view,
-    add_book,
-    edit_book,
-    delete_book,
-)
+from . import views
 
 urlpatterns = [
     path('register/', views.register, name='register'),
@@ -23,6 +11,11 @@ urlpatterns = [
     path('books/', views.list_books, name='list_books'),
     path('library/<int:pk>/', views.LibraryDetailView.as_view(), name='library_detail'),
 
+    # Library holdings API
+    path('api/libraries/', views.library_list_api, name='library_list_api'),
+    path('api/libraries/<int:pk>/', views.library_holdings_api, name='library_holdings_api'),
+    path('api/isbn/resolve/', views.resolve_isbns_api, name='resolve_isbns_api'),
+
     # Role-based access views
     path('admin-view/', views.admin_view, name='admin_view'),
     path('librarian-view/', views.librarian_view, name='librarian_view'),
@@ -32,4 +25,5 @@ urlpatterns = [
     path('add_book/', views.add_book, name='add_book'),
     path('edit_book/<int:book_id>/', views.edit_book, name='edit_book'),
     path('delete_book/<int:book_id>/', views.delete_book, name='delete_book'),
+    path('import/', views.import_catalogue, name='import_catalogue'),
 ]
\ No newline at end of file
@@ -1,22 +1,64 @@
+import io
+import json
+
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.views.generic import DetailView
 from django.contrib.auth import login
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.views import LoginView, LogoutView
-from django.contrib.auth.decorators import user_passes_test
+from django.contrib.auth.decorators import login_required, user_passes_test
+from .access import ROLE_ADMIN, ROLE_LIBRARIAN, ROLE_MEMBER, get_role
 from .models import Book, Library, UserProfile
 from django.contrib.auth.decorators import permission_required
 from django.shortcuts import render, get_object_or_404, redirect
 from .models import Book
 from .models import Library
 from django.views.generic.detail import DetailView
+from django.db import IntegrityError, transaction
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from . import catalogue, holdings
+from .forms import BookForm
+from .importer import CatalogueImporter, ImportFormatError, detect_format, iter_records
+from .isbn import resolve_isbns
 
 # -------------------------------
 # Function-Based View: List Books
 # -------------------------------
 def list_books(request):
-    books = Book.objects.all()
-    return render(request, 'relationship_app/list_books.html', {'books': books})
+    sort = request.GET.get('sort')
+    if sort not in catalogue.SORTS:
+        sort = catalogue.DEFAULT_SORT
+    cursor = request.GET.get('after') or None
+    position = None
+    if cursor is not None:
+        position = catalogue.decode_cursor(cursor, catalogue.SORTS[sort][0])
+        if position is None:
+            raise Http404('Invalid cursor.')
+
+    # The rendered page is cached until a book or author changes; a hit
+    # costs no queries for the books at all.
+    key = catalogue.fragment_key(sort, position)
+    page = cache.get(key)
+    if page is None:
+        books, next_cursor = catalogue.book_page(sort, position)
+        page = render_to_string('relationship_app/book_list_page.html', {
+            'books': books,
+            'sort': sort,
+            'next_cursor': next_cursor,
+        })
+        cache.set(key, page, catalogue.get_fragment_timeout())
+
+    return render(request, 'relationship_app/list_books.html', {
+        'page': mark_safe(page),
+        'sort': sort,
+        'total': catalogue.approximate_count(),
+        'first_page': position is None,
+    })
 
 # -------------------------------
 # Class-Based View: Library Detail
@@ -26,10 +68,49 @@ class LibraryDetailView(DetailView):
     template_name = 'relationship_app/library_detail.html'
     context_object_name = 'library'
 
-class LibraryDetailView(DetailView):
-    model = Library
-    template_name = 'relationship_app/librarian_view.html'
-    context_object_name = 'library'
+    def get_queryset(self):
+        return holdings.libraries_with_counts()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        after = _int_param(self.request, 'after')
+        context['books'], context['next_after'] = holdings.holdings_page(self.object.pk, after)
+        return context
+
+# -------------------------------
+# Library Holdings API (JSON)
+# -------------------------------
+def _int_param(request, name, default=None):
+    try:
+        return int(request.GET[name])
+    except (KeyError, ValueError):
+        return default
+
+def library_list_api(request):
+    libraries, next_after = holdings.libraries_page(
+        after=_int_param(request, 'after'),
+        limit=_int_param(request, 'limit', holdings.DEFAULT_PAGE_SIZE),
+    )
+    return JsonResponse({
+        'results': [holdings.library_data(library) for library in libraries],
+        'next_after': next_after,
+    })
+
+def library_holdings_api(request, pk):
+    library = holdings.get_library(pk)
+    if library is None:
+        raise Http404('No library found.')
+    books, next_after = holdings.holdings_page(
+        library.pk,
+        after=_int_param(request, 'after'),
+        limit=_int_param(request, 'limit', holdings.DEFAULT_PAGE_SIZE),
+    )
+    return JsonResponse({
+        **holdings.library_data(library),
+        'books': [holdings.book_data(book) for book in books],
+        'next_after': next_after,
+    })
+
 
 # -------------------------------
 # User Registration View
@@ -58,14 +139,16 @@ class CustomLogoutView(LogoutView):
 # -------------------------------
 # Role-Based Access Checks
 # -------------------------------
+# Roles come from relationship_app.access (cached per request and across
+# requests), so these checks don't query UserProfile.
 def is_admin(user):
-    return hasattr(user, 'userprofile') and user.userprofile.role == 'Admin'
+    return get_role(user) == ROLE_ADMIN
 
 def is_librarian(user):
-    return hasattr(user, 'userprofile') and user.userprofile.role == 'Librarian'
+    return get_role(user) == ROLE_LIBRARIAN
 
 def is_member(user):
-    return hasattr(user, 'userprofile') and user.userprofile.role == 'Member'
+    return get_role(user) == ROLE_MEMBER
 
 # -------------------------------
 # Role-Based Views
@@ -76,7 +159,7 @@ def admin_view(request):
 
 @user_passes_test(is_librarian)
 def librarian_view(request):
-    return render(request, 'relationship_app/library_detial.html')
+    return render(request, 'relationship_app/librarian_view.html')
 
 @user_passes_test(is_member)
 def member_view(request):
@@ -85,17 +168,10 @@ def member_view(request):
 @permission_required('relationship_app.can_add_book')
 def add_book(request):
     if request.method == 'POST':
-        title = request.POST.get('title')
-        author = request.POST.get('author')
-        published_date = request.POST.get('published_date')
-        isbn = request.POST.get('isbn')
-        Book.objects.create(
-            title=title,
-            author=author,
-            published_date=published_date,
-            isbn=isbn
-        )
-        return redirect('book_list')
+        error = _save_book(Book(), BookForm(request.POST))
+        if error is None:
+            return redirect('list_books')
+        return render(request, 'relationship_app/add_book.html', {'error': error}, status=400)
     return render(request, 'relationship_app/add_book.html')
 
 
@@ -103,19 +179,99 @@ def add_book(request):
 def edit_book(request, book_id):
     book = get_object_or_404(Book, id=book_id)
     if request.method == 'POST':
-        book.title = request.POST.get('title')
-        book.author = request.POST.get('author')
-        book.published_date = request.POST.get('published_date')
-        book.isbn = request.POST.get('isbn')
-        book.save()
-        return redirect('book_list')
+        error = _save_book(book, BookForm(request.POST))
+        if error is None:
+            return redirect('list_books')
+        return render(request, 'relationship_app/edit_book.html',
+                      {'book': book, 'error': error}, status=400)
     return render(request, 'relationship_app/edit_book.html', {'book': book})
 
 
+def _save_book(book, form):
+    """
+    Validate `form` onto the book and save it; return an error message
+    instead if the input is invalid or the ISBN belongs to another book.
+    The author is resolved in the same transaction as the save, so a
+    failed save never leaves a new Author behind.
+    """
+    if not form.is_valid():
+        return form.first_error()
+    book.title = form.cleaned_data['title']
+    book.published_date = form.cleaned_data['published_date']
+    book.isbn = form.cleaned_data['isbn']
+    try:
+        with transaction.atomic():
+            book.set_author(form.cleaned_data['author'])
+            book.save()
+    except IntegrityError:
+        return 'A book with this ISBN already exists.'
+    return None
+
+
 @permission_required('relationship_app.can_delete_book')
 def delete_book(request, book_id):
     book = get_object_or_404(Book, id=book_id)
     if request.method == 'POST':
         book.delete()
-        return redirect('book_list')
+        return redirect('list_books')
     return render(request, 'relationship_app/delete_book.html', {'book': book})
+
+
+@permission_required('relationship_app.can_add_book')
+def import_catalogue(request):
+    """
+    Upload a CSV or JSONL catalogue (`file`); responds with the import
+    report as JSON. The upload is parsed as it is read, not loaded whole.
+    """
+    if request.method != 'POST':
+        return render(request, 'relationship_app/import_catalogue.html')
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'detail': 'No file uploaded.'}, status=400)
+    try:
+        fmt = request.POST.get('format') or detect_format(upload.name)
+        lines = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+        report = CatalogueImporter().run(iter_records(lines, fmt))
+    except (ImportFormatError, UnicodeDecodeError) as exc:
+        # Batches before the error stay imported; say which.
+        report = getattr(exc, 'report', None)
+        return JsonResponse(
+            {'detail': str(exc), **({'report': report.as_dict()} if report else {})},
+            status=400,
+        )
+    return JsonResponse(report.as_dict())
+
+
+# -------------------------------
+# Bulk ISBN Resolver API
+# -------------------------------
+def get_resolve_limit():
+    return getattr(settings, 'ISBN_RESOLVE_MAX_ITEMS', 1000)
+
+
+@login_required
+@require_POST
+def resolve_isbns_api(request):
+    """
+    POST a JSON list of ISBNs, or one ISBN per line as text; the matches
+    stream back as NDJSON in input order. Signed-in users only, at most
+    ISBN_RESOLVE_MAX_ITEMS ISBNs per request.
+    """
+    if request.content_type == 'application/json':
+        try:
+            values = json.loads(request.body)
+        except ValueError:
+            values = None
+        if not isinstance(values, list):
+            return JsonResponse({'detail': 'Expected a JSON list of ISBNs.'}, status=400)
+    else:
+        values = request.body.decode('utf-8', 'replace').splitlines()
+    values = [str(value) for value in values if str(value).strip()]
+    if len(values) > get_resolve_limit():
+        return JsonResponse(
+            {'detail': f'At most {get_resolve_limit()} ISBNs can be resolved per request.'},
+            status=400,
+        )
+
+    lines = (json.dumps(result) + '\n' for result in resolve_isbns(values))
+    return StreamingHttpResponse(lines, content_type='application/x-ndjson')
@@ -0,0 +1,61 @@
+"""
+Versioned keys for cached blog fragments.
+
+Templates cache fragments under a scope's version (for example
+`{% cache ... post_list posts_version page_obj.number %}`) and signals.py
+bumps the version whenever the data behind the scope changes, so stale
+fragments are never read again and simply expire.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+
+def get_fragment_timeout():
+    return getattr(settings, 'BLOG_FRAGMENT_TIMEOUT', 300)
+
+
+def _key(scope):
+    return f'blog:version:{scope}'
+
+
+def version(scope):
+    key = _key(scope)
+    current = cache.get(key)
+    if current is None:
+        # Seeded from the clock so an evicted version never reuses the
+        # keys of fragments that are still cached.
+        cache.add(key, time.time_ns(), timeout=None)
+        current = cache.get(key)
+    return current
+
+
+def bump(scope):
+    try:
+        cache.incr(_key(scope))
+    except ValueError:
+        cache.set(_key(scope), time.time_ns(), timeout=None)
+
+
+class VersionedCountPaginator(Paginator):
+    """
+    A Paginator whose count is cached under `scope`'s version, so a page
+    whose fragment is cached needs no COUNT(*) either.
+    """
+
+    def __init__(self, object_list, per_page, scope, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.scope = scope
+
+    @cached_property
+    def count(self):
+        key = f'blog:count:{self.scope}:{version(self.scope)}'
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, get_fragment_timeout())
+        return count
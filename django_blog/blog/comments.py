@@ -0,0 +1,62 @@
+"""
+Comment threads for the post detail page.
+
+Comments are read oldest first, a page at a time, with a keyset cursor
+on the comment id (`?after=<id>`), so a thread of any length costs one
+query per page. The (post, id) index serves both the filter and the
+ordering, and authors are joined in the same query. CommentPage is lazy,
+so when the page is served from the template fragment cache it runs no
+query at all. Cached threads are keyed on the 'comments:<post id>' version,
+which signals.py bumps whenever one of the post's comments is created,
+edited or deleted.
+"""
+
+from django.conf import settings
+from django.utils.functional import cached_property
+
+from .models import Comment
+
+COMMENTS_PER_PAGE = 50
+
+
+def get_page_size():
+    return getattr(settings, 'BLOG_COMMENTS_PER_PAGE', COMMENTS_PER_PAGE)
+
+
+def cache_threads():
+    return getattr(settings, 'BLOG_CACHE_COMMENT_THREADS', False)
+
+
+def thread_scope(post_id):
+    return f'comments:{post_id}'
+
+
+class CommentPage:
+    def __init__(self, post_id, after=None, limit=None):
+        self.post_id = post_id
+        self.after = after
+        self.limit = limit or get_page_size()
+
+    @cached_property
+    def _rows(self):
+        comments = (
+            Comment.objects.filter(post_id=self.post_id)
+            .select_related('author')
+            .order_by('pk')
+        )
+        if self.after is not None:
+            comments = comments.filter(pk__gt=self.after)
+        return list(comments[:self.limit + 1])
+
+    @property
+    def comments(self):
+        return self._rows[:self.limit]
+
+    @property
+    def next_after(self):
+        """
+        The `after` cursor for the next page, or None on the last page.
+        """
+        if len(self._rows) > self.limit:
+            return self._rows[self.limit - 1].pk
+        return None
@@ -1,8 +1,18 @@
 from django import forms
-from .models import Post
+from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.models import User
+from .models import Comment, Post
 from taggit.forms import TagWidget
 
 
+class RegisterForm(UserCreationForm):
+    email = forms.EmailField(required=True)
+
+    class Meta:
+        model = User
+        fields = ['username', 'email', 'password1', 'password2']
+
+
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
@@ -10,3 +20,9 @@ class PostForm(forms.ModelForm):
         widgets = {
             'tags': TagWidget(),
         }
+
+
+class CommentForm(forms.ModelForm):
+    class Meta:
+        model = Comment
+        fields = ['content']
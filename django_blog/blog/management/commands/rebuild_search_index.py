@@ -0,0 +1,26 @@
+"""
+Rebuild the post search index from scratch.
+
+    python manage.py rebuild_search_index
+
+Needed once after migrating (posts written before the index existed are
+not in it) and after bulk changes that bypass model signals.
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog import search
+
+
+class Command(BaseCommand):
+    help = 'Re-index every post for full-text search.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if search.get_backend() is None:
+            self.stdout.write('This database has no search index; searches use icontains.')
+            return
+        done = search.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {done} posts.'))
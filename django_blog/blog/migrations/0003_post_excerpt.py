@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:51
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def fill_excerpts(apps, schema_editor):
+    # Same as blog.models.make_excerpt at the time of writing.
+    Post = apps.get_model('blog', 'Post')
+    batch = []
+    for post in Post.objects.only('pk', 'content').iterator(chunk_size=500):
+        post.excerpt = Truncator(' '.join(post.content.split())).chars(100)
+        batch.append(post)
+        if len(batch) == 500:
+            Post.objects.bulk_update(batch, ['excerpt'])
+            batch = []
+    Post.objects.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_comment_post_tags'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-published_date', '-id'], name='post_published_idx'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_post_excerpt'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'id'], name='comment_post_id_idx'),
+        ),
+    ]
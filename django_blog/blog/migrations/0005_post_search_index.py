@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# See blog/search.py. Other databases get no index and fall back to
+# icontains searches.
+CREATE = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE blog_post_search "
+        "USING fts5(title, content, tags, tokenize='porter unicode61')",
+    ],
+    'postgresql': [
+        'CREATE TABLE blog_post_search ('
+        'post_id bigint PRIMARY KEY REFERENCES blog_post (id) ON DELETE CASCADE, '
+        'document tsvector NOT NULL)',
+        'CREATE INDEX blog_post_search_document ON blog_post_search USING GIN (document)',
+    ],
+}
+
+
+def create_index(apps, schema_editor):
+    for sql in CREATE.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE:
+        schema_editor.execute('DROP TABLE IF EXISTS blog_post_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_comment_post_index'),
+    ]
+
+    operations = [
+        # Existing posts are indexed by `manage.py rebuild_search_index`.
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_tags(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    TagStat = apps.get_model('blog', 'TagStat')
+    post_type = ContentType.objects.filter(app_label='blog', model='post').first()
+    if post_type is None:
+        return
+    TagStat.objects.bulk_create(
+        TagStat(tag_id=row['tag_id'], post_count=row['n'])
+        for row in TaggedItem.objects.filter(content_type=post_type)
+        .values('tag_id').annotate(n=Count('id'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_search_index'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagStat',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stat', serialize=False, to='taggit.tag')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-post_count', 'tag'], name='tagstat_count_idx')],
+            },
+        ),
+        migrations.RunPython(count_tags, migrations.RunPython.noop),
+    ]
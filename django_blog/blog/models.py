@@ -1,20 +1,46 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils.text import Truncator
+from taggit.managers import TaggableManager
+from taggit.models import Tag
+
+EXCERPT_LENGTH = 100
+
+
+def make_excerpt(content):
+    return Truncator(' '.join((content or '').split())).chars(EXCERPT_LENGTH)
 
 
 class Post(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
+    # First EXCERPT_LENGTH characters of `content`, kept in step by save()
+    # so post lists never load the body.
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False)
     published_date = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
 
     tags = TaggableManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-published_date', '-id'], name='post_published_idx'),
+        ]
+
     def __str__(self):
         return self.title
-from django.db import models
-from django.contrib.auth.models import User
-from django.urls import reverse
+
+    def save(self, *args, **kwargs):
+        self.excerpt = make_excerpt(self.content)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
+    def get_absolute_url(self):
+        return reverse('post-detail', kwargs={'pk': self.pk})
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -27,8 +53,31 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # comment threads are read in id order per post (blog.comments)
+        indexes = [
+            models.Index(fields=['post', 'id'], name='comment_post_id_idx'),
+        ]
+
     def __str__(self):
         return f"Comment by {self.author} on {self.post}"
 
     def get_absolute_url(self):
-        return reverse('post-detail', kwargs={'pk': self.post.pk})
+        return reverse('post-detail', kwargs={'pk': self.post_id})
+
+
+class TagStat(models.Model):
+    """
+    Number of posts carrying each tag, kept in step by signals.py for the
+    tag cloud (blog.tags).
+    """
+    tag = models.OneToOneField(Tag, on_delete=models.CASCADE, primary_key=True, related_name='stat')
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-post_count', 'tag'], name='tagstat_count_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tag_id}: {self.post_count}"
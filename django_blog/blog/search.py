@@ -0,0 +1,265 @@
+"""
+Full-text search over post titles, bodies and tag names.
+
+Posts are indexed in a `blog_post_search` table created by migration
+0005: an FTS5 table on SQLite, and a table of weighted tsvectors with a
+GIN index on PostgreSQL. signals.py keeps it current as posts are saved
+or deleted and as tags are added, removed or renamed. Run
+`manage.py rebuild_search_index` to fill it for posts that existed
+before the migration, or after bulk changes that bypass signals.
+
+search() returns a lazy SearchResults that works with Paginator. Each
+page is one ranked query over the index plus one query for the posts.
+Posts carry `rank` and `snippet` attributes; the snippet is an escaped
+extract of the body with the matched terms wrapped in <mark>.
+
+On any other database the old unindexed icontains search is used.
+"""
+
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+TABLE = 'blog_post_search'
+
+# Markers the database puts around matches; the text is escaped before
+# they become <mark> tags.
+START, STOP = '\ue000', '\ue001'
+ELLIPSIS = '\u2026'
+
+# Matches in titles and tags count for more than matches in the body.
+TITLE_WEIGHT, CONTENT_WEIGHT, TAGS_WEIGHT = 10.0, 1.0, 5.0
+
+
+def highlight(text):
+    return mark_safe(escape(text).replace(START, '<mark>').replace(STOP, '</mark>'))
+
+
+def _tag_names(post):
+    # all(), unlike names(), uses prefetch_related('tags')
+    return ' '.join(tag.name for tag in post.tags.all())
+
+
+# ----------------------------
+# Backends
+# ----------------------------
+class SQLiteBackend:
+    """
+    FTS5 with the porter stemmer. The rowid of each index row is the post
+    id; user input is reduced to quoted terms, all of which must match.
+    """
+
+    def match(self, query):
+        terms = re.findall(r'\w+', query)
+        return ' '.join('"%s"' % term for term in terms)
+
+    def index(self, cursor, post_id, title, content, tags):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, title, content, tags) VALUES (%s, %s, %s, %s)',
+            [post_id, title, content, tags],
+        )
+
+    def remove(self, cursor, post_id):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+
+    def clear(self, cursor):
+        cursor.execute(f'DELETE FROM {TABLE}')
+
+    def count(self, cursor, query):
+        if not self.match(query):
+            return 0
+        cursor.execute(f'SELECT COUNT(*) FROM {TABLE} WHERE {TABLE} MATCH %s', [self.match(query)])
+        return cursor.fetchone()[0]
+
+    def search(self, cursor, query, offset, limit):
+        if not self.match(query):
+            return []
+        # bm25() is lower for better matches.
+        cursor.execute(
+            f'SELECT rowid, -bm25({TABLE}, %s, %s, %s) AS rank, '
+            f"snippet({TABLE}, 1, %s, %s, %s, 24) "
+            f'FROM {TABLE} WHERE {TABLE} MATCH %s '
+            'ORDER BY rank DESC, rowid DESC LIMIT %s OFFSET %s',
+            [TITLE_WEIGHT, CONTENT_WEIGHT, TAGS_WEIGHT, START, STOP, ELLIPSIS,
+             self.match(query), limit, offset],
+        )
+        return cursor.fetchall()
+
+
+class PostgresBackend:
+    """
+    Weighted tsvectors (title and tags 'A', body 'B') behind a GIN index,
+    queried with websearch_to_tsquery() so any input is valid. Snippets
+    come from ts_headline(), run only on the rows of the page.
+    """
+
+    config = 'english'
+
+    def index(self, cursor, post_id, title, content, tags):
+        cursor.execute(
+            f'INSERT INTO {TABLE} (post_id, document) VALUES (%s, '
+            'setweight(to_tsvector(%s, %s), \'A\') || '
+            'setweight(to_tsvector(%s, %s), \'A\') || '
+            'setweight(to_tsvector(%s, %s), \'B\')) '
+            'ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document',
+            [post_id, self.config, title, self.config, tags, self.config, content],
+        )
+
+    def remove(self, cursor, post_id):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE post_id = %s', [post_id])
+
+    def clear(self, cursor):
+        cursor.execute(f'TRUNCATE {TABLE}')
+
+    def count(self, cursor, query):
+        cursor.execute(
+            f'SELECT COUNT(*) FROM {TABLE} WHERE document @@ websearch_to_tsquery(%s, %s)',
+            [self.config, query],
+        )
+        return cursor.fetchone()[0]
+
+    def search(self, cursor, query, offset, limit):
+        options = f'StartSel={START}, StopSel={STOP}, FragmentDelimiter={ELLIPSIS}, MaxFragments=2'
+        cursor.execute(
+            'SELECT hits.post_id, hits.rank, ts_headline(%s, p.content, hits.q, %s) '
+            'FROM ('
+            f'  SELECT post_id, ts_rank(document, q) AS rank, q FROM {TABLE}, '
+            '  websearch_to_tsquery(%s, %s) q WHERE document @@ q '
+            '  ORDER BY rank DESC, post_id DESC LIMIT %s OFFSET %s'
+            ') hits JOIN blog_post p ON p.id = hits.post_id '
+            'ORDER BY hits.rank DESC, hits.post_id DESC',
+            [self.config, options, self.config, query, limit, offset],
+        )
+        return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'postgresql': PostgresBackend,
+}
+
+
+def get_backend(vendor=None):
+    backend = BACKENDS.get(vendor or connection.vendor)
+    return backend() if backend else None
+
+
+# ----------------------------
+# Indexing
+# ----------------------------
+def index_post(post):
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.index(cursor, post.pk, post.title, post.content, _tag_names(post))
+
+
+def index_posts(post_ids):
+    for post in Post.objects.filter(pk__in=post_ids).prefetch_related('tags'):
+        index_post(post)
+
+
+def remove_post(post_id):
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.remove(cursor, post_id)
+
+
+def rebuild(batch_size=500):
+    """
+    Re-index every post; returns the number indexed.
+    """
+    backend = get_backend()
+    if backend is None:
+        return 0
+    done = 0
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            backend.clear(cursor)
+        last_pk = 0
+        while True:
+            posts = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                .only('pk', 'title', 'content').prefetch_related('tags')[:batch_size]
+            )
+            if not posts:
+                return done
+            with connection.cursor() as cursor:
+                for post in posts:
+                    backend.index(cursor, post.pk, post.title, post.content, _tag_names(post))
+            done += len(posts)
+            last_pk = posts[-1].pk
+
+
+# ----------------------------
+# Searching
+# ----------------------------
+class SearchResults:
+    """
+    Lazy ranked results for Paginator: count() and slicing each run one
+    query against the index.
+    """
+
+    def __init__(self, query):
+        self.query = query.strip()
+        self.backend = get_backend()
+
+    def count(self):
+        if not self.query:
+            return 0
+        if self.backend is None:
+            return self._fallback().count()
+        with connection.cursor() as cursor:
+            return self.backend.count(cursor, self.query)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('SearchResults only supports slicing.')
+        offset, stop = index.start or 0, index.stop
+        if not self.query or stop <= offset:
+            return []
+        if self.backend is None:
+            posts = list(self._fallback()[offset:stop])
+            for post in posts:
+                post.rank, post.snippet = None, post.excerpt
+            return posts
+
+        with connection.cursor() as cursor:
+            hits = self.backend.search(cursor, self.query, offset, stop - offset)
+        posts = Post.objects.only('id', 'title', 'excerpt', 'published_date').in_bulk(
+            [post_id for post_id, _, _ in hits]
+        )
+        results = []
+        for post_id, rank, snippet in hits:
+            post = posts.get(post_id)
+            if post is not None:
+                post.rank, post.snippet = rank, highlight(snippet)
+                results.append(post)
+        return results
+
+    def _fallback(self):
+        return (
+            Post.objects.filter(pk__in=Post.objects.filter(
+                Q(title__icontains=self.query) |
+                Q(content__icontains=self.query) |
+                Q(tags__name__icontains=self.query)
+            ).values('pk'))
+            .only('id', 'title', 'excerpt', 'published_date')
+            .order_by('-published_date', '-id')
+        )
+
+
+def search(query):
+    return SearchResults(query)
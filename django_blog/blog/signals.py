@@ -0,0 +1,91 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from taggit.models import Tag
+
+from . import caching, search, tags
+from .comments import thread_scope
+from .models import Comment, Post
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_post_lists(sender, **kwargs):
+    # Lists show titles, excerpts and comment counts.
+    caching.bump('posts')
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_comment_thread(sender, instance, **kwargs):
+    caching.bump(thread_scope(instance.post_id))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_tag_lists(sender, action, **kwargs):
+    if action.startswith('post_'):
+        caching.bump('posts')
+
+
+# ----------------------------
+# Search index
+# ----------------------------
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def reindex_post_tags(sender, instance, action, **kwargs):
+    # taggit always sends these from the post's side.
+    if action.startswith('post_') and isinstance(instance, Post):
+        search.index_post(instance)
+
+
+@receiver(post_save, sender=Tag)
+def reindex_renamed_tag(sender, instance, created, **kwargs):
+    if not created:
+        search.index_posts(Post.objects.filter(tags=instance).values('pk'))
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tagged_posts(sender, instance, **kwargs):
+    instance._tagged_post_ids = list(Post.objects.filter(tags=instance).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def reindex_deleted_tag(sender, instance, **kwargs):
+    search.index_posts(getattr(instance, '_tagged_post_ids', []))
+
+
+# ----------------------------
+# Tag counts and tag pages
+# ----------------------------
+@receiver(m2m_changed, sender=Post.tags.through)
+def count_post_tags(sender, instance, action, pk_set, **kwargs):
+    # taggit sends the ids of the tags added or removed; for clear() they
+    # are remembered beforehand.
+    if action == 'pre_clear':
+        instance._cleared_tag_ids = list(instance.tags.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        tags.refresh_counts(pk_set or [])
+    elif action == 'post_clear':
+        tags.refresh_counts(getattr(instance, '_cleared_tag_ids', []))
+
+
+@receiver(pre_delete, sender=Post)
+def remember_post_tags(sender, instance, **kwargs):
+    instance._deleted_tag_ids = list(instance.tags.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post_tags(sender, instance, **kwargs):
+    tags.refresh_counts(getattr(instance, '_deleted_tag_ids', []))
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def invalidate_tag_slugs(sender, **kwargs):
+    tags.invalidate_tags()
@@ -0,0 +1,153 @@
+"""
+Tag pages and tag counts.
+
+TagStat holds each tag's post count, recounted by signals.py for just
+the tags a change touches, so the tag cloud is one indexed query over
+(post_count, tag). Tag pages read the tag for a slug from the cache
+(under the 'tags' version, bumped when tags are renamed or deleted) and
+page through the tag's posts with TaggedPostIds: the count comes from
+TagStat and each page's post ids are cached on their own, under a
+per-tag version bumped whenever the tag is added to or removed from a
+post. No cache entry grows with the number of posts a tag has; a page
+is one primary-key query for its posts, and none at all when its
+fragment is cached.
+"""
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Count
+from taggit.models import Tag, TaggedItem
+
+from . import caching
+from .models import Post, TagStat
+
+TOP_TAGS = 20
+MAX_TOP_TAGS = 100
+CLOUD_WEIGHTS = 5
+
+
+def get_index_timeout():
+    return getattr(settings, 'BLOG_TAG_INDEX_TIMEOUT', 3600)
+
+
+def _tag_key(slug):
+    return f'blog:tag:{caching.version("tags")}:{slug}'
+
+
+def _posts_scope(tag_id):
+    return f'tag-posts:{tag_id}'
+
+
+def _post_ids_key(tag_id, part):
+    return f'blog:tag-posts:{tag_id}:{caching.version(_posts_scope(tag_id))}:{part}'
+
+
+# ----------------------------
+# Tag pages
+# ----------------------------
+def get_tag(slug):
+    """
+    The Tag with `slug`, or None; cached.
+    """
+    key = _tag_key(slug)
+    tag = cache.get(key)
+    if tag is None:
+        tag = Tag.objects.filter(slug=slug).first() or False
+        cache.set(key, tag, get_index_timeout())
+    return tag or None
+
+
+class TaggedPostIds:
+    """
+    Ids of the posts tagged `tag_id`, newest first like PostListView, for
+    a Paginator: count() and each slice are read (and cached) separately,
+    so only the requested page is ever loaded.
+    """
+
+    def __init__(self, tag_id):
+        self.tag_id = tag_id
+
+    def count(self):
+        key = _post_ids_key(self.tag_id, 'count')
+        count = cache.get(key)
+        if count is None:
+            stat = TagStat.objects.filter(tag_id=self.tag_id).values_list('post_count', flat=True)
+            count = stat.first() or 0
+            cache.set(key, count, get_index_timeout())
+        return count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice) or item.step is not None:
+            raise TypeError('TaggedPostIds only supports slicing.')
+        start, stop = item.start or 0, item.stop
+        key = _post_ids_key(self.tag_id, f'{start}:{stop}')
+        ids = cache.get(key)
+        if ids is None:
+            ids = list(
+                Post.objects.filter(tags__id=self.tag_id)
+                .order_by('-published_date', '-id')
+                .values_list('pk', flat=True)[start:stop]
+            )
+            cache.set(key, ids, get_index_timeout())
+        return ids
+
+
+def invalidate_tags():
+    caching.bump('tags')
+
+
+# ----------------------------
+# Counts
+# ----------------------------
+def refresh_counts(tag_ids):
+    """
+    Recount the posts of `tag_ids` and drop their cached post ids.
+    """
+    tag_ids = set(tag_ids)
+    if not tag_ids:
+        return
+    counts = dict(
+        TaggedItem.objects.filter(
+            tag_id__in=tag_ids, content_type=ContentType.objects.get_for_model(Post)
+        )
+        .values_list('tag_id').annotate(n=Count('id'))
+    )
+    # Tags that may have been deleted meanwhile are skipped.
+    existing = Tag.objects.filter(pk__in=tag_ids).values_list('pk', flat=True)
+    TagStat.objects.bulk_create(
+        [TagStat(tag_id=tag_id, post_count=counts.get(tag_id, 0)) for tag_id in existing],
+        update_conflicts=True,
+        unique_fields=['tag'],
+        update_fields=['post_count'],
+    )
+    # After the recount, so a page read meanwhile is not cached as current.
+    for tag_id in tag_ids:
+        caching.bump(_posts_scope(tag_id))
+
+
+def top_tags(limit=TOP_TAGS):
+    """
+    The `limit` most used tags as dicts with name, slug, post_count and a
+    1..CLOUD_WEIGHTS `weight` for tag clouds.
+    """
+    limit = max(1, min(limit, MAX_TOP_TAGS))
+    stats = list(
+        TagStat.objects.filter(post_count__gt=0).select_related('tag')
+        .order_by('-post_count', 'tag')[:limit]
+    )
+    if not stats:
+        return []
+    most = stats[0].post_count
+    return [
+        {
+            'name': stat.tag.name,
+            'slug': stat.tag.slug,
+            'post_count': stat.post_count,
+            'weight': 1 + (CLOUD_WEIGHTS - 1) * stat.post_count // most,
+        }
+        for stat in stats
+    ]
@@ -1,3 +1,236 @@
-from django.test import TestCase
+import io
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from . import tags
+from .models import EXCERPT_LENGTH, Comment, Post
+
+
+class PostListTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', password='password123')
+        cls.posts = [
+            Post.objects.create(title=f'Post {i}', content=f'Body {i} ' + 'word ' * 100, author=cls.user)
+            for i in range(12)
+        ]
+        for i in range(3):
+            Comment.objects.create(post=cls.posts[-1], author=cls.user, content=f'Comment {i}')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_excerpt_is_stored(self):
+        post = self.posts[0]
+        self.assertTrue(post.excerpt.startswith('Body 0 word'))
+        self.assertLessEqual(len(post.excerpt), EXCERPT_LENGTH)
+
+        post.content = 'Short now'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, 'Short now')
+
+    def test_list_is_paginated_without_bodies(self):
+        # COUNT for the paginator (then cached), and the page with counts.
+        with self.assertNumQueries(2):
+            response = self.client.get('/posts/')
+        titles = [post.title for post in response.context['posts']]
+        self.assertEqual(titles, [f'Post {i}' for i in range(11, 1, -1)])
+        self.assertContains(response, '3 comments')
+        self.assertContains(response, 'Page 1 of 2')
+
+        sql = str(response.context['posts'].query)
+        self.assertNotIn('"content"', sql)
+
+        response = self.client.get('/posts/', {'page': 2})
+        self.assertContains(response, 'Post 0')
+
+    def test_fragments_are_cached_and_invalidated(self):
+        self.client.get('/posts/')
+        with self.assertNumQueries(0):
+            self.client.get('/posts/')
+        with self.assertNumQueries(1):
+            self.client.get('/posts/', {'page': 2})
+
+        Comment.objects.create(post=self.posts[-1], author=self.user, content='One more')
+        self.assertContains(self.client.get('/posts/'), '4 comments')
+
+        self.posts[-1].title = 'Renamed'
+        self.posts[-1].save()
+        self.assertContains(self.client.get('/posts/'), 'Renamed')
+
+        self.posts[0].delete()
+        self.posts[1].delete()
+        self.assertNotContains(self.client.get('/posts/'), 'Page 1 of')
+
+    def test_tag_pages(self):
+        self.posts[0].tags.add('django')
+        response = self.client.get('/tags/django/')
+        self.assertContains(response, 'Posts tagged "django"')
+        self.assertEqual([post.pk for post in response.context['posts']], [self.posts[0].pk])
+        self.assertEqual(self.client.get('/tags/missing/').status_code, 404)
+
+
+@override_settings(BLOG_COMMENTS_PER_PAGE=5)
+class PostDetailTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.post_author = User.objects.create_user(username='alice', password='password123')
+        cls.post = Post.objects.create(title='Thread', content='Body', author=cls.post_author)
+        Comment.objects.bulk_create([
+            Comment(post=cls.post, author=User.objects.create_user(username=f'reader{i}'),
+                    content=f'Comment {i}')
+            for i in range(12)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_comments_do_not_query_per_author(self):
+        url = f'/post/{self.post.pk}/'
+        # The post with its author, then one page of comments with theirs.
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertContains(response, 'reader4</strong>')
+        self.assertNotContains(response, 'Comment 5')
+
+        seen = [comment.content for comment in response.context['thread'].comments]
+        while response.context['thread'].next_after:
+            response = self.client.get(url, {'after': response.context['thread'].next_after})
+            seen += [comment.content for comment in response.context['thread'].comments]
+        self.assertEqual(seen, [f'Comment {i}' for i in range(12)])
+
+    @override_settings(BLOG_CACHE_COMMENT_THREADS=True)
+    def test_cached_thread_is_invalidated(self):
+        url = f'/post/{self.post.pk}/'
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        comment = Comment.objects.order_by('pk').first()
+        comment.content = 'Edited'
+        comment.save()
+        self.assertContains(self.client.get(url), 'Edited')
+
+        comment.delete()
+        self.assertNotContains(self.client.get(url), 'Edited')
+
+    @override_settings(BLOG_CACHE_COMMENT_THREADS=True)
+    def test_cached_thread_varies_on_user(self):
+        url = f'/post/{self.post.pk}/'
+        self.client.get(url)
+        reader = User.objects.get(username='reader0')
+        self.client.force_login(reader)
+        self.assertContains(self.client.get(url), 'Edit</a>', count=1)
+
+
+class SearchTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', password='password123')
+        cls.django = Post.objects.create(
+            title='Django tips', content='Use select_related for <b>foreign keys</b>.', author=cls.user
+        )
+        cls.cooking = Post.objects.create(
+            title='Bread', content='Kneading dough and running the oven hot.', author=cls.user
+        )
+        cls.mention = Post.objects.create(
+            title='Weekly notes', content='Someone mentioned django in passing.', author=cls.user
+        )
+
+    def search(self, query, **params):
+        return self.client.get('/search/', {'q': query, **params})
+
+    def test_ranked_results_with_escaped_snippets(self):
+        response = self.search('django')
+        self.assertEqual(
+            [post.pk for post in response.context['results']], [self.django.pk, self.mention.pk]
+        )
+        self.assertContains(response, 'mentioned <mark>django</mark> in passing')
+        self.assertContains(self.search('foreign keys'), '&lt;b&gt;<mark>foreign</mark> <mark>keys</mark>')
+        # Stemmed, and punctuation-only input is harmless.
+        self.assertContains(self.search('run'), 'Bread')
+        self.assertContains(self.search('"*('), 'No results found.')
+
+    def test_index_follows_edits_and_tags(self):
+        self.cooking.tags.add('baking')
+        self.assertContains(self.search('baking'), 'Bread')
+
+        self.cooking.tags.remove('baking')
+        self.assertContains(self.search('baking'), 'No results found.')
+
+        self.cooking.title = 'Sourdough'
+        self.cooking.save()
+        self.assertContains(self.search('sourdough'), 'Sourdough')
+
+        self.cooking.delete()
+        self.assertContains(self.search('dough'), 'No results found.')
+
+    def test_results_are_paginated(self):
+        Post.objects.bulk_create([
+            Post(title=f'Django {i}', content='More django.', author=self.user) for i in range(12)
+        ])
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(self.search('django').context['page_obj'].paginator.count, 14)
+        self.assertEqual(len(self.search('django', page=2).context['results']), 4)
+
+
+class TagTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', password='password123')
+        cls.posts = [
+            Post.objects.create(title=f'Post {i}', content='Body', author=cls.user) for i in range(12)
+        ]
+        for post in cls.posts:
+            post.tags.add('django')
+        cls.posts[0].tags.add('python')
+
+    def setUp(self):
+        cache.clear()
+
+    def counts(self):
+        return {row['name']: row['post_count'] for row in self.client.get('/api/tags/top/').json()['tags']}
+
+    def test_counts_follow_tagging(self):
+        self.assertEqual(self.counts(), {'django': 12, 'python': 1})
+
+        self.posts[1].tags.add('python')
+        self.posts[2].tags.remove('django')
+        self.posts[3].tags.clear()
+        self.posts[4].delete()
+        self.assertEqual(self.counts(), {'django': 9, 'python': 2})
+
+        top = self.client.get('/api/tags/top/', {'limit': 1}).json()['tags']
+        self.assertEqual(top, [{'name': 'django', 'slug': 'django', 'post_count': 9, 'weight': 5}])
+
+    def test_tag_pages_use_the_cached_index(self):
+        # The tag, its count, the page's ids and the page's posts.
+        with self.assertNumQueries(4):
+            response = self.client.get('/tags/django/')
+        titles = [post.title for post in response.context['posts']]
+        self.assertEqual(titles, [f'Post {i}' for i in range(11, 1, -1)])
+        self.assertContains(response, 'Page 1 of 2')
+
+        with self.assertNumQueries(0):
+            self.client.get('/tags/django/')
+        with self.assertNumQueries(2):
+            response = self.client.get('/tags/django/', {'page': 2})
+        self.assertEqual([post.title for post in response.context['posts']], ['Post 1', 'Post 0'])
+
+        # Each page's ids are cached on their own, never the whole list.
+        tag_id = self.posts[0].tags.get(name='django').pk
+        self.assertEqual(cache.get(tags._post_ids_key(tag_id, '10:12')),
+                         [self.posts[1].pk, self.posts[0].pk])
+
+        self.posts[5].tags.remove('django')
+        response = self.client.get('/tags/django/', {'page': 2})
+        self.assertEqual([post.title for post in response.context['posts']], ['Post 0'])
+        self.assertEqual(self.client.get('/tags/missing/').status_code, 404)
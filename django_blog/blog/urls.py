@@ -1,57 +1,36 @@
+from django.contrib.auth import views as auth_views
 from django.urls import path
-from .views import (
-    PostListView,
-    PostDetailView,
-    PostCreateView,
-    PostUpdateView,
-    PostDeleteView,
-)
+from . import views
 
 urlpatterns = [
-    path("posts/", PostListView.as_view(), name="post-list"),
-    path("post/new/", PostCreateView.as_view(), name="post-create"),
-    path("post/<int:pk>/", PostDetailView.as_view(), name="post-detail"),
-    path("post/<int:pk>/update/", PostUpdateView.as_view(), name="post-update"),
-    path("post/<int:pk>/delete/", PostDeleteView.as_view(), name="post-delete"),
-]
+    path("register/", views.register, name="register"),
+    path("login/", auth_views.LoginView.as_view(template_name="blog/login.html"), name="login"),
+    path("logout/", auth_views.LogoutView.as_view(), name="logout"),
+    path("profile/", views.profile, name="profile"),
 
-from .views import (
-    CommentCreateView,
-    CommentUpdateView,
-    CommentDeleteView,
-)
+    path("posts/", views.PostListView.as_view(), name="post-list"),
+    path("post/new/", views.PostCreateView.as_view(), name="post-create"),
+    path("post/<int:pk>/", views.PostDetailView.as_view(), name="post-detail"),
+    path("post/<int:pk>/update/", views.PostUpdateView.as_view(), name="post-update"),
+    path("post/<int:pk>/delete/", views.PostDeleteView.as_view(), name="post-delete"),
 
-urlpatterns += [
     path(
         "post/<int:pk>/comments/new/",
-        CommentCreateView.as_view(),
+        views.CommentCreateView.as_view(),
         name="comment-create"
     ),
     path(
         "comment/<int:pk>/update/",
-        CommentUpdateView.as_view(),
+        views.CommentUpdateView.as_view(),
         name="comment-update"
     ),
     path(
         "comment/<int:pk>/delete/",
-        CommentDeleteView.as_view(),
+        views.CommentDeleteView.as_view(),
         name="comment-delete"
     ),
-]
-
-from django.urls import path
-from .views import PostSearchView
-
-urlpatterns = [
-    path('search/', PostSearchView.as_view(), name='post-search'),
-]
 
-urlpatterns = [
     path('search/', views.search_posts, name='search_posts'),
-]
-from django.urls import path
-from .views import PostByTagListView
-
-urlpatterns = [
-    path('tags/<slug:tag_slug>/', PostByTagListView.as_view(), name='posts_by_tag'),
+    path('tags/<slug:tag_slug>/', views.PostByTagListView.as_view(), name='posts_by_tag'),
+    path('api/tags/top/', views.top_tags_api, name='top_tags'),
 ]
@@ -1,30 +1,215 @@
-from django.db.models import Q
-from .models import Post
-from django.views.generic import ListView
-from taggit.models import Tag
-from .models import Post
+from django.contrib.auth import login
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.paginator import Paginator
+from django.db.models import Count
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse, reverse_lazy
+from django.views.generic import CreateView, DeleteView, DetailView, ListView, UpdateView
 
+from . import caching, search, tags
+from .comments import CommentPage, cache_threads, thread_scope
+from .forms import CommentForm, PostForm, RegisterForm
+from .models import Comment, Post
 
-class PostByTagListView(ListView):
+
+# -------------------------------
+# Accounts
+# -------------------------------
+def register(request):
+    if request.method == 'POST':
+        form = RegisterForm(request.POST)
+        if form.is_valid():
+            user = form.save()
+            login(request, user)
+            return redirect('post-list')
+    else:
+        form = RegisterForm()
+    return render(request, 'blog/register.html', {'form': form})
+
+
+@login_required
+def profile(request):
+    if request.method == 'POST':
+        request.user.email = request.POST.get('email', request.user.email)
+        request.user.save(update_fields=['email'])
+        return redirect('profile')
+    return render(request, 'blog/profile.html')
+
+
+# -------------------------------
+# Posts
+# -------------------------------
+class PostListView(ListView):
+    """
+    Pages of posts, newest first. Only the listed columns are read (the
+    stored excerpt, never `content`) and comment counts come from the same
+    query; each rendered page is cached in the template under the 'posts'
+    version, and so is the post count, so a cached page costs no query.
+    """
     model = Post
     template_name = 'blog/post_list.html'
     context_object_name = 'posts'
+    paginate_by = 10
+    count_scope = 'posts'
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        if self.count_scope is None:
+            return super().get_paginator(queryset, per_page, **kwargs)
+        return caching.VersionedCountPaginator(queryset, per_page, self.count_scope, **kwargs)
 
     def get_queryset(self):
-        tag_slug = self.kwargs.get('tag_slug')
-        tag = Tag.objects.get(slug=tag_slug)
-        return Post.objects.filter(tags=tag)
+        return (
+            Post.objects.only('id', 'title', 'excerpt', 'published_date')
+            .annotate(comment_count=Count('comments'))
+            .order_by('-published_date', '-id')
+        )
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['posts_version'] = caching.version('posts')
+        context['fragment_timeout'] = caching.get_fragment_timeout()
+        return context
+
+
+class PostByTagListView(PostListView):
+    """
+    Posts with one tag. The tag, its post count and the page's post ids
+    come from the cache (see blog.tags), so a page is a single primary-key
+    query for its posts.
+    """
+    count_scope = None  # TaggedPostIds caches its own count.
+
+    def get(self, request, *args, **kwargs):
+        self.tag = tags.get_tag(self.kwargs.get('tag_slug'))
+        if self.tag is None:
+            raise Http404('No such tag.')
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return tags.TaggedPostIds(self.tag.pk)
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator, page, ids, is_paginated = super().paginate_queryset(queryset, page_size)
+        # Lazy, so a cached fragment costs no query.
+        page.object_list = super().get_queryset().filter(pk__in=list(ids))
+        return paginator, page, page.object_list, is_paginated
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['tag'] = self.tag
+        return context
+
+
+def top_tags_api(request):
+    """
+    The most used tags with their post counts: ?limit=N (default 20).
+    """
+    try:
+        limit = int(request.GET.get('limit', tags.TOP_TAGS))
+    except ValueError:
+        limit = tags.TOP_TAGS
+    return JsonResponse({'tags': tags.top_tags(limit)})
+
+
+class PostDetailView(DetailView):
+    """
+    A post and one page of its comments (see blog.comments), optionally
+    rendered from the fragment cache.
+    """
+    model = Post
+    template_name = 'blog/post_detail.html'
+
+    def get_queryset(self):
+        return Post.objects.select_related('author')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            after = int(self.request.GET['after'])
+        except (KeyError, ValueError):
+            after = None
+        context['form'] = CommentForm()
+        context['thread'] = CommentPage(self.object.pk, after)
+        context['cache_thread'] = cache_threads()
+        if context['cache_thread']:
+            context['thread_version'] = caching.version(thread_scope(self.object.pk))
+            context['fragment_timeout'] = caching.get_fragment_timeout()
+        return context
 
-def search_posts(request):
-    query = request.GET.get('q')
-    results = []
 
-    if query:
-        results = Post.objects.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(tags__name__icontains=query)
-        ).distinct()
+class PostCreateView(LoginRequiredMixin, CreateView):
+    model = Post
+    form_class = PostForm
+    template_name = 'blog/post_form.html'
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
+        return super().form_valid(form)
+
+
+class PostAuthorMixin(LoginRequiredMixin, UserPassesTestMixin):
+    def test_func(self):
+        return self.get_object().author_id == self.request.user.pk
+
+
+class PostUpdateView(PostAuthorMixin, UpdateView):
+    model = Post
+    form_class = PostForm
+    template_name = 'blog/post_form.html'
+
+
+class PostDeleteView(PostAuthorMixin, DeleteView):
+    model = Post
+    template_name = 'blog/post_confirm_delete.html'
+    success_url = reverse_lazy('post-list')
+
 
-    return render(request, 'blog/search_results.html', {'results': results})
+# -------------------------------
+# Comments
+# -------------------------------
+class CommentCreateView(LoginRequiredMixin, CreateView):
+    model = Comment
+    form_class = CommentForm
+    template_name = 'blog/comment_form.html'
+
+    def form_valid(self, form):
+        form.instance.post = get_object_or_404(Post, pk=self.kwargs['pk'])
+        form.instance.author = self.request.user
+        return super().form_valid(form)
+
+
+class CommentAuthorMixin(LoginRequiredMixin, UserPassesTestMixin):
+    def test_func(self):
+        return self.get_object().author_id == self.request.user.pk
+
+
+class CommentUpdateView(CommentAuthorMixin, UpdateView):
+    model = Comment
+    form_class = CommentForm
+    template_name = 'blog/comment_form.html'
+
+
+class CommentDeleteView(CommentAuthorMixin, DeleteView):
+    model = Comment
+    template_name = 'blog/comment_confirm_delete.html'
+
+    def get_success_url(self):
+        return reverse('post-detail', kwargs={'pk': self.object.post_id})
+
+
+# -------------------------------
+# Search
+# -------------------------------
+def search_posts(request):
+    """
+    Ranked full-text search (see blog.search), ten results per page.
+    """
+    query = request.GET.get('q', '').strip()
+    page = Paginator(search.search(query), 10).get_page(request.GET.get('page'))
+    return render(request, 'blog/search_results.html', {
+        'query': query,
+        'page_obj': page,
+        'results': page.object_list,
+    })
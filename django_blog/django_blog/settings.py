@@ -128,3 +128,17 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+LOGIN_URL = 'login'
+LOGIN_REDIRECT_URL = 'post-list'
+LOGOUT_REDIRECT_URL = 'post-list'
+
+# Cached post-list fragments (see blog/caching.py)
+BLOG_FRAGMENT_TIMEOUT = 300
+
+# Comment threads on post pages (see blog/comments.py)
+BLOG_COMMENTS_PER_PAGE = 50
+BLOG_CACHE_COMMENT_THREADS = False
+
+# Cached tag lookups and tag post-id lists (see blog/tags.py)
+BLOG_TAG_INDEX_TIMEOUT = 3600
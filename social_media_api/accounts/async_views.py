@@ -0,0 +1,189 @@
+"""
+Async-native register, login and profile endpoints.
+
+Under ASGI a DRF view runs in a thread via sync_to_async. These views are
+plain async Django views: the ORM and cache are used through their async
+APIs, tokens are resolved by CachedTokenAuthentication.aauthenticate()
+and passwords are hashed on the pool in accounts/hashing.py, so a request
+never ties up a thread while it waits.
+
+They accept JSON only (no profile picture uploads) and answer in the same
+shapes as the DRF views in accounts/views.py. Use
+`python manage.py loadtest_accounts` to compare the two deployments.
+"""
+
+import json
+import math
+
+from django.contrib.auth import aauthenticate
+from django.db import IntegrityError
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.authtoken.models import Token
+
+from . import hashing
+from .authentication import CachedTokenAuthentication
+from .models import User
+from .serializers import (
+    AsyncLoginSerializer,
+    AsyncProfileUpdateSerializer,
+    AsyncRegisterSerializer,
+    ProfileSerializer,
+)
+from .throttling import LoginIPThrottle, LoginUsernameThrottle
+from .views import LoginUnavailable
+
+
+def error(detail, status_code, headers=None):
+    if isinstance(detail, str):
+        detail = {'detail': detail}
+    return JsonResponse(detail, status=status_code, headers=headers)
+
+
+class AsyncAPIView(View):
+    """
+    Base class: JSON parsing, token/session authentication, throttling.
+    """
+
+    authentication_class = CachedTokenAuthentication
+    throttle_classes = []
+    login_required = False
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # As in DRF, CSRF is only enforced for session-authenticated requests.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.data = self.parse(request)
+            request.user = await self.authenticate(request)
+            if self.login_required and not request.user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+            await self.check_throttles(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    def parse(self, request):
+        if request.method not in ('POST', 'PUT', 'PATCH') or not request.body:
+            return {}
+        try:
+            data = json.loads(request.body)
+        except ValueError as exc:
+            raise exceptions.ParseError(f'JSON parse error - {exc}')
+        if not isinstance(data, dict):
+            raise exceptions.ParseError('Expected a JSON object.')
+        return data
+
+    async def authenticate(self, request):
+        result = await self.authentication_class().aauthenticate(request)
+        if result is not None:
+            return result[0]
+        user = await request.auser()
+        if user.is_authenticated and user.is_active:
+            SessionAuthentication().enforce_csrf(request)
+        return user
+
+    async def check_throttles(self, request):
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            if not await throttle.aallow_request(request, self):
+                raise exceptions.Throttled(wait=throttle.wait())
+
+    def handle_exception(self, exc):
+        headers = {}
+        if isinstance(exc, exceptions.Throttled) and exc.wait is not None:
+            headers['Retry-After'] = str(math.ceil(exc.wait))
+        if isinstance(exc, exceptions.NotAuthenticated):
+            headers['WWW-Authenticate'] = self.authentication_class.keyword
+        if isinstance(exc, LoginUnavailable):
+            headers['Retry-After'] = '1'
+        return error(exc.detail, exc.status_code, headers)
+
+
+def validate(serializer_class, data, **kwargs):
+    serializer = serializer_class(data=data, **kwargs)
+    if not serializer.is_valid():
+        raise exceptions.ValidationError(serializer.errors)
+    return serializer.validated_data
+
+
+# ----------------------------
+# Views
+# ----------------------------
+class AsyncRegisterView(AsyncAPIView):
+
+    async def post(self, request):
+        data = validate(AsyncRegisterSerializer, request.data)
+        if await User.objects.filter(username=data['username']).aexists():
+            raise exceptions.ValidationError(
+                {'username': ['A user with that username already exists.']}
+            )
+        try:
+            password = await hashing.amake_password(data['password'])
+        except hashing.HashPoolBusy:
+            raise LoginUnavailable()
+        try:
+            user = await User.objects.acreate(
+                username=data['username'],
+                email=User.objects.normalize_email(data.get('email') or ''),
+                password=password,
+                bio=data.get('bio', ''),
+            )
+        except IntegrityError:
+            # Lost a race with another registration.
+            raise exceptions.ValidationError(
+                {'username': ['A user with that username already exists.']}
+            )
+        return JsonResponse(
+            {'username': user.username, 'email': user.email, 'bio': user.bio},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class AsyncLoginView(AsyncAPIView):
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
+
+    async def post(self, request):
+        data = validate(AsyncLoginSerializer, request.data)
+        try:
+            user = await aauthenticate(
+                request, username=data['username'], password=data['password']
+            )
+        except hashing.HashPoolBusy:
+            raise LoginUnavailable()
+        if user is None:
+            raise exceptions.ValidationError({'non_field_errors': ['Invalid credentials']})
+
+        token, _ = await Token.objects.aget_or_create(user=user)
+        return JsonResponse({'token': token.key, 'username': user.username})
+
+
+class AsyncProfileView(AsyncAPIView):
+    login_required = True
+
+    async def get(self, request):
+        # Re-read the user: request.user may come from the token cache.
+        user = await User.objects.aget(pk=request.user.pk)
+        return JsonResponse(ProfileSerializer(user, context={'request': request}).data)
+
+    async def patch(self, request):
+        data = validate(AsyncProfileUpdateSerializer, request.data)
+        user = await User.objects.aget(pk=request.user.pk)
+        if 'username' in data and data['username'] != user.username:
+            if await User.objects.filter(username=data['username']).aexists():
+                raise exceptions.ValidationError(
+                    {'username': ['A user with that username already exists.']}
+                )
+        for name, value in data.items():
+            setattr(user, name, value)
+        if data:
+            await user.asave(update_fields=list(data))
+        return JsonResponse(ProfileSerializer(user, context={'request': request}).data)
+
+    # Every field is optional, so PUT behaves like PATCH.
+    put = patch
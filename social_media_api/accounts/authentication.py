@@ -0,0 +1,200 @@
+"""
+Token authentication with a token -> user cache.
+
+DRF's TokenAuthentication runs a Token JOIN User query on every request.
+CachedTokenAuthentication looks the token up in a small in-process TTL/LRU
+first, then in the shared Django cache, and only runs the join on a miss.
+The in-process cache holds the user; the shared cache holds only the user
+id, the is_active flag and the token's creation time, and a hit there
+re-reads the user by primary key, so no password hash leaves the process.
+Entries are dropped when the token is deleted (logout, rotation) or
+the user is saved (deactivation, password change); see accounts/signals.py.
+The cached user is only meant for authentication: views that show user
+data which changes through queryset.update() (such as the follower
+counters) should re-read it.
+
+Other processes keep their local copy for at most LOCAL_TTL seconds, so
+keep that short. Settings (all optional):
+
+    TOKEN_AUTH_CACHE = {
+        'ALIAS': 'default',         # Django cache alias for the shared layer
+        'SHARED_TTL': 300,
+        'LOCAL_TTL': 5,
+        'LOCAL_MAX_ENTRIES': 10000,
+    }
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'SHARED_TTL': 300,
+    'LOCAL_TTL': 5,
+    'LOCAL_MAX_ENTRIES': 10000,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'TOKEN_AUTH_CACHE', {}).get(name, DEFAULTS[name])
+
+
+class _LocalCache:
+    """
+    Thread-safe LRU with a per-entry time to live.
+    """
+
+    def __init__(self):
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + get_setting('LOCAL_TTL'), value)
+            self._data.move_to_end(key)
+            while len(self._data) > get_setting('LOCAL_MAX_ENTRIES'):
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = _LocalCache()
+
+
+def cache_key(token_key):
+    # Never use the raw token as a cache key.
+    return 'auth:token:' + hashlib.sha256(token_key.encode('utf-8')).hexdigest()
+
+
+def invalidate_token(token_key):
+    key = cache_key(token_key)
+    local_cache.delete(key)
+    caches[get_setting('ALIAS')].delete(key)
+
+
+def invalidate_tokens(token_keys):
+    keys = [cache_key(token_key) for token_key in token_keys]
+    for key in keys:
+        local_cache.delete(key)
+    caches[get_setting('ALIAS')].delete_many(keys)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for rest_framework.authentication.TokenAuthentication.
+
+    aauthenticate() is the same lookup for async views, using the async
+    cache and ORM APIs.
+    """
+
+    def authenticate_credentials(self, key):
+        cached_key = cache_key(key)
+
+        entry = local_cache.get(cached_key)
+        if entry is not None:
+            return self._from_local(entry)
+
+        shared = caches[get_setting('ALIAS')].get(cached_key)
+        if shared is not None:
+            user_id, is_active, created = shared
+            self._check_active(is_active)
+            user = get_user_model()._default_manager.filter(pk=user_id).first()
+            return self._from_shared(cached_key, key, user, created)
+
+        user, token = super().authenticate_credentials(key)
+        self._store(cached_key, user, token)
+        return user, token
+
+    async def aauthenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        cached_key = cache_key(key)
+
+        entry = local_cache.get(cached_key)
+        if entry is not None:
+            return self._from_local(entry)
+
+        shared = await caches[get_setting('ALIAS')].aget(cached_key)
+        if shared is not None:
+            user_id, is_active, created = shared
+            self._check_active(is_active)
+            user = await get_user_model()._default_manager.filter(pk=user_id).afirst()
+            return self._from_shared(cached_key, key, user, created)
+
+        try:
+            token = await self.get_model().objects.select_related('user').aget(key=key)
+        except self.get_model().DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        self._check_active(token.user.is_active)
+        await caches[get_setting('ALIAS')].aset(
+            cached_key, self._shared_entry(token.user, token), get_setting('SHARED_TTL')
+        )
+        local_cache.set(cached_key, (copy.copy(token.user), copy.copy(token)))
+        return token.user, token
+
+    def _check_active(self, is_active):
+        if not is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+    def _from_local(self, entry):
+        user, token = entry
+        self._check_active(user.is_active)
+        # Hand each request its own instances; views may modify request.user.
+        return copy.copy(user), copy.copy(token)
+
+    def _from_shared(self, cached_key, key, user, created):
+        # The shared entry only proves the token maps to this user id; the
+        # user itself is re-read by primary key (no join on the token).
+        self._check_active(user is not None and user.is_active)
+        token = self.get_model()(key=key, user=user, created=created)
+        local_cache.set(cached_key, (copy.copy(user), copy.copy(token)))
+        return user, token
+
+    def _shared_entry(self, user, token):
+        # Never put the user instance (password hash included) in a cache
+        # other processes can read.
+        return (user.pk, user.is_active, token.created)
+
+    def _store(self, cached_key, user, token):
+        caches[get_setting('ALIAS')].set(
+            cached_key, self._shared_entry(user, token), get_setting('SHARED_TTL')
+        )
+        local_cache.set(cached_key, (copy.copy(user), copy.copy(token)))
@@ -0,0 +1,95 @@
+"""
+Follower graph operations.
+
+Always go through these helpers (not user.followers.add/remove) so the
+denormalized followers_count/following_count columns stay in step with
+the Follow rows. Counter updates are single UPDATE ... SET n = n + 1
+statements inside the same transaction as the edge write.
+"""
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+
+from .models import Follow, User
+
+
+class SelfFollowError(ValueError):
+    pass
+
+
+def follow(follower, user):
+    """
+    Make `follower` follow `user`. Returns False if it already did.
+    """
+    if follower.pk == user.pk:
+        raise SelfFollowError("Users cannot follow themselves.")
+
+    with transaction.atomic():
+        _, created = Follow.objects.get_or_create(user=user, follower=follower)
+        if created:
+            User.objects.filter(pk=user.pk).update(followers_count=F('followers_count') + 1)
+            User.objects.filter(pk=follower.pk).update(following_count=F('following_count') + 1)
+    return created
+
+
+def unfollow(follower, user):
+    """
+    Make `follower` stop following `user`. Returns False if it did not.
+    """
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(user=user, follower=follower).delete()
+        if deleted:
+            User.objects.filter(pk=user.pk, followers_count__gt=0) \
+                .update(followers_count=F('followers_count') - 1)
+            User.objects.filter(pk=follower.pk, following_count__gt=0) \
+                .update(following_count=F('following_count') - 1)
+    return bool(deleted)
+
+
+def is_following(follower, user):
+    return Follow.objects.filter(user=user, follower=follower).exists()
+
+
+def followers_of(user):
+    """
+    Follow edges pointing at `user` (edge.follower is the follower).
+    """
+    return Follow.objects.filter(user=user).select_related('follower')
+
+
+def following_of(user):
+    """
+    Follow edges leaving `user` (edge.user is the followed account).
+    """
+    return Follow.objects.filter(follower=user).select_related('user')
+
+
+def mutuals_of(user):
+    """
+    Edges from followers of `user` whom `user` follows back.
+
+    The query is driven from the smaller side, going by the denormalized
+    counters. When the user follows fewer accounts than follow them, the
+    accounts they follow are probed against the (user, follower) unique
+    index, so the cost is O(following_count) whatever the follower count.
+    Otherwise each follower edge is checked for a reverse edge in the
+    (follower, user) index, which is O(followers_count).
+    """
+    if user.following_count < user.followers_count:
+        followed = Follow.objects.filter(follower=user).values('user_id')
+        return followers_of(user).filter(follower_id__in=followed)
+    follows_back = Follow.objects.filter(user=OuterRef('follower_id'), follower=user)
+    return followers_of(user).filter(Exists(follows_back))
+
+
+def detach_user(user):
+    """
+    Decrement the counters of everyone connected to `user` before the
+    user (and, by cascade, their Follow rows) is deleted.
+    """
+    User.objects.filter(
+        pk__in=Follow.objects.filter(user=user).values('follower'), following_count__gt=0
+    ).update(following_count=F('following_count') - 1)
+    User.objects.filter(
+        pk__in=Follow.objects.filter(follower=user).values('user'), followers_count__gt=0
+    ).update(followers_count=F('followers_count') - 1)
@@ -0,0 +1,279 @@
+"""
+Password hashing off the request thread.
+
+A password check costs hundreds of milliseconds of CPU. Hashes run on a
+bounded thread pool (hashlib and the scrypt/PBKDF2 primitives release the
+GIL), so a login storm can only ever use LOGIN_HASHING['WORKERS'] cores.
+Requests that cannot get a slot within QUEUE_TIMEOUT seconds fail fast
+with HashPoolBusy instead of piling up behind the pool.
+
+Only the hash itself is offloaded: user lookups and the password upgrade
+write stay on the calling thread so they use its database connection.
+
+Settings (all optional):
+
+    LOGIN_HASHING = {
+        'WORKERS': 4,           # concurrent hashes
+        'MAX_PENDING': 16,      # hashes running or queued
+        'QUEUE_TIMEOUT': 2.0,   # seconds to wait for a slot
+    }
+
+Hashes are upgraded to the first entry of PASSWORD_HASHERS on the next
+successful login (see PooledModelBackend).
+"""
+
+import asyncio
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, hashers
+from django.contrib.auth.backends import ModelBackend
+
+DEFAULTS = {
+    'WORKERS': 4,
+    'MAX_PENDING': 16,
+    'QUEUE_TIMEOUT': 2.0,
+}
+
+# Latency samples kept per algorithm for percentiles.
+SAMPLE_SIZE = 500
+
+# How often an async caller re-checks for a free slot.
+SLOT_POLL_INTERVAL = 0.005
+
+
+def get_setting(name):
+    return getattr(settings, 'LOGIN_HASHING', {}).get(name, DEFAULTS[name])
+
+
+class HashPoolBusy(Exception):
+    """
+    Raised when no hashing slot became free within QUEUE_TIMEOUT.
+    """
+
+
+# ----------------------------
+# Metrics
+# ----------------------------
+class HashMetrics:
+    """
+    Per-algorithm hash latency: count, mean, max and p50/p95 over the
+    last SAMPLE_SIZE hashes, plus how often the pool was full.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._samples = defaultdict(lambda: deque(maxlen=SAMPLE_SIZE))
+            self._totals = defaultdict(lambda: [0, 0.0, 0.0])  # count, total, max
+            self.rejected = 0
+            self.upgraded = 0
+
+    def record(self, algorithm, seconds):
+        with self._lock:
+            self._samples[algorithm].append(seconds)
+            totals = self._totals[algorithm]
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def record_upgraded(self):
+        with self._lock:
+            self.upgraded += 1
+
+    def stats(self):
+        with self._lock:
+            algorithms = {}
+            for algorithm, (count, total, slowest) in self._totals.items():
+                samples = sorted(self._samples[algorithm])
+                algorithms[algorithm] = {
+                    'count': count,
+                    'mean_ms': round(total / count * 1000, 2),
+                    'max_ms': round(slowest * 1000, 2),
+                    'p50_ms': round(samples[len(samples) // 2] * 1000, 2),
+                    'p95_ms': round(samples[int(len(samples) * 0.95)] * 1000, 2),
+                }
+            return {
+                'algorithms': algorithms,
+                'rejected': self.rejected,
+                'upgraded': self.upgraded,
+            }
+
+
+metrics = HashMetrics()
+
+
+# ----------------------------
+# Pool
+# ----------------------------
+class HashPool:
+    """
+    ThreadPoolExecutor guarded by a semaphore, so at most MAX_PENDING
+    hashes are running or queued at any time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=get_setting('WORKERS'), thread_name_prefix='password-hash'
+                )
+                self._slots = threading.BoundedSemaphore(get_setting('MAX_PENDING'))
+
+    def run(self, algorithm, func, *args):
+        """
+        Run func(*args) on the pool, record its latency under `algorithm`
+        and return its result. Raises HashPoolBusy if no slot is free.
+        """
+        self._ensure_started()
+        if not self._slots.acquire(timeout=get_setting('QUEUE_TIMEOUT')):
+            metrics.record_rejected()
+            raise HashPoolBusy()
+        try:
+            return self._executor.submit(self._timed, algorithm, func, *args).result()
+        finally:
+            self._slots.release()
+
+    async def arun(self, algorithm, func, *args):
+        """
+        Async variant of run() that never blocks the event loop.
+        """
+        self._ensure_started()
+        deadline = time.monotonic() + get_setting('QUEUE_TIMEOUT')
+        # A threading semaphore cannot be awaited, so poll for a slot.
+        while not self._slots.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                metrics.record_rejected()
+                raise HashPoolBusy()
+            await asyncio.sleep(SLOT_POLL_INTERVAL)
+        try:
+            future = self._executor.submit(self._timed, algorithm, func, *args)
+            return await asyncio.wrap_future(future)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _timed(algorithm, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            metrics.record(algorithm, time.perf_counter() - started)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            self._executor = None
+            self._slots = None
+
+
+pool = HashPool()
+
+
+def _algorithm(encoded):
+    try:
+        return hashers.identify_hasher(encoded).algorithm
+    except ValueError:
+        return 'unknown'
+
+
+def verify_password(password, encoded):
+    return pool.run(_algorithm(encoded), hashers.check_password, password, encoded)
+
+
+def make_password(password):
+    algorithm = hashers.get_hasher().algorithm
+    return pool.run(algorithm, hashers.make_password, password)
+
+
+async def averify_password(password, encoded):
+    return await pool.arun(_algorithm(encoded), hashers.check_password, password, encoded)
+
+
+async def amake_password(password):
+    algorithm = hashers.get_hasher().algorithm
+    return await pool.arun(algorithm, hashers.make_password, password)
+
+
+def needs_upgrade(encoded):
+    """
+    True if `encoded` was not made by the preferred hasher with its
+    current parameters.
+    """
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+    preferred = hashers.get_hasher()
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+# ----------------------------
+# Authentication backend
+# ----------------------------
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend that verifies the password on the hash pool and upgrades
+    the stored hash to the preferred hasher after a successful login.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown usernames take as long as wrong passwords.
+            make_password(password)
+            return None
+
+        if not verify_password(password, user.password):
+            return None
+        if needs_upgrade(user.password):
+            user.password = make_password(password)
+            user.save(update_fields=['password'])
+            metrics.record_upgraded()
+        if not self.user_can_authenticate(user):
+            return None
+        return user
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await UserModel._default_manager.aget_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            await amake_password(password)
+            return None
+
+        if not await averify_password(password, user.password):
+            return None
+        if needs_upgrade(user.password):
+            user.password = await amake_password(password)
+            await user.asave(update_fields=['password'])
+            metrics.record_upgraded()
+        if not self.user_can_authenticate(user):
+            return None
+        return user
@@ -0,0 +1,152 @@
+"""
+Profile picture processing.
+
+Uploads are decoded with Pillow, checked, rotated upright, downscaled to
+PROFILE_PICTURE_MAX_SIDE and re-encoded as JPEG, which also strips any
+metadata. The result is stored under the sha256 of its bytes, so a file
+never changes once written and can be served with a far-future expiry.
+
+Square thumbnails in PROFILE_PICTURE_SIZES are generated on the
+background task queue (see accounts/signals.py). Their names derive from
+the original's, and User.profile_thumbnails records the ones that exist;
+until then thumbnail_urls() falls back to the original.
+"""
+
+import hashlib
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+UPLOAD_TO = 'profile_pics'
+ACCEPTED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+JPEG_QUALITY = 85
+
+
+def get_sizes():
+    return list(getattr(settings, 'PROFILE_PICTURE_SIZES', [48, 128, 512]))
+
+
+def _rgb(image):
+    # Flatten transparency onto white; JPEG has no alpha channel.
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _encode(image):
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _save(name, data):
+    # Content-addressed: an existing file already holds these bytes.
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(data))
+    return name
+
+
+# ----------------------------
+# Uploads
+# ----------------------------
+def process_upload(upload):
+    """
+    Validate and re-encode an uploaded image; return its storage name.
+    Raises serializers.ValidationError for anything that is not a usable
+    image.
+    """
+    limit = getattr(settings, 'PROFILE_PICTURE_MAX_UPLOAD', 10 * 1024 * 1024)
+    if upload.size > limit:
+        raise serializers.ValidationError(f'Images may be at most {limit // (1024 * 1024)} MB.')
+
+    upload.seek(0)
+    try:
+        image = Image.open(upload)
+        if image.format not in ACCEPTED_FORMATS:
+            raise serializers.ValidationError(f'Unsupported image format {image.format}.')
+        image.load()
+    except (OSError, ValueError, Image.DecompressionBombError):
+        raise serializers.ValidationError('Upload a valid image.')
+
+    image = _rgb(ImageOps.exif_transpose(image))
+    max_side = getattr(settings, 'PROFILE_PICTURE_MAX_SIDE', 2048)
+    image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    data = _encode(image)
+
+    digest = hashlib.sha256(data).hexdigest()
+    return _save(f'{UPLOAD_TO}/{digest[:2]}/{digest}.jpg', data)
+
+
+# ----------------------------
+# Thumbnails
+# ----------------------------
+def thumbnail_name(name, size):
+    root, _ = os.path.splitext(name)
+    return f'{root}_{size}.jpg'
+
+
+def missing_thumbnails(user):
+    """
+    Sizes without a generated thumbnail for the user's current picture.
+    """
+    if not user.profile_picture:
+        return []
+    name = user.profile_picture.name
+    done = user.profile_thumbnails or {}
+    return [size for size in get_sizes() if done.get(str(size)) != thumbnail_name(name, size)]
+
+
+def generate_thumbnails(user_id):
+    """
+    Background task: write the missing thumbnails of one user's picture.
+    """
+    from .models import User
+
+    user = User.objects.filter(pk=user_id).only('profile_picture', 'profile_thumbnails').first()
+    if user is None or not missing_thumbnails(user):
+        return
+    name = user.profile_picture.name
+
+    source = None
+    done = {}
+    for size in get_sizes():
+        thumbnail = thumbnail_name(name, size)
+        if not default_storage.exists(thumbnail):
+            if source is None:
+                with default_storage.open(name) as handle:
+                    source = _rgb(ImageOps.exif_transpose(Image.open(handle)))
+            image = ImageOps.fit(source, (size, size), Image.Resampling.LANCZOS)
+            _save(thumbnail, _encode(image))
+        done[str(size)] = thumbnail
+
+    # update() skips post_save, and the filter drops the result if the
+    # picture was replaced while we worked.
+    User.objects.filter(pk=user_id, profile_picture=name).update(profile_thumbnails=done)
+
+
+def thumbnail_url(user, size):
+    """
+    URL of the `size` thumbnail, the original while it is being generated,
+    or None if the user has no picture.
+    """
+    if not user.profile_picture:
+        return None
+    name = user.profile_picture.name
+    thumbnail = thumbnail_name(name, size)
+    if (user.profile_thumbnails or {}).get(str(size)) == thumbnail:
+        return default_storage.url(thumbnail)
+    return default_storage.url(name)
+
+
+def thumbnail_urls(user):
+    if not user.profile_picture:
+        return None
+    return {str(size): thumbnail_url(user, size) for size in get_sizes()}
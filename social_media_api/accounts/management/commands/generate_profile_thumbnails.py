@@ -0,0 +1,29 @@
+"""
+Generate missing profile picture thumbnails.
+
+    python manage.py generate_profile_thumbnails
+
+Needed after PROFILE_PICTURE_SIZES changes and for pictures uploaded
+before thumbnails existed; new uploads are handled by accounts/signals.py.
+"""
+
+from django.core.management.base import BaseCommand
+
+from accounts.images import generate_thumbnails, missing_thumbnails
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Generate missing profile picture thumbnails for every user.'
+
+    def handle(self, *args, **options):
+        users = (
+            User.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+            .only('profile_picture', 'profile_thumbnails')
+        )
+        generated = 0
+        for user in users.iterator(chunk_size=500):
+            if missing_thumbnails(user):
+                generate_thumbnails(user.pk)
+                generated += 1
+        self.stdout.write(self.style.SUCCESS(f'Generated thumbnails for {generated} users.'))
@@ -0,0 +1,180 @@
+"""
+Compare req/s and latency of the accounts endpoints across deployments.
+
+Start the same project under WSGI and ASGI, e.g.
+
+    gunicorn social_media_api.wsgi -w 4 -b 127.0.0.1:8000
+    uvicorn social_media_api.asgi:application --workers 4 --port 8001
+
+then point the harness at both:
+
+    python manage.py loadtest_accounts \
+        --target wsgi=http://127.0.0.1:8000/api/accounts/ \
+        --target asgi=http://127.0.0.1:8001/api/accounts/async/ \
+        --scenario profile --concurrency 50 --duration 30
+
+`profile` sends token-authenticated GET profile/ requests, `login` sends
+POST login/ requests. A temporary user and token are created in this
+project's database (so the servers must share it) and deleted when the
+run ends. The username comes from --username or LOADTEST_USERNAME and
+must not exist yet; the password from --password or LOADTEST_PASSWORD,
+or is generated. With DEBUG off the command refuses to run unless
+--force is given. Raise the login_ip and login_username throttle rates
+before running the login scenario, or the results measure 429s.
+"""
+
+import http.client
+import json
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from accounts.models import User
+
+DEFAULT_USERNAME = 'loadtest'
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Load-test the accounts endpoints of one or more running deployments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', action='append', required=True, metavar='NAME=URL',
+            help='Deployment name and accounts base URL; repeat to compare.',
+        )
+        parser.add_argument('--scenario', choices=['profile', 'login'], default='profile')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per target.')
+        parser.add_argument('--warmup', type=float, default=2.0)
+        parser.add_argument(
+            '--username', default=os.environ.get('LOADTEST_USERNAME', DEFAULT_USERNAME),
+            help='Temporary user to create (default: $LOADTEST_USERNAME or "loadtest").',
+        )
+        parser.add_argument(
+            '--password', default=os.environ.get('LOADTEST_PASSWORD'),
+            help='Its password (default: $LOADTEST_PASSWORD, else a random one).',
+        )
+        parser.add_argument(
+            '--force', action='store_true', help='Run even though DEBUG is off.',
+        )
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['target']:
+            name, sep, url = target.partition('=')
+            if not sep or urlsplit(url).scheme not in ('http', 'https'):
+                raise CommandError(f'Expected NAME=http://host:port/path/, got {target!r}.')
+            targets.append((name, url if url.endswith('/') else url + '/'))
+        if not settings.DEBUG and not options['force']:
+            raise CommandError(
+                'DEBUG is off; this creates a user in the configured database. '
+                'Pass --force to run anyway.'
+            )
+
+        username = options['username']
+        password = options['password'] or secrets.token_urlsafe(24)
+        user, token = self.create_user(username, password)
+        try:
+            self.run_targets(targets, options, (username, password, token))
+        finally:
+            user.delete()
+
+    def run_targets(self, targets, options, credentials):
+        self.stdout.write(
+            f'{"target":<12}{"requests":>10}{"errors":>8}{"req/s":>10}'
+            f'{"p50 (ms)":>11}{"p99 (ms)":>11}{"max (ms)":>11}'
+        )
+        for name, url in targets:
+            request = self.build_request(options['scenario'], url, credentials)
+            self.run(request, options['concurrency'], options['warmup'])
+            elapsed, latencies, errors = self.run(
+                request, options['concurrency'], options['duration']
+            )
+            latencies.sort()
+            self.stdout.write(
+                f'{name:<12}{len(latencies):>10}{errors:>8}{len(latencies) / elapsed:>10.1f}'
+                f'{percentile(latencies, 0.50) * 1000:>11.1f}'
+                f'{percentile(latencies, 0.99) * 1000:>11.1f}'
+                f'{(latencies[-1] if latencies else 0) * 1000:>11.1f}'
+            )
+
+    def create_user(self, username, password):
+        """
+        Create the temporary user and its token. An existing account is
+        never reused, since it would be deleted afterwards.
+        """
+        if User.objects.filter(username=username).exists():
+            raise CommandError(f'User {username!r} already exists; pick another --username.')
+        user = User.objects.create_user(username=username, password=password)
+        return user, Token.objects.create(user=user).key
+
+    def build_request(self, scenario, base_url, credentials):
+        """
+        Return (url, method, body, headers) for one request of the scenario.
+        """
+        username, password, token = credentials
+        if scenario == 'profile':
+            return urljoin(base_url, 'profile/'), 'GET', None, {
+                'Authorization': f'Token {token}',
+            }
+        body = json.dumps({'username': username, 'password': password})
+        return urljoin(base_url, 'login/'), 'POST', body, {'Content-Type': 'application/json'}
+
+    # ----------------------------
+    # Load generation
+    # ----------------------------
+    def run(self, request, concurrency, duration):
+        """
+        Send `request` from `concurrency` keep-alive connections for
+        `duration` seconds. Returns (elapsed, latencies, errors).
+        """
+        deadline = time.perf_counter() + duration
+        latencies, errors = [], [0]
+        lock = threading.Lock()
+
+        def worker():
+            url, method, body, headers = request
+            parts = urlsplit(url)
+            connection_class = (
+                http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+            )
+            path = parts.path + (f'?{parts.query}' if parts.query else '')
+            connection = connection_class(parts.netloc, timeout=30)
+            mine, failed = [], 0
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    connection.request(method, path, body=body, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    ok = response.status < 400
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    ok = False
+                if ok:
+                    mine.append(time.perf_counter() - started)
+                else:
+                    failed += 1
+            connection.close()
+            with lock:
+                latencies.extend(mine)
+                errors[0] += failed
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for _ in range(concurrency):
+                executor.submit(worker)
+        return time.perf_counter() - started, latencies, errors[0]
@@ -0,0 +1,116 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_follow_edges(apps, schema_editor):
+    """
+    Move rows from the auto-created followers table into Follow.
+    In the old table `from_user` is the followed user and `to_user` the
+    follower (user.followers.add(follower)).
+    """
+    User = apps.get_model('accounts', 'User')
+    Follow = apps.get_model('accounts', 'Follow')
+    OldEdge = User.followers.through
+    db = schema_editor.connection.alias
+
+    batch = []
+    for from_user_id, to_user_id in OldEdge.objects.using(db).values_list(
+            'from_user_id', 'to_user_id').iterator(chunk_size=5000):
+        if from_user_id == to_user_id:
+            continue
+        batch.append(Follow(user_id=from_user_id, follower_id=to_user_id))
+        if len(batch) >= 5000:
+            Follow.objects.using(db).bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    Follow.objects.using(db).bulk_create(batch, ignore_conflicts=True)
+
+
+def copy_follow_edges_back(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    Follow = apps.get_model('accounts', 'Follow')
+    OldEdge = User.followers.through
+    db = schema_editor.connection.alias
+    OldEdge.objects.using(db).bulk_create(
+        [
+            OldEdge(from_user_id=user_id, to_user_id=follower_id)
+            for user_id, follower_id in Follow.objects.using(db).values_list('user_id', 'follower_id')
+        ],
+        batch_size=5000,
+    )
+
+
+def recount(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    Follow = apps.get_model('accounts', 'Follow')
+    db = schema_editor.connection.alias
+    followers = models.Subquery(
+        Follow.objects.using(db).filter(user=models.OuterRef('pk'))
+        .values('user').annotate(n=models.Count('pk')).values('n')
+    )
+    following = models.Subquery(
+        Follow.objects.using(db).filter(follower=models.OuterRef('pk'))
+        .values('follower').annotate(n=models.Count('pk')).values('n')
+    )
+    User.objects.using(db).update(
+        followers_count=models.functions.Coalesce(followers, 0),
+        following_count=models.functions.Coalesce(following, 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, upload_to='profile_pics/'),
+        ),
+        migrations.CreateModel(
+            name='Follow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('follower', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='following_edges', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='follower_edges', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['user', 'id'], name='follow_user_id_idx'),
+                    models.Index(fields=['follower', 'id'], name='follow_follower_id_idx'),
+                    models.Index(fields=['follower', 'user'], name='follow_follower_user_idx'),
+                ],
+                'constraints': [
+                    models.UniqueConstraint(fields=('user', 'follower'), name='unique_follow'),
+                    models.CheckConstraint(condition=models.Q(('user', models.F('follower')), _negated=True), name='no_self_follow'),
+                ],
+            },
+        ),
+        migrations.RunPython(copy_follow_edges, copy_follow_edges_back),
+        # A plain M2M cannot be altered to use a through model, so the
+        # field is removed and re-added (its rows now live in Follow).
+        migrations.RemoveField(
+            model_name='user',
+            name='followers',
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='followers',
+            field=models.ManyToManyField(blank=True, related_name='following', through='accounts.Follow', through_fields=('user', 'follower'), to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(recount, migrations.RunPython.noop),
+    ]
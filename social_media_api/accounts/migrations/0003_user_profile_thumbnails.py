@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_follow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
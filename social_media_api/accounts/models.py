@@ -8,12 +8,56 @@ class User(AbstractUser):
         blank=True,
         null=True
     )
+    # {"<size>": "<thumbnail name>"} for the current picture (see accounts/images.py)
+    profile_thumbnails = models.JSONField(default=dict, blank=True, editable=False)
     followers = models.ManyToManyField(
         'self',
         symmetrical=False,
         related_name='following',
-        blank=True
+        blank=True,
+        through='Follow',
+        through_fields=('user', 'follower'),
     )
 
+    # Denormalized counts, kept in step with Follow rows by accounts.graph
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return self.username
+
+
+class Follow(models.Model):
+    """
+    One edge of the follower graph: `follower` follows `user`.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower_edges',
+        db_index=False  # covered by the composite indexes below
+    )
+    follower = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following_edges',
+        db_index=False
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'follower'], name='unique_follow'),
+            models.CheckConstraint(condition=~models.Q(user=models.F('follower')), name='no_self_follow'),
+        ]
+        indexes = [
+            # Followers of a user, newest first (cursor pagination on id)
+            models.Index(fields=['user', 'id'], name='follow_user_id_idx'),
+            # Who a user follows, newest first
+            models.Index(fields=['follower', 'id'], name='follow_follower_id_idx'),
+            # Reverse-edge lookups for mutual-follow checks
+            models.Index(fields=['follower', 'user'], name='follow_follower_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.follower} follows {self.user}"
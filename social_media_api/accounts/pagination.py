@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class FollowCursorPagination(CursorPagination):
+    """
+    Newest edges first. Ordering on the Follow id keeps every page a
+    range scan of the (user, id) / (follower, id) indexes.
+    """
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
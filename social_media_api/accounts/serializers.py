@@ -1,6 +1,8 @@
 from django.contrib.auth import authenticate
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
+from . import images
 from .models import User
 from django.contrib.auth import get_user_model
 
@@ -14,6 +16,9 @@ class RegisterSerializer(serializers.ModelSerializer):
         model = User
         fields = ['username', 'email', 'password', 'bio', 'profile_picture']
 
+    def validate_profile_picture(self, value):
+        return images.process_upload(value) if value else value
+
     def create(self, validated_data):
         user = get_user_model().objects.create_user(
             username=validated_data['username'],
@@ -49,7 +54,83 @@ class LoginSerializer(serializers.Serializer):
         }
 
 
+class AvatarField(serializers.Field):
+    """
+    Read-only URL of a user's `size` px thumbnail; the source is the user.
+    """
+
+    def __init__(self, size=48, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        self.size = size
+
+    def to_representation(self, user):
+        url = images.thumbnail_url(user, self.size)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if url and request else url
+
+
 class ProfileSerializer(serializers.ModelSerializer):
+    profile_picture_urls = serializers.SerializerMethodField()
+
     class Meta:
         model = User
-        fields = ('username', 'email', 'bio', 'profile_picture')
+        fields = ('username', 'email', 'bio', 'profile_picture', 'profile_picture_urls',
+                  'followers_count', 'following_count')
+        read_only_fields = ('followers_count', 'following_count')
+
+    def validate_profile_picture(self, value):
+        return images.process_upload(value) if value else value
+
+    def get_profile_picture_urls(self, obj):
+        urls = images.thumbnail_urls(obj)
+        request = self.context.get('request')
+        if urls and request:
+            urls = {size: request.build_absolute_uri(url) for size, url in urls.items()}
+        return urls
+
+
+# ----------------------------
+# Async views
+# ----------------------------
+# ModelSerializer's unique validators run sync queries, which the async
+# views cannot call; these check field formats only and the views check
+# uniqueness with the async ORM.
+class AsyncRegisterSerializer(serializers.Serializer):
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    email = serializers.EmailField(required=False, allow_blank=True)
+    password = serializers.CharField(write_only=True)
+    bio = serializers.CharField(required=False, allow_blank=True)
+
+
+class AsyncLoginSerializer(serializers.Serializer):
+    username = serializers.CharField()
+    password = serializers.CharField(write_only=True)
+
+
+class AsyncProfileUpdateSerializer(serializers.Serializer):
+    username = serializers.CharField(
+        max_length=150, required=False, validators=[UnicodeUsernameValidator()]
+    )
+    email = serializers.EmailField(required=False, allow_blank=True)
+    bio = serializers.CharField(required=False, allow_blank=True)
+
+
+class FollowerSerializer(serializers.Serializer):
+    """
+    A Follow edge rendered as the user who follows.
+    """
+    id = serializers.IntegerField(source='follower.id')
+    username = serializers.CharField(source='follower.username')
+    avatar = AvatarField(source='follower')
+    followed_at = serializers.DateTimeField(source='created_at')
+
+
+class FollowingSerializer(serializers.Serializer):
+    """
+    A Follow edge rendered as the user being followed.
+    """
+    id = serializers.IntegerField(source='user.id')
+    username = serializers.CharField(source='user.username')
+    avatar = AvatarField(source='user')
+    followed_at = serializers.DateTimeField(source='created_at')
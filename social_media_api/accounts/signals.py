@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from social_media_api.tasks import enqueue
+
+from .authentication import invalidate_token, invalidate_tokens
+from .graph import detach_user
+from .images import generate_thumbnails, missing_thumbnails
+from .models import User
+
+
+@receiver(pre_delete, sender=User)
+def update_counts_on_user_delete(sender, instance, **kwargs):
+    detach_user(instance)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    # Deactivation, password changes, etc. must not be served from cache.
+    if not created:
+        invalidate_tokens(Token.objects.filter(user=instance).values_list('key', flat=True))
+
+
+@receiver(post_save, sender=User)
+def schedule_thumbnails(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'profile_picture' not in update_fields:
+        return
+    if 'profile_picture' in instance.get_deferred_fields():
+        return
+    if missing_thumbnails(instance):
+        enqueue(generate_thumbnails, instance.pk)
@@ -1,3 +1,362 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache, caches
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from rest_framework import exceptions, status
+from rest_framework.authtoken.models import Token
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from . import graph, hashing, images
+from .throttling import SlidingWindowCounter
+from .authentication import CachedTokenAuthentication, cache_key, local_cache
+from .models import Follow, User
+
+
+class FollowGraphTestCase(APITestCase):
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='password123')
+        self.bob = User.objects.create_user(username='bob', password='password123')
+        self.carol = User.objects.create_user(username='carol', password='password123')
+
+    def counts(self, user):
+        user.refresh_from_db()
+        return user.followers_count, user.following_count
+
+    def test_follow_and_unfollow_update_counts(self):
+        self.client.force_authenticate(self.alice)
+
+        response = self.client.post(f'/api/accounts/follow/{self.bob.id}/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Following twice is a no-op
+        response = self.client.post(f'/api/accounts/follow/{self.bob.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.counts(self.bob), (1, 0))
+        self.assertEqual(self.counts(self.alice), (0, 1))
+        self.assertEqual(list(self.bob.followers.all()), [self.alice])
+
+        self.client.post(f'/api/accounts/unfollow/{self.bob.id}/')
+        self.client.post(f'/api/accounts/unfollow/{self.bob.id}/')
+        self.assertEqual(self.counts(self.bob), (0, 0))
+        self.assertEqual(self.counts(self.alice), (0, 0))
+
+    def test_cannot_follow_self(self):
+        self.client.force_authenticate(self.alice)
+        response = self.client.post(f'/api/accounts/follow/{self.alice.id}/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_follower_listing_is_paginated(self):
+        for i in range(5):
+            follower = User.objects.create_user(username=f'fan{i}', password='password123')
+            graph.follow(follower, self.alice)
+        self.client.force_authenticate(self.bob)
+
+        response = self.client.get(f'/api/accounts/users/{self.alice.id}/followers/?page_size=2')
+        self.assertEqual([u['username'] for u in response.data['results']], ['fan4', 'fan3'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([u['username'] for u in response.data['results']], ['fan2', 'fan1'])
+
+    def test_following_and_mutuals(self):
+        graph.follow(self.bob, self.alice)
+        graph.follow(self.carol, self.alice)
+        graph.follow(self.alice, self.bob)
+        self.client.force_authenticate(self.alice)
+
+        response = self.client.get(f'/api/accounts/users/{self.alice.id}/following/')
+        self.assertEqual([u['username'] for u in response.data['results']], ['bob'])
+        response = self.client.get(f'/api/accounts/users/{self.alice.id}/mutuals/')
+        self.assertEqual([u['username'] for u in response.data['results']], ['bob'])
+
+    def test_mutuals_from_either_side(self):
+        fans = [User.objects.create_user(username=f'fan{i}') for i in range(4)]
+        for fan in fans:
+            graph.follow(fan, self.alice)
+        graph.follow(self.alice, fans[1])
+        graph.follow(self.alice, fans[3])
+        graph.follow(self.alice, self.bob)
+        expected = [fans[3].pk, fans[1].pk]
+
+        # Follows 3, followed by 4: driven from the accounts alice follows.
+        self.alice.refresh_from_db()
+        mutuals = graph.mutuals_of(self.alice).order_by('-id')
+        self.assertEqual([edge.follower_id for edge in mutuals], expected)
+        if connection.vendor == 'sqlite':
+            self.assertIn('(user_id=? AND follower_id=?)', mutuals.explain())
+
+        for user in (self.carol, self.bob):
+            graph.follow(self.alice, user)
+        self.alice.refresh_from_db()
+        mutuals = graph.mutuals_of(self.alice).order_by('-id')
+        self.assertEqual([edge.follower_id for edge in mutuals], expected)
+
+    def test_deleting_user_updates_counts(self):
+        graph.follow(self.bob, self.alice)
+        graph.follow(self.alice, self.carol)
+        self.alice.delete()
+        self.assertEqual(self.counts(self.bob), (0, 0))
+        self.assertEqual(self.counts(self.carol), (0, 0))
+
+
+class CachedTokenAuthenticationTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(username='alice', password='password123')
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_second_lookup_needs_no_query(self):
+        self.auth.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user, self.user)
+
+    def test_shared_cache_used_after_local_expiry(self):
+        self.auth.authenticate_credentials(self.token.key)
+        local_cache.clear()
+        # Only the user, by primary key; the token is not queried.
+        with self.assertNumQueries(1):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual((user, token.key), (self.user, self.token.key))
+        with self.assertNumQueries(0):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_shared_cache_holds_no_user_data(self):
+        self.auth.authenticate_credentials(self.token.key)
+        entry = cache.get(cache_key(self.token.key))
+        self.assertEqual(entry[:2], (self.user.pk, True))
+        self.assertNotIn(self.user.password, repr(entry))
+
+    def test_deleted_token_is_rejected(self):
+        key = self.token.key
+        self.auth.authenticate_credentials(key)
+        self.token.delete()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(key)
+
+    def test_deactivated_user_is_rejected(self):
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_profile_with_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.get('/api/accounts/profile/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['username'], 'alice')
+
+
+class LoginTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        hashing.metrics.reset()
+        self.user = User.objects.create_user(username='alice', password='password123')
+
+    def login(self, password='password123', username='alice'):
+        return self.client.post(
+            '/api/accounts/login/', {'username': username, 'password': password}
+        )
+
+    def test_login_returns_token(self):
+        response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['token'], Token.objects.get(user=self.user).key)
+        self.assertEqual(self.login('wrong').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('scrypt', hashing.metrics.stats()['algorithms'])
+
+    def test_legacy_hash_is_upgraded(self):
+        self.user.password = make_password('password123', hasher='pbkdf2_sha256')
+        self.user.save()
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$'))
+        self.assertEqual(hashing.metrics.stats()['upgraded'], 1)
+
+    @override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '100/min', 'login_username': '2/min',
+    }})
+    def test_username_is_rate_limited(self):
+        self.assertEqual(self.login('wrong').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.login('wrong').status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        # Other accounts are not affected.
+        self.assertEqual(self.login(username='bob').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_busy_pool_fails_fast(self):
+        with mock.patch.object(hashing.pool, 'run', side_effect=hashing.HashPoolBusy):
+            response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_sliding_window_weights_previous_window(self):
+        counter = SlidingWindowCounter(caches['default'], 'test')
+        for _ in range(10):
+            counter.hit('client', 60, 119)
+        counter.hit('client', 60, 121)
+        # A quarter of the way into the next window: 10 * 0.75 + 1.
+        self.assertAlmostEqual(counter.count('client', 60, 135), 8.5)
+
+
+class AsyncAccountsTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+    async def test_register_login_profile(self):
+        response = await self.async_client.post(
+            '/api/accounts/async/register/',
+            {'username': 'carol', 'password': 'password123', 'bio': 'hi'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = await self.async_client.post(
+            '/api/accounts/async/login/',
+            {'username': 'carol', 'password': 'password123'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = response.json()['token']
+
+        headers = {'Authorization': f'Token {token}'}
+        response = await self.async_client.get('/api/accounts/async/profile/', headers=headers)
+        self.assertEqual(response.json()['bio'], 'hi')
+        self.assertEqual(response.json()['followers_count'], 0)
+
+        response = await self.async_client.patch(
+            '/api/accounts/async/profile/', {'bio': 'updated'},
+            content_type='application/json', headers=headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user = await User.objects.aget(username='carol')
+        self.assertEqual(user.bio, 'updated')
+
+    async def test_errors(self):
+        await User.objects.acreate(username='carol')
+        response = await self.async_client.post(
+            '/api/accounts/async/register/',
+            {'username': 'carol', 'password': 'password123'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('username', response.json())
+
+        response = await self.async_client.post(
+            '/api/accounts/async/login/',
+            {'username': 'carol', 'password': 'wrong'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = await self.async_client.get('/api/accounts/async/profile/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+def make_upload(size=(800, 600), mode='RGBA', fmt='PNG', name='me.png'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else 'red').save(buffer, fmt)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{fmt.lower()}')
+
+
+@override_settings(BACKGROUND_TASKS_ASYNC=False, PROFILE_PICTURE_SIZES=[48, 128])
+class ProfilePictureTestCase(APITestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+        self.user = User.objects.create_user(username='alice', password='password123')
+        self.client.force_authenticate(self.user)
+
+    def upload(self, file):
+        return self.client.patch(
+            '/api/accounts/profile/', {'profile_picture': file}, format='multipart'
+        )
+
+    def test_upload_is_reencoded_and_thumbnailed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload(make_upload())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.refresh_from_db()
+        name = self.user.profile_picture.name
+        self.assertRegex(name, r'^profile_pics/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        with default_storage.open(name) as handle:
+            self.assertEqual(Image.open(handle).format, 'JPEG')
+
+        urls = self.client.get('/api/accounts/profile/').data['profile_picture_urls']
+        self.assertTrue(urls['48'].endswith(images.thumbnail_name(name, 48)))
+        with default_storage.open(images.thumbnail_name(name, 128)) as handle:
+            self.assertEqual(Image.open(handle).size, (128, 128))
+
+    def test_original_served_until_thumbnails_exist(self):
+        self.upload(make_upload())
+        self.user.refresh_from_db()
+        urls = self.client.get('/api/accounts/profile/').data['profile_picture_urls']
+        self.assertTrue(urls['48'].endswith(self.user.profile_picture.name))
+
+    def test_identical_uploads_share_a_file(self):
+        self.upload(make_upload())
+        first = User.objects.get(pk=self.user.pk).profile_picture.name
+        self.upload(make_upload())
+        self.assertEqual(User.objects.get(pk=self.user.pk).profile_picture.name, first)
+
+    def test_invalid_image_is_rejected(self):
+        upload = SimpleUploadedFile('me.png', b'not an image', content_type='image/png')
+        response = self.upload(upload)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(PROFILE_PICTURE_MAX_SIDE=100)
+    def test_large_images_are_downscaled(self):
+        self.upload(make_upload(size=(400, 200), mode='RGB', fmt='JPEG', name='me.jpg'))
+        name = User.objects.get(pk=self.user.pk).profile_picture.name
+        with default_storage.open(name) as handle:
+            self.assertEqual(Image.open(handle).size, (100, 50))
+
+
+class LoadtestCommandTestCase(APITestCase):
+    # Port 9 (discard) refuses connections, so every request fails fast.
+    target = 'local=http://127.0.0.1:9/api/accounts/'
+
+    def call(self, *args, **options):
+        call_command('loadtest_accounts', '--target', self.target, *args, duration=0.01,
+                     warmup=0, concurrency=1, stdout=io.StringIO(), **options)
+
+    @override_settings(DEBUG=False)
+    def test_refuses_without_debug(self):
+        with self.assertRaisesMessage(CommandError, '--force'):
+            self.call()
+        self.assertFalse(User.objects.exists())
+
+    @override_settings(DEBUG=False)
+    def test_temporary_user_is_removed(self):
+        self.call('--force', username='bench')
+        self.assertFalse(User.objects.filter(username='bench').exists())
+        self.assertFalse(Token.objects.exists())
+
+    @override_settings(DEBUG=True)
+    def test_existing_user_is_never_reused(self):
+        User.objects.create_user(username='loadtest', password='password123')
+        with self.assertRaisesMessage(CommandError, 'already exists'):
+            self.call()
+        self.assertTrue(User.objects.get(username='loadtest').check_password('password123'))
@@ -0,0 +1,144 @@
+"""
+Sliding-window rate limits for the login endpoint.
+
+DRF's SimpleRateThrottle keeps a list of request timestamps per client
+and rewrites it on every request. Here each client has one integer
+counter per fixed window in the cache, and the current rate is estimated
+from the current and previous windows:
+
+    count = previous * (1 - elapsed / duration) + current
+
+which is two cache reads and one atomic incr per request, whatever the
+rate. Rates come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] by scope.
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+
+class SlidingWindowCounter:
+    """
+    Fixed-window hit counters in a Django cache, read as a sliding window.
+    """
+
+    def __init__(self, cache, prefix):
+        self.cache = cache
+        self.prefix = prefix
+
+    def _key(self, ident, window):
+        return f'{self.prefix}:{ident}:{window}'
+
+    def count(self, ident, duration, now):
+        """
+        Return the weighted number of hits in the last `duration` seconds.
+        """
+        window, elapsed = divmod(now, duration)
+        window = int(window)
+        values = self.cache.get_many([self._key(ident, window - 1), self._key(ident, window)])
+        previous = values.get(self._key(ident, window - 1), 0)
+        current = values.get(self._key(ident, window), 0)
+        return previous * (1 - elapsed / duration) + current
+
+    def hit(self, ident, duration, now):
+        key = self._key(ident, int(now // duration))
+        # Keep each window around long enough to act as `previous`.
+        if not self.cache.add(key, 1, timeout=int(duration * 2) + 1):
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                # Expired between add() and incr().
+                self.cache.set(key, 1, timeout=int(duration * 2) + 1)
+
+    async def acount(self, ident, duration, now):
+        window, elapsed = divmod(now, duration)
+        window = int(window)
+        keys = [self._key(ident, window - 1), self._key(ident, window)]
+        values = await self.cache.aget_many(keys)
+        return values.get(keys[0], 0) * (1 - elapsed / duration) + values.get(keys[1], 0)
+
+    async def ahit(self, ident, duration, now):
+        key = self._key(ident, int(now // duration))
+        if not await self.cache.aadd(key, 1, timeout=int(duration * 2) + 1):
+            try:
+                await self.cache.aincr(key)
+            except ValueError:
+                await self.cache.aset(key, 1, timeout=int(duration * 2) + 1)
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Base class: subclasses set `scope` and implement get_ident_key().
+    """
+
+    scope = None
+    cache = cache
+    timer = time.time
+    parse_rate = SimpleRateThrottle.parse_rate
+
+    def __init__(self):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        self.num_requests, self.duration = self.parse_rate(rate)
+        self.counter = SlidingWindowCounter(self.cache, f'throttle:{self.scope}')
+        self.ident = None
+
+    def get_ident_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        if self.num_requests is None:
+            return True
+        self.ident = self.get_ident_key(request, view)
+        if self.ident is None:
+            return True
+
+        self.now = self.timer()
+        self.current = self.counter.count(self.ident, self.duration, self.now)
+        if self.current >= self.num_requests:
+            return False
+        self.counter.hit(self.ident, self.duration, self.now)
+        return True
+
+    async def aallow_request(self, request, view):
+        if self.num_requests is None:
+            return True
+        self.ident = self.get_ident_key(request, view)
+        if self.ident is None:
+            return True
+
+        self.now = self.timer()
+        self.current = await self.counter.acount(self.ident, self.duration, self.now)
+        if self.current >= self.num_requests:
+            return False
+        await self.counter.ahit(self.ident, self.duration, self.now)
+        return True
+
+    def wait(self):
+        # Time until enough of the previous window has slid out.
+        elapsed = self.now % self.duration
+        excess = self.current - self.num_requests + 1
+        return max(min(self.duration - elapsed, excess / self.num_requests * self.duration), 1)
+
+
+class LoginIPThrottle(SlidingWindowThrottle):
+    scope = 'login_ip'
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+
+class LoginUsernameThrottle(SlidingWindowThrottle):
+    """
+    Limits attempts against one account, whichever address they come from.
+    """
+
+    scope = 'login_username'
+
+    def get_ident_key(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not isinstance(username, str) or not username:
+            return None
+        return hashlib.sha256(username.lower().encode('utf-8')).hexdigest()
@@ -1,8 +1,31 @@
 from django.urls import path
-from .views import RegisterView, LoginView, ProfileView
+from .async_views import AsyncLoginView, AsyncProfileView, AsyncRegisterView
+from .views import (
+    RegisterView,
+    LoginView,
+    LoginStatsView,
+    ProfileView,
+    FollowUserView,
+    UnfollowUserView,
+    FollowersListView,
+    FollowingListView,
+    MutualFollowersView,
+)
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
+    path('login/stats/', LoginStatsView.as_view(), name='login-stats'),
     path('profile/', ProfileView.as_view(), name='profile'),
+
+    # Async-native equivalents for ASGI deployments (see accounts/async_views.py)
+    path('async/register/', AsyncRegisterView.as_view(), name='async-register'),
+    path('async/login/', AsyncLoginView.as_view(), name='async-login'),
+    path('async/profile/', AsyncProfileView.as_view(), name='async-profile'),
+
+    path('follow/<int:user_id>/', FollowUserView.as_view(), name='follow-user'),
+    path('unfollow/<int:user_id>/', UnfollowUserView.as_view(), name='unfollow-user'),
+    path('users/<int:user_id>/followers/', FollowersListView.as_view(), name='user-followers'),
+    path('users/<int:user_id>/following/', FollowingListView.as_view(), name='user-following'),
+    path('users/<int:user_id>/mutuals/', MutualFollowersView.as_view(), name='user-mutuals'),
 ]
@@ -1,8 +1,19 @@
-from rest_framework import generics, permissions
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, serializers, status
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
+from . import graph, hashing
 from .models import User
-from .serializers import RegisterSerializer, LoginSerializer, ProfileSerializer
+from .pagination import FollowCursorPagination
+from .throttling import LoginIPThrottle, LoginUsernameThrottle
+from .serializers import (
+    RegisterSerializer,
+    LoginSerializer,
+    ProfileSerializer,
+    FollowerSerializer,
+    FollowingSerializer,
+)
 
 
 class RegisterView(generics.CreateAPIView):
@@ -10,18 +21,99 @@ class RegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
 
 
+class LoginUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins in progress, try again shortly.'
+    default_code = 'login_unavailable'
+
+
 class LoginView(generics.GenericAPIView):
     serializer_class = LoginSerializer
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
 
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except hashing.HashPoolBusy:
+            raise LoginUnavailable()
         return Response(serializer.validated_data)
 
+    def handle_exception(self, exc):
+        response = super().handle_exception(exc)
+        if isinstance(exc, LoginUnavailable):
+            response['Retry-After'] = '1'
+        return response
+
+
+class LoginStatsView(generics.GenericAPIView):
+    """
+    Password hash latency and pool saturation (see accounts/hashing.py).
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(hashing.metrics.stats())
+
 
 class ProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = ProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # request.user may come from the token cache; read the counters fresh.
+        return User.objects.get(pk=self.request.user.pk)
+
+
+class FollowUserView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, user_id):
+        target = get_object_or_404(User, pk=user_id)
+        try:
+            created = graph.follow(request.user, target)
+        except graph.SelfFollowError as exc:
+            raise serializers.ValidationError(str(exc))
+        return Response(
+            {'following': True, 'username': target.username},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+class UnfollowUserView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, user_id):
+        target = get_object_or_404(User, pk=user_id)
+        graph.unfollow(request.user, target)
+        return Response({'following': False, 'username': target.username})
+
+
+class FollowersListView(generics.ListAPIView):
+    serializer_class = FollowerSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FollowCursorPagination
+
+    def get_queryset(self):
+        return graph.followers_of(get_object_or_404(User, pk=self.kwargs['user_id']))
+
+
+class FollowingListView(generics.ListAPIView):
+    serializer_class = FollowingSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FollowCursorPagination
+
+    def get_queryset(self):
+        return graph.following_of(get_object_or_404(User, pk=self.kwargs['user_id']))
+
+
+class MutualFollowersView(generics.ListAPIView):
+    """
+    Followers of the user whom the user follows back.
+    """
+    serializer_class = FollowerSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FollowCursorPagination
+
+    def get_queryset(self):
+        return graph.mutuals_of(get_object_or_404(User, pk=self.kwargs['user_id']))
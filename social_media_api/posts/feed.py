@@ -0,0 +1,150 @@
+"""
+Home feed: fan-out on write with a pull path for large accounts.
+
+When a post is created, posts.signals queues fan_out_post(), which copies
+the post into the FeedEntry timeline of every follower of the author. For
+authors with at least FEED_PULL_THRESHOLD followers the copy is skipped;
+their posts are pulled when a follower reads the feed instead, so one
+post from a large account never costs millions of writes.
+
+Timelines keep the newest FEED_MAX_ENTRIES entries; every write path trims
+the timelines it touched, so a timeline that is never read stays bounded
+too. Reads are cursor paginated on the post id (newer posts have larger
+ids). Pulled posts are read per author from the (author, id) index, at
+most one page each, so a feed read never sorts an account's whole
+history.
+"""
+
+from django.conf import settings
+from django.db.models import OuterRef, Q, Subquery
+
+from accounts.models import Follow, User
+
+from .models import FeedEntry, Post
+
+FANOUT_BATCH_SIZE = 1000
+
+
+def max_entries():
+    return getattr(settings, 'FEED_MAX_ENTRIES', 500)
+
+
+def pull_threshold():
+    return getattr(settings, 'FEED_PULL_THRESHOLD', 10000)
+
+
+# -------------------------------
+# Write path (runs in workers)
+# -------------------------------
+def fan_out_post(post_id):
+    post = Post.objects.select_related('author').filter(pk=post_id).first()
+    if post is None or post.author.followers_count >= pull_threshold():
+        return
+
+    follower_ids = (
+        Follow.objects.filter(user_id=post.author_id)
+        .values_list('follower_id', flat=True)
+        .iterator(chunk_size=FANOUT_BATCH_SIZE)
+    )
+    batch = []
+    for follower_id in follower_ids:
+        batch.append(FeedEntry(owner_id=follower_id, post_id=post.pk, author_id=post.author_id))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            _write_batch(batch)
+            batch = []
+    _write_batch(batch)
+
+
+def _write_batch(entries):
+    if entries:
+        FeedEntry.objects.bulk_create(entries, ignore_conflicts=True)
+        trim_feeds([entry.owner_id for entry in entries])
+
+
+def backfill_author(owner_id, author_id):
+    """
+    After a follow, copy the author's recent posts into the new follower's
+    timeline (large accounts are pulled at read time instead).
+    """
+    if User.objects.filter(pk=author_id, followers_count__gte=pull_threshold()).exists():
+        return
+    post_ids = (
+        Post.objects.filter(author_id=author_id)
+        .order_by('-id').values_list('id', flat=True)[:max_entries()]
+    )
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(owner_id=owner_id, post_id=pk, author_id=author_id) for pk in post_ids],
+        ignore_conflicts=True,
+    )
+    trim_feed(owner_id)
+
+
+def remove_author(owner_id, author_id):
+    """
+    After an unfollow, drop the author's posts from the timeline.
+    """
+    FeedEntry.objects.filter(owner_id=owner_id, author_id=author_id).delete()
+
+
+def trim_feed(owner_id):
+    """
+    Delete entries older than the newest FEED_MAX_ENTRIES of a timeline.
+    """
+    trim_feeds([owner_id])
+
+
+def trim_feeds(owner_ids):
+    """
+    trim_feed() for many timelines in one DELETE; each owner's cutoff is
+    read backwards from the (owner, post) index.
+    """
+    cutoff = (
+        FeedEntry.objects.filter(owner_id=OuterRef('owner_id'))
+        .order_by('-post_id').values('post_id')[max_entries():max_entries() + 1]
+    )
+    FeedEntry.objects.filter(owner_id__in=owner_ids, post_id__lte=Subquery(cutoff)).delete()
+
+
+# -------------------------------
+# Read path
+# -------------------------------
+def home_feed(user, before=None, limit=20):
+    """
+    Return up to `limit` posts for `user`'s home feed, newest first, with
+    ids below `before` (the cursor).
+
+    Merges the materialized timeline with posts pulled from large accounts
+    the user follows and from the user themselves.
+    """
+    entries = FeedEntry.objects.filter(owner=user)
+    if before is not None:
+        entries = entries.filter(post_id__lt=before)
+    post_ids = list(entries.order_by('-post_id').values_list('post_id', flat=True)[:limit])
+
+    pulled_authors = list(
+        User.objects.filter(
+            follower_edges__follower=user, followers_count__gte=pull_threshold()
+        ).values_list('id', flat=True)
+    ) + [user.pk]
+    post_ids += pulled_post_ids(pulled_authors, before, limit)
+
+    post_ids = sorted(set(post_ids), reverse=True)[:limit]
+    posts = Post.objects.select_related('author').in_bulk(post_ids)
+    return [posts[pk] for pk in post_ids if pk in posts]
+
+
+def pulled_post_ids(author_ids, before=None, limit=20):
+    """
+    A query for the ids of the newest `limit` posts (below `before`) by
+    any of `author_ids`: each author contributes at most `limit` ids from
+    a range of its (author, id) index, and only those are merged.
+    """
+    newest = Q()
+    for author_id in author_ids:
+        posts = Post.objects.filter(author_id=author_id)
+        if before is not None:
+            posts = posts.filter(id__lt=before)
+        newest |= Q(pk__in=posts.order_by('-id').values('id')[:limit])
+    if not newest:
+        return Post.objects.none().values_list('id', flat=True)
+    return Post.objects.filter(newest).order_by('-id').values_list('id', flat=True)[:limit]
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.db import models
+
+
+class Post(models.Model):
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='posts',
+        db_index=False  # covered by the (author, id) index
+    )
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Newest posts of an author, used to pull feeds of large accounts
+            models.Index(fields=['author', '-id'], name='post_author_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.author}: {self.content[:30]}"
+
+
+class FeedEntry(models.Model):
+    """
+    One post materialized into one user's home timeline.
+    Rows are written by posts.feed on fan-out, never by request handlers.
+    """
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        db_index=False
+    )
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='feed_entries')
+    # Copied from the post so an unfollow can drop entries without a join
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False
+    )
+
+    class Meta:
+        constraints = [
+            # Also serves "newest entries of owner" by scanning backwards
+            models.UniqueConstraint(fields=['owner', 'post'], name='unique_feed_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', 'author'], name='feed_owner_author_idx'),
+        ]
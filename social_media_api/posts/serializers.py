@@ -0,0 +1,15 @@
+from rest_framework import serializers
+
+from accounts.serializers import AvatarField
+
+from .models import Post
+
+
+class PostSerializer(serializers.ModelSerializer):
+    author = serializers.CharField(source='author.username', read_only=True)
+    author_avatar = AvatarField(source='author')
+
+    class Meta:
+        model = Post
+        fields = ['id', 'author', 'author_avatar', 'content', 'created_at']
+        read_only_fields = ['id', 'created_at']
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import Follow
+
+from . import feed
+from .models import Post
+from social_media_api.tasks import enqueue
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created:
+        enqueue(feed.fan_out_post, instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_on_follow(sender, instance, created, **kwargs):
+    if created:
+        enqueue(feed.backfill_author, instance.follower_id, instance.user_id)
+
+
+@receiver(post_delete, sender=Follow)
+def clean_up_on_unfollow(sender, instance, **kwargs):
+    enqueue(feed.remove_author, instance.follower_id, instance.user_id)
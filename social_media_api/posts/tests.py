@@ -0,0 +1,101 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from accounts import graph
+from accounts.models import User
+
+from . import feed
+from .models import FeedEntry, Post
+
+
+@override_settings(BACKGROUND_TASKS_ASYNC=False, FEED_PULL_THRESHOLD=3, FEED_MAX_ENTRIES=5)
+class FeedTestCase(APITestCase):
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='password123')
+        self.bob = User.objects.create_user(username='bob', password='password123')
+        with self.captureOnCommitCallbacks(execute=True):
+            graph.follow(self.alice, self.bob)
+
+    def publish(self, user, content):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/posts/', {'content': content})
+        return response.data['id']
+
+    def read_feed(self, user, url='/api/feed/'):
+        self.client.force_authenticate(user)
+        return self.client.get(url).data
+
+    def test_post_is_fanned_out_to_followers(self):
+        post_id = self.publish(self.bob, 'hello')
+        self.assertTrue(FeedEntry.objects.filter(owner=self.alice, post_id=post_id).exists())
+
+        data = self.read_feed(self.alice)
+        self.assertEqual([p['content'] for p in data['results']], ['hello'])
+
+    def test_feed_includes_own_posts_and_paginates(self):
+        for i in range(3):
+            self.publish(self.bob, f'bob {i}')
+            self.publish(self.alice, f'alice {i}')
+
+        data = self.read_feed(self.alice, '/api/feed/?page_size=4')
+        self.assertEqual([p['content'] for p in data['results']],
+                         ['alice 2', 'bob 2', 'alice 1', 'bob 1'])
+        data = self.read_feed(self.alice, data['next'])
+        self.assertEqual([p['content'] for p in data['results']], ['alice 0', 'bob 0'])
+
+    def test_large_accounts_are_pulled_not_fanned_out(self):
+        for i in range(3):
+            fan = User.objects.create_user(username=f'fan{i}', password='password123')
+            graph.follow(fan, self.alice)
+        graph.follow(self.bob, self.alice)
+        self.alice.refresh_from_db()
+        self.assertGreaterEqual(self.alice.followers_count, 3)
+
+        post_id = self.publish(self.alice, 'celebrity post')
+        self.assertFalse(FeedEntry.objects.filter(post_id=post_id).exists())
+        data = self.read_feed(self.bob)
+        self.assertEqual([p['content'] for p in data['results']], ['celebrity post'])
+
+    def test_pulled_posts_are_read_per_author(self):
+        posts = [Post.objects.create(author=author, content=f'{author} {i}')
+                 for i in range(4) for author in (self.alice, self.bob)]
+        ids = feed.pulled_post_ids([self.alice.pk, self.bob.pk], limit=3)
+        self.assertEqual(list(ids), [post.pk for post in posts[::-1][:3]])
+        ids = feed.pulled_post_ids([self.alice.pk, self.bob.pk], before=posts[3].pk, limit=3)
+        self.assertEqual(list(ids), [posts[2].pk, posts[1].pk, posts[0].pk])
+
+    @skipUnless(connection.vendor == 'sqlite', "EXPLAIN output is SQLite's")
+    def test_pulled_posts_seek_each_author(self):
+        plan = feed.pulled_post_ids([self.alice.pk, self.bob.pk], before=100).explain()
+        self.assertEqual(plan.count('INDEX post_author_id_idx (author_id=? AND id<?)'), 2)
+
+    def test_unfollow_removes_entries(self):
+        self.publish(self.bob, 'hello')
+        with self.captureOnCommitCallbacks(execute=True):
+            graph.unfollow(self.alice, self.bob)
+        self.assertEqual(self.read_feed(self.alice)['results'], [])
+
+    def test_timeline_is_trimmed(self):
+        for i in range(8):
+            self.publish(self.bob, f'post {i}')
+        self.assertEqual(Post.objects.count(), 8)
+        data = self.read_feed(self.alice)
+        self.assertEqual([p['content'] for p in data['results']],
+                         [f'post {i}' for i in range(7, 2, -1)])
+
+    def test_unread_timelines_stay_bounded(self):
+        carol = User.objects.create_user(username='carol', password='password123')
+        with self.captureOnCommitCallbacks(execute=True):
+            graph.follow(carol, self.bob)
+        for i in range(8):
+            self.publish(self.bob, f'post {i}')
+        # Nobody has read a feed; fan-out alone keeps both timelines capped.
+        for owner in (self.alice, carol):
+            entries = FeedEntry.objects.filter(owner=owner).order_by('-post_id')
+            self.assertEqual(entries.count(), 5)
+            self.assertEqual(entries[0].post.content, 'post 7')
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import PostListCreateView, FeedView
+
+urlpatterns = [
+    path('posts/', PostListCreateView.as_view(), name='post-list'),
+    path('feed/', FeedView.as_view(), name='feed'),
+]
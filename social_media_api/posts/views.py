@@ -0,0 +1,66 @@
+from rest_framework import generics, permissions, serializers
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from . import feed
+from .models import Post
+from .serializers import PostSerializer
+
+
+class PostCursorPagination(CursorPagination):
+    ordering = '-id'
+    page_size = 20
+
+
+class PostListCreateView(generics.ListCreateAPIView):
+    """
+    List the current user's posts, or publish a new one.
+    New posts are fanned out to followers' feeds in the background.
+    """
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PostCursorPagination
+
+    def get_queryset(self):
+        return Post.objects.filter(author=self.request.user).select_related('author')
+
+    def perform_create(self, serializer):
+        serializer.save(author=self.request.user)
+
+
+class FeedView(generics.GenericAPIView):
+    """
+    The current user's home feed, newest first.
+    Pass the `next` link (?cursor=<post id>) to read older posts.
+    """
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    page_size = 20
+    max_page_size = 100
+
+    def get(self, request):
+        before = self.get_int_param('cursor')
+        limit = min(self.get_int_param('page_size') or self.page_size, self.max_page_size)
+
+        posts = feed.home_feed(request.user, before=before, limit=limit)
+
+        next_link = None
+        if len(posts) == limit:
+            next_link = replace_query_param(request.build_absolute_uri(), 'cursor', posts[-1].pk)
+        return Response({
+            'next': next_link,
+            'results': self.get_serializer(posts, many=True).data,
+        })
+
+    def get_int_param(self, name):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        try:
+            value = int(value)
+        except ValueError:
+            raise serializers.ValidationError({name: 'Must be an integer.'})
+        if value <= 0:
+            raise serializers.ValidationError({name: 'Must be positive.'})
+        return value
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
 
     'accounts',
+    'posts',
 ]
 
 MIDDLEWARE = [
@@ -124,6 +125,61 @@ STATIC_URL = 'static/'
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
 
+# Passwords are verified on a bounded pool (see accounts/hashing.py) and
+# re-hashed with the first hasher below on the next successful login.
+AUTHENTICATION_BACKENDS = ['accounts.hashing.PooledModelBackend']
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+LOGIN_HASHING = {
+    'WORKERS': 4,
+    'MAX_PENDING': 16,
+    'QUEUE_TIMEOUT': 2.0,
+}
+
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'accounts.authentication.CachedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '30/min',
+        'login_username': '10/min',
+    },
+}
+
+# Token -> user lookups (see accounts/authentication.py)
+TOKEN_AUTH_CACHE = {
+    'SHARED_TTL': 300,
+    'LOCAL_TTL': 5,
+}
+
+
+# Home feed (see posts/feed.py)
+FEED_MAX_ENTRIES = 500          # entries kept per materialized timeline
+FEED_PULL_THRESHOLD = 10000     # authors with this many followers are pulled, not fanned out
+
+
+# Background tasks (see social_media_api/tasks.py)
+BACKGROUND_TASKS_ASYNC = True   # run tasks on worker threads instead of inline
+BACKGROUND_WORKERS = 2
+
+
+# User uploads
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Profile pictures (see accounts/images.py)
+PROFILE_PICTURE_SIZES = [48, 128, 512]
+PROFILE_PICTURE_MAX_UPLOAD = 10 * 1024 * 1024   # bytes
+PROFILE_PICTURE_MAX_SIDE = 2048                 # originals are downscaled to this
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
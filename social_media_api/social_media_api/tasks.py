@@ -0,0 +1,68 @@
+"""
+A minimal background task queue (feed fan-out, profile picture thumbnails).
+
+Tasks are scheduled with transaction.on_commit so workers only see
+committed rows. With BACKGROUND_TASKS_ASYNC = True they run on a pool of
+daemon worker threads in this process; otherwise they run inline (tests,
+shells).
+Swap `enqueue` for a real broker (Celery, RQ) when running several
+processes.
+"""
+
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_tasks = queue.Queue()
+_workers = []
+_workers_lock = threading.Lock()
+
+
+def _work():
+    while True:
+        func, args = _tasks.get()
+        try:
+            func(*args)
+        except Exception:
+            logger.exception("Background task %s failed", func.__name__)
+        finally:
+            # Each thread holds its own DB connection; don't leak it.
+            close_old_connections()
+            _tasks.task_done()
+
+
+def _start_workers():
+    with _workers_lock:
+        if _workers:
+            return
+        for i in range(getattr(settings, 'BACKGROUND_WORKERS', 2)):
+            worker = threading.Thread(target=_work, name=f'background-worker-{i}', daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def _run(func, args):
+    if getattr(settings, 'BACKGROUND_TASKS_ASYNC', False):
+        _start_workers()
+        _tasks.put((func, args))
+    else:
+        func(*args)
+
+
+def enqueue(func, *args):
+    """
+    Run `func(*args)` in the background once the current transaction commits.
+    """
+    transaction.on_commit(lambda: _run(func, args))
+
+
+def wait():
+    """
+    Block until every queued task has run (for management commands).
+    """
+    _tasks.join()